@@ -50,77 +50,63 @@ ANCHE TUTTE LE TECNOLOGIE AVANZATE PRECEDENTI:
 - Quantum computing, RL, Causal Inference, Meta-learning, etc.
 """
 
+from __future__ import annotations
+
 import numpy as np
-import pandas as pd
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-from torch.utils.data import Dataset, DataLoader
-# import tensorflow as tf  # Commentato per permettere esecuzione senza tensorflow
-from transformers import (
-    BertTokenizer, BertModel,
-    GPT2Tokenizer, GPT2Model,
-    AutoTokenizer, AutoModel
-)
-from sklearn.ensemble import (
-    RandomForestClassifier, GradientBoostingRegressor,
-    AdaBoostClassifier, ExtraTreesClassifier,
-    VotingClassifier, StackingClassifier
-)
-from sklearn.preprocessing import StandardScaler, RobustScaler
-from sklearn.model_selection import (
-    train_test_split, cross_val_score,
-    TimeSeriesSplit, StratifiedKFold
-)
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score,
-    f1_score, roc_auc_score, mean_squared_error,
-    mean_absolute_error, r2_score
-)
-from sklearn.decomposition import PCA, TruncatedSVD
-from sklearn.cluster import (
-    KMeans, DBSCAN, AgglomerativeClustering,
-    SpectralClustering, HDBSCAN
-)
-from sklearn.manifold import TSNE
-from umap import UMAP
-from sklearn.feature_selection import (
-    SelectKBest, f_classif, mutual_info_classif,
-    RFE, SelectFromModel
-)
-import xgboost as xgb
-import lightgbm as lgb
-from catboost import CatBoostClassifier, CatBoostRegressor
-import optuna
-from stable_baselines3 import PPO, A2C, DQN, SAC
-from stable_baselines3.common.vec_env import DummyVecEnv
-import gymnasium as gym
-from gymnasium import spaces
-import networkx as nx
-from torch_geometric.nn import GCNConv, GATConv
-import shap
-import lime
-from lime.lime_tabular import LimeTabularExplainer
+# Le librerie pesanti (sklearn, xgboost, lightgbm, catboost, stable_baselines3,
+# gymnasium, torch_geometric, shap, lime) sono importate dentro i motori che le
+# usano: vedi ai.engine_registry per la costruzione lazy dei motori. pandas e
+# torch sono proxy importati al primo uso; i modelli torch stanno in
+# ai.deep_models, l'export e la compilazione degli alberi nelle funzioni che li usano
 import joblib
 import os
 import logging
 import sys
-import io
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple, Union
-from datetime import datetime, timedelta
-import json
-from collections import defaultdict, deque
-import heapq
-from functools import lru_cache
+import math
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Any, Callable, Optional, Tuple, Union
+from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
 from app.database import (
     get_user_stats, get_recent_user_activity,
+    get_user_stats_many, get_recent_user_activity_many,
     get_badge_eligibility, assign_badge_to_user,
     get_all_users, get_engagement_metrics
 )
+from ai.analysis_cache import analysis_cache
+from ai.analysis_graph import AnalysisGraph
+from ai.stage_executor import StageExecutor
+from ai.compute_executor import compute_executor
+from ai.inference_batcher import MicroBatcher
+from ai.model_registry import (
+    ModelRegistry, ModelBundle, current_bundle, load_joblib_mmap, load_state_dict_mmap
+)
+from ai.engine_registry import LazyEngine, LazyModule, engine_report, is_engine_loaded
+from ai.feature_state import DEFAULT_BEHAVIORAL_FEATURES, behavioral_states
+from ai.feature_schema import MODEL_SCHEMA, MODEL_INPUT_SIZE, RL_STATE_SIZE, FeatureSchema, parse_timestamp
+from app.metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from ai.distillation import DistilledStudent
+
+pd = LazyModule("pandas")
+torch = LazyModule("torch")
+nn = LazyModule("torch.nn")
+F = LazyModule("torch.nn.functional")
+
+# Modelli torch riesportati per compatibilità (from ai.ai_engine import BadgeGAN)
+_DEEP_MODELS = ('LSTMPredictor', 'TransformerPredictor', 'BadgeGAN', 'GraphNeuralNetwork')
+
+def __getattr__(name: str) -> Any:
+    if name in _DEEP_MODELS:
+        from ai import deep_models
+        return getattr(deep_models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Configure logging with text prefix support
 class EmojiLogFormatter(logging.Formatter):
@@ -191,6 +177,19 @@ if __name__ != "__main__":
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Dimensione dell'input di LSTM e Transformer (schema delle feature, con padding)
+DEEP_MODEL_INPUT_SIZE = MODEL_INPUT_SIZE
+
+# File sciolti precedenti al registro versionato, caricati se il registro è vuoto
+LEGACY_MODELS_PATH = os.path.join("ai", "models")
+
+def _first_peak(counts: pd.Series) -> pd.Series:
+    """Per utente, la chiave con il conteggio massimo (la più piccola a parità, come idxmax)"""
+    frame = counts.rename('count').reset_index()
+    user, key = frame.columns[0], frame.columns[1]
+    frame = frame.sort_values('count', ascending=False, kind='stable').drop_duplicates(user)
+    return frame.set_index(user)[key]
+
 class AdvancedFeatureEngineer:
     """Ingegnere delle feature avanzato con auto-learning"""
 
@@ -222,6 +221,43 @@ class AdvancedFeatureEngineer:
 
         return df
 
+    def summarize_temporal_features(self, activity_data: List[Dict]) -> Dict[str, float]:
+        """Medie delle feature temporali cicliche di un utente, senza DataFrame"""
+        times = [parse_timestamp(activity.get('timestamp')) for activity in activity_data]
+        times = [t for t in times if t is not None]
+        if not times:
+            return {}
+
+        n = len(times)
+        columns = {
+            'hour': ([t.hour for t in times], 24),
+            'day_of_week': ([t.weekday() for t in times], 7),
+            'month': ([t.month for t in times], 12),
+        }
+        summary = {}
+        for name, (values, period) in columns.items():
+            prefix = 'day' if name == 'day_of_week' else name
+            summary[name] = sum(values) / n
+            summary[f'{prefix}_sin'] = sum(math.sin(2 * math.pi * v / period) for v in values) / n
+            summary[f'{prefix}_cos'] = sum(math.cos(2 * math.pi * v / period) for v in values) / n
+        return summary
+
+    def summarize_temporal_features_batch(self, activity: pd.DataFrame) -> pd.DataFrame:
+        """summarize_temporal_features di molti utenti: medie raggruppate per user_id"""
+        timestamps = pd.to_datetime(activity['timestamp'], utc=True)
+        columns = {
+            'hour': (timestamps.dt.hour, 24),
+            'day_of_week': (timestamps.dt.dayofweek, 7),
+            'month': (timestamps.dt.month, 12),
+        }
+        frame = {}
+        for name, (values, period) in columns.items():
+            prefix = 'day' if name == 'day_of_week' else name
+            frame[name] = values
+            frame[f'{prefix}_sin'] = np.sin(2 * np.pi * values / period)
+            frame[f'{prefix}_cos'] = np.cos(2 * np.pi * values / period)
+        return pd.DataFrame(frame).groupby(activity['user_id'].to_numpy()).mean().rename_axis('user_id')
+
     def create_interaction_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Crea feature di interazione polinomiali"""
         df = df.copy()
@@ -242,6 +278,8 @@ class AdvancedFeatureEngineer:
             return self._default_behavioral_features()
 
         df = pd.DataFrame(activity_data)
+        # Timestamp convertiti una sola volta (datetime asyncpg o stringhe ISO Supabase)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
 
         features = {}
 
@@ -260,8 +298,7 @@ class AdvancedFeatureEngineer:
             })
             session_stats.columns = ['session_length', 'session_start', 'session_end', 'unique_activities']
             session_stats['session_duration'] = (
-                pd.to_datetime(session_stats['session_end']) -
-                pd.to_datetime(session_stats['session_start'])
+                session_stats['session_end'] - session_stats['session_start']
             ).dt.total_seconds()
 
             features.update({
@@ -272,8 +309,8 @@ class AdvancedFeatureEngineer:
             })
 
         # Temporal patterns
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        df['day_of_week'] = pd.to_datetime(df['timestamp']).dt.dayofweek
+        df['hour'] = df['timestamp'].dt.hour
+        df['day_of_week'] = df['timestamp'].dt.dayofweek
 
         hourly_pattern = df.groupby('hour').size()
         daily_pattern = df.groupby('day_of_week').size()
@@ -285,210 +322,263 @@ class AdvancedFeatureEngineer:
             'weekend_ratio': daily_pattern.loc[5:6].sum() / daily_pattern.sum()
         })
 
-        # Sequence analysis
+        # Sequence analysis (ordinamento stabile: a parità di timestamp vale l'ordine di arrivo)
         if len(df) > 1:
-            df = df.sort_values('timestamp')
-            transitions = []
-            for i in range(len(df) - 1):
-                transitions.append(f"{df.iloc[i]['activity_type']}->{df.iloc[i+1]['activity_type']}")
+            ordered = df['activity_type'].iloc[np.argsort(df['timestamp'].to_numpy(), kind='stable')].astype(str)
+            transitions = (ordered.shift() + '->' + ordered).iloc[1:]
 
-            transition_counts = pd.Series(transitions).value_counts()
-            features['most_common_transition'] = transition_counts.index[0]
+            # A parità di conteggio vince la transizione apparsa per prima
+            transition_counts = transitions.groupby(transitions, sort=False).size()
+            features['most_common_transition'] = transition_counts.idxmax()
             features['transition_diversity'] = transition_counts.count() / len(transitions)
 
         return features
 
-    def _default_behavioral_features(self) -> Dict[str, Any]:
-        """Feature comportamentali di default"""
-class LSTMPredictor(nn.Module):
-    """LSTM per predizioni temporali avanzate"""
-
-    def __init__(self, input_size: int, hidden_size: int = 128, num_layers: int = 3,
-                 dropout: float = 0.3, output_size: int = 1):
-        super(LSTMPredictor, self).__init__()
-        self.hidden_size = hidden_size
-        self.num_layers = num_layers
-
-        self.lstm = nn.LSTM(
-            input_size=input_size,
-            hidden_size=hidden_size,
-            num_layers=num_layers,
-            dropout=dropout if num_layers > 1 else 0,
-            batch_first=True,
-            bidirectional=True
-        )
-
-        self.attention = nn.MultiheadAttention(hidden_size * 2, num_heads=8, dropout=0.1)
-
-        self.fc_layers = nn.Sequential(
-            nn.Linear(hidden_size * 2, hidden_size),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_size, hidden_size // 2),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_size // 2, output_size)
-        )
-
-        self.layer_norm = nn.LayerNorm(hidden_size * 2)
-
-    def forward(self, x):
-        # LSTM layers
-        lstm_out, (h_n, c_n) = self.lstm(x)
-
-        # Attention mechanism
-        attn_out, _ = self.attention(lstm_out, lstm_out, lstm_out)
-
-        # Global average pooling
-        pooled = torch.mean(attn_out, dim=1)
-
-        # Layer normalization
-        normalized = self.layer_norm(pooled)
-
-        # Fully connected layers
-        output = self.fc_layers(normalized)
-        return output
-
-class TransformerPredictor(nn.Module):
-    """Transformer per analisi di sequenze comportamentali"""
-
-    def __init__(self, input_size: int, d_model: int = 256, nhead: int = 8,
-                 num_layers: int = 6, dropout: float = 0.1, output_size: int = 1):
-        super(TransformerPredictor, self).__init__()
-
-        self.input_projection = nn.Linear(input_size, d_model)
-        self.positional_encoding = nn.Parameter(torch.randn(1, 1000, d_model))
-
-        encoder_layer = nn.TransformerEncoderLayer(
-            d_model=d_model,
-            nhead=nhead,
-            dim_feedforward=d_model * 4,
-            dropout=dropout,
-            activation='gelu',
-            batch_first=True
-        )
-
-        self.transformer_encoder = nn.TransformerEncoder(
-            encoder_layer, num_layers=num_layers
-        )
-
-        self.output_projection = nn.Sequential(
-            nn.Linear(d_model, d_model // 2),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(d_model // 2, output_size)
-        )
-
-    def forward(self, x):
-        # Input projection
-        x = self.input_projection(x)
-
-        # Add positional encoding
-        seq_len = x.size(1)
-        x = x + self.positional_encoding[:, :seq_len, :]
-
-        # Transformer encoding
-        encoded = self.transformer_encoder(x)
-
-        # Global average pooling
-        pooled = torch.mean(encoded, dim=1)
-
-        # Output projection
-        output = self.output_projection(pooled)
-        return output
-
-class BadgeGAN(nn.Module):
-    """GAN per generazione intelligente di nuovi badge"""
-
-    def __init__(self, latent_dim: int = 100, badge_dim: int = 50):
-        super(BadgeGAN, self).__init__()
-        self.latent_dim = latent_dim
-        self.badge_dim = badge_dim
-
-        # Generator
-        self.generator = nn.Sequential(
-            nn.Linear(latent_dim, 256),
-            nn.BatchNorm1d(256),
-            nn.ReLU(),
-            nn.Linear(256, 512),
-            nn.BatchNorm1d(512),
-            nn.ReLU(),
-            nn.Linear(512, badge_dim),
-            nn.Tanh()
-        )
-
-        # Discriminator
-        self.discriminator = nn.Sequential(
-            nn.Linear(badge_dim, 512),
-            nn.LeakyReLU(0.2),
-            nn.Dropout(0.3),
-            nn.Linear(512, 256),
-            nn.LeakyReLU(0.2),
-            nn.Dropout(0.3),
-            nn.Linear(256, 1),
-            nn.Sigmoid()
-        )
-
-    def generate_badge(self, num_badges: int = 1):
-        """Genera nuovi badge"""
-        z = torch.randn(num_badges, self.latent_dim)
-        return self.generator(z)
-
-    def discriminate(self, badges):
-        """Discrimina badge reali vs generati"""
-        return self.discriminator(badges)
-
-class GraphNeuralNetwork(nn.Module):
-    """GNN per modellare relazioni tra utenti e badge"""
-
-    def __init__(self, num_features: int, hidden_channels: int = 64, num_classes: int = 2):
-        super(GraphNeuralNetwork, self).__init__()
-
-        self.conv1 = GCNConv(num_features, hidden_channels)
-        self.conv2 = GCNConv(hidden_channels, hidden_channels)
-        self.conv3 = GCNConv(hidden_channels, hidden_channels)
-
-        self.attention = GATConv(hidden_channels, hidden_channels, heads=8, concat=False)
-
-        self.classifier = nn.Sequential(
-            nn.Linear(hidden_channels, hidden_channels // 2),
-            nn.ReLU(),
-            nn.Dropout(0.5),
-            nn.Linear(hidden_channels // 2, num_classes)
-        )
+    def create_behavioral_features_batch(self, activity: pd.DataFrame,
+                                         user_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """Feature comportamentali di molti utenti con operazioni raggruppate.
+
+        activity ha una riga per attività (user_id, activity_type, timestamp ed
+        eventualmente session_id). Restituisce una riga per utente con gli stessi
+        valori di create_behavioral_features; i conteggi dei tipi di attività
+        assenti valgono 0 e gli utenti di user_ids senza attività prendono i default.
+        """
+        if activity.empty:
+            user_ids = list(user_ids or [])
+            return pd.DataFrame([self._default_behavioral_features()] * len(user_ids),
+                                index=pd.Index(user_ids, name='user_id'))
+
+        df = activity.reset_index(drop=True)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        df['hour'] = df['timestamp'].dt.hour
+        df['day_of_week'] = df['timestamp'].dt.dayofweek
 
-    def forward(self, x, edge_index):
-        # Graph convolutions
-        x = self.conv1(x, edge_index)
-        x = F.relu(x)
-        x = F.dropout(x, p=0.5, training=self.training)
-
-        x = self.conv2(x, edge_index)
-        x = F.relu(x)
-        x = F.dropout(x, p=0.5, training=self.training)
-
-        x = self.conv3(x, edge_index)
-        x = F.relu(x)
+        # Pattern di frequenza
+        counts = df.groupby(['user_id', 'activity_type']).size().unstack(fill_value=0)
+        counts.columns = [f'activity_{act}_count' for act in counts.columns]
+        parts = [counts]
 
-        # Attention mechanism
-        x = self.attention(x, edge_index)
-        x = F.relu(x)
+        # Session analysis
+        if 'session_id' in df.columns:
+            sessions = df.groupby(['user_id', 'session_id']).agg(
+                session_length=('timestamp', 'count'),
+                session_start=('timestamp', 'min'),
+                session_end=('timestamp', 'max'),
+                unique_activities=('activity_type', 'nunique'),
+            )
+            sessions['session_duration'] = (sessions['session_end'] - sessions['session_start']).dt.total_seconds()
+            per_user = sessions.groupby(level='user_id')
+            timestamps = df.groupby('user_id')['timestamp']
+            span_days = (timestamps.max() - timestamps.min()).dt.days.clip(lower=1)
+            parts.append(pd.DataFrame({
+                'avg_session_length': per_user['session_length'].mean(),
+                'avg_session_duration': per_user['session_duration'].mean(),
+                'sessions_per_day': per_user.size().reindex(span_days.index, fill_value=0) / span_days,
+                'avg_unique_activities_per_session': per_user['unique_activities'].mean(),
+            }))
+
+        # Temporal patterns: istogrammi (utente, ora) e (utente, giorno)
+        hourly = df.groupby(['user_id', 'hour']).size()
+        daily = df.groupby(['user_id', 'day_of_week']).size()
+        hourly_by_user = hourly.groupby(level='user_id')
+        day_totals = daily.groupby(level='user_id').sum()
+        weekend = daily[daily.index.get_level_values('day_of_week') >= 5].groupby(level='user_id').sum()
+        parts.append(pd.DataFrame({
+            'peak_hour': _first_peak(hourly),
+            'peak_day': _first_peak(daily),
+            'activity_concentration': hourly_by_user.std() / hourly_by_user.mean(),
+            'weekend_ratio': weekend.reindex(day_totals.index, fill_value=0) / day_totals,
+        }))
+
+        # Sequence analysis: coppie (precedente, corrente) dai codici categorici spostati di una riga
+        ordered = df.sort_values(['user_id', 'timestamp'], kind='stable')
+        activity_types = ordered['activity_type'].astype(str).astype('category')
+        names = np.asarray(activity_types.cat.categories, dtype=object)
+        codes = pd.Series(activity_types.cat.codes.to_numpy(np.int64), index=ordered.index)
+        follows = ordered['user_id'].eq(ordered['user_id'].shift())
+        if follows.any():
+            pairs = pd.DataFrame({
+                'user_id': ordered['user_id'][follows],
+                'pair': codes.shift()[follows].astype(np.int64) * len(names) + codes[follows],
+                'position': np.flatnonzero(follows.to_numpy()),
+            })
+            pair_stats = pairs.groupby(['user_id', 'pair']).agg(
+                count=('position', 'size'), first=('position', 'min')
+            ).reset_index()
+            # A parità di conteggio vince la transizione apparsa per prima
+            top = pair_stats.sort_values(['user_id', 'count', 'first'], ascending=[True, False, True])
+            top = top.drop_duplicates('user_id').set_index('user_id')['pair']
+            parts.append(pd.DataFrame({
+                'most_common_transition': pd.Series(
+                    names[top.to_numpy() // len(names)] + '->' + names[top.to_numpy() % len(names)], index=top.index
+                ),
+                'transition_diversity': pair_stats.groupby('user_id').size() / pairs.groupby('user_id').size(),
+            }))
+
+        result = pd.concat(parts, axis=1)
+        result.index.name = 'user_id'
+
+        if user_ids is not None:
+            result = result.reindex(pd.Index(user_ids, name='user_id'))
+            absent = ~result.index.isin(counts.index)
+            for name, value in self._default_behavioral_features().items():
+                result.loc[absent, name] = value
+            result[counts.columns] = result[counts.columns].fillna(0).astype(int)
+
+        return result
 
-        # Classification
-        out = self.classifier(x)
-        return F.log_softmax(out, dim=1)
+    def _default_behavioral_features(self) -> Dict[str, Any]:
+        """Feature comportamentali di default"""
+        return dict(DEFAULT_BEHAVIORAL_FEATURES)
+
+# Parametro dei thread nativi di ogni membro dell'ensemble (gradient_boosting è single-thread)
+ENSEMBLE_THREAD_PARAMS = {
+    'xgboost': 'n_jobs',
+    'lightgbm': 'n_jobs',
+    'catboost': 'thread_count',
+    'random_forest': 'n_jobs',
+    'extra_trees': 'n_jobs',
+}
+
+def ensemble_concurrency() -> int:
+    """Predict dell'ensemble che possono girare insieme (uno per worker del compute pool)"""
+    return max(1, int(os.getenv("AI_ENSEMBLE_CONCURRENCY", str(compute_executor.max_workers))))
+
+def ensemble_thread_budget(names: List[str], total: Optional[int] = None,
+                           concurrency: Optional[int] = None) -> Dict[str, int]:
+    """Thread nativi per membro.
+
+    I core (AI_ENSEMBLE_THREADS, default tutti) si dividono tra i predict
+    concorrenti, e la quota di ogni predict tra i membri, che girano insieme.
+    """
+    total = total or int(os.getenv("AI_ENSEMBLE_THREADS", str(os.cpu_count() or 1)))
+    per_call = max(1, total // (concurrency or ensemble_concurrency()))
+    threaded = [name for name in names if name in ENSEMBLE_THREAD_PARAMS]
+    single = len(names) - len(threaded)
+    per_model = max(1, (per_call - single) // max(1, len(threaded)))
+    return {name: (per_model if name in ENSEMBLE_THREAD_PARAMS else 1) for name in names}
 
 class AdvancedEnsembleModel:
     """Ensemble avanzato con stacking e meta-learning"""
 
+    # Pool dei membri condiviso tra le istanze (non serializzato con il modello)
+    _member_pool: Optional[ThreadPoolExecutor] = None
+    _member_pool_lock = threading.Lock()
+    # Predict concorrenti oltre ensemble_concurrency() aspettano: il budget dei thread resta valido
+    _predict_slots: Optional[threading.BoundedSemaphore] = None
+
     def __init__(self):
         self.base_models = {}
         self.meta_model = None
         self.feature_selector = None
         self.is_trained = False
+        self.fit_seconds: Dict[str, float] = {}
+        # Campione delle feature selezionate per la verifica di parità degli alberi compilati
+        self.reference_rows: Optional[np.ndarray] = None
+        self._init_timings()
+
+    # Stato di runtime, ricostruito al caricamento invece che serializzato
+    _RUNTIME_STATE = ('predict_time', 'compiled', 'derived_features', 'rows_predicted', 'predict_seconds',
+                      '_stats_lock')
+
+    def _init_timings(self):
+        self.predict_time: Dict[str, LatencyHistogram] = {}
+        self.predict_chunk_rows = int(os.getenv("AI_ENSEMBLE_PREDICT_CHUNK", "4096"))
+        self.compiled = None
+        self.derived_features: Optional[Dict[str, Tuple[str, str, str]]] = None
+        self.rows_predicted = 0
+        self.predict_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in self._RUNTIME_STATE:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('fit_seconds', {})
+        self.__dict__.setdefault('reference_rows', None)
+        self._init_timings()
+        # Il budget dipende dalla macchina che serve il modello, non da quella che l'ha addestrato
+        self.apply_thread_budget()
+
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        with cls._member_pool_lock:
+            if cls._member_pool is None:
+                cls._member_pool = ThreadPoolExecutor(max_workers=len(ENSEMBLE_THREAD_PARAMS) + 1,
+                                                      thread_name_prefix="ai-ensemble")
+            return cls._member_pool
+
+    @classmethod
+    def _slots(cls) -> threading.BoundedSemaphore:
+        with cls._member_pool_lock:
+            if cls._predict_slots is None:
+                cls._predict_slots = threading.BoundedSemaphore(ensemble_concurrency())
+            return cls._predict_slots
+
+    @classmethod
+    def _reset_pool_after_fork(cls):
+        cls._member_pool = None
+        cls._predict_slots = None
+        cls._member_pool_lock = threading.Lock()
+
+    def apply_thread_budget(self):
+        """Imposta i thread nativi di ogni membro secondo ensemble_thread_budget"""
+        for name, threads in ensemble_thread_budget(list(self.base_models)).items():
+            param = ENSEMBLE_THREAD_PARAMS.get(name)
+            if param is None:
+                continue
+            try:
+                self.base_models[name].set_params(**{param: threads})
+            except Exception as e:
+                logger.warning(f"Could not set {param}={threads} on {name}: {e}")
+
+    def _run_members(self, fn: Callable[[str, Any], Any]) -> Dict[str, Any]:
+        """Esegue fn(nome, modello) per ogni membro in parallelo: latenza del più lento, non la somma"""
+        futures = {name: self._pool().submit(fn, name, model) for name, model in self.base_models.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    @staticmethod
+    def _member_predict(model, X) -> np.ndarray:
+        return model.predict_proba(X) if hasattr(model, 'predict_proba') else model.predict(X)
+
+    def compile(self, backend: Optional[str] = None, directory: Optional[str] = None) -> Dict[str, str]:
+        """Passa ai predittori compilati (AI_TREE_BACKEND); restituisce il backend di ogni membro"""
+        if not self.is_trained:
+            return {}
+        reference = self.reference_rows
+        if reference is None:
+            n_features = len(self.feature_selector.get_support(indices=True))
+            reference = np.random.default_rng(0).normal(size=(64, n_features)).astype(np.float32)
+        from ai.tree_compiler import compile_ensemble
+        self.compiled = compile_ensemble(self.feature_selector, self.base_models, reference,
+                                         ensemble_thread_budget(list(self.base_models)),
+                                         backend=backend, directory=directory)
+        return self.compiled.backends if self.compiled else {name: 'library' for name in self.base_models}
+
+    def export_compiled(self, directory: str) -> List[str]:
+        """Librerie native treelite dei membri supportati, scritte nella versione del registro"""
+        from ai.tree_compiler import export_treelite, TREELITE_MEMBERS
+        paths = []
+        for name, model in self.base_models.items():
+            if name not in TREELITE_MEMBERS:
+                continue
+            try:
+                paths.append(export_treelite(name, model, directory))
+            except Exception as e:
+                logger.warning(f"treelite export of {name} failed, it will be served inplace: {e}")
+        return paths
 
     def build_ensemble(self):
         """Costruisce ensemble di modelli eterogenei"""
+        import xgboost as xgb
+        import lightgbm as lgb
+        from catboost import CatBoostClassifier
+        from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingRegressor
+
         self.base_models = {
             'xgboost': xgb.XGBClassifier(
                 n_estimators=500,
@@ -537,6 +627,7 @@ class AdvancedEnsembleModel:
                 random_state=42
             )
         }
+        self.apply_thread_budget()
 
         # Meta-model per stacking
         self.meta_model = nn.Sequential(
@@ -552,30 +643,36 @@ class AdvancedEnsembleModel:
 
     def fit(self, X: pd.DataFrame, y: pd.Series):
         """Addestra l'ensemble"""
+        from sklearn.feature_selection import SelectKBest, f_classif
+
         self.build_ensemble()
 
         # Feature selection
         self.feature_selector = SelectKBest(score_func=f_classif, k=min(50, X.shape[1]))
         X_selected = self.feature_selector.fit_transform(X, y)
+        self.derived_features = None
+        self.reference_rows = np.ascontiguousarray(X_selected[:256], dtype=np.float32)
 
-        # Train base models
-        base_predictions = []
-
-        for name, model in self.base_models.items():
+        # Train base models (in parallelo, ognuno con il suo budget di thread)
+        def fit_member(name: str, model) -> np.ndarray:
             logger.info(f"Training {name}...")
+            started = time.perf_counter()
             model.fit(X_selected, y)
-            pred = model.predict_proba(X_selected) if hasattr(model, 'predict_proba') else model.predict(X_selected)
-            base_predictions.append(pred)
+            self.fit_seconds[name] = round(time.perf_counter() - started, 3)
+            return self._member_predict(model, X_selected)
+
+        base_predictions = self._run_members(fit_member)
+        logger.info(f"Base models trained: {self.fit_seconds}")
 
         # Stack predictions for meta-model
-        stacked_features = np.column_stack(base_predictions)
+        stacked_features = np.column_stack([base_predictions[name] for name in self.base_models])
 
         # Train meta-model
         meta_dataset = torch.utils.data.TensorDataset(
             torch.FloatTensor(stacked_features),
             torch.FloatTensor(y.values.reshape(-1, 1))
         )
-        meta_loader = DataLoader(meta_dataset, batch_size=32, shuffle=True)
+        meta_loader = torch.utils.data.DataLoader(meta_dataset, batch_size=32, shuffle=True)
 
         optimizer = torch.optim.Adam(self.meta_model.parameters(), lr=0.001)
         criterion = nn.BCELoss()
@@ -592,18 +689,97 @@ class AdvancedEnsembleModel:
         logger.info("✅ Ensemble model trained successfully")
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
-        """Predice con l'ensemble"""
+        """Predice con l'ensemble (a blocchi di righe sui frame grandi)"""
         if not self.is_trained:
             raise ValueError("Model not trained yet")
 
-        X_selected = self.feature_selector.transform(X)
-        base_predictions = []
-
-        for name, model in self.base_models.items():
-            pred = model.predict_proba(X_selected) if hasattr(model, 'predict_proba') else model.predict(X_selected)
-            base_predictions.append(pred)
+        if self.compiled is not None:
+            X_selected = self.compiled.select(X)
+        else:
+            X_selected = self.feature_selector.transform(X)
+        chunk = max(1, self.predict_chunk_rows)
+        if len(X_selected) <= chunk:
+            return self._predict_selected(X_selected)
+        return np.concatenate([
+            self._predict_selected(X_selected[start:start + chunk])
+            for start in range(0, len(X_selected), chunk)
+        ])
 
-        stacked_features = np.column_stack(base_predictions)
+    def predict_features(self, features: Dict[str, Any]) -> float:
+        """Predizione per un solo utente da un dizionario di feature.
+
+        Le interazioni a coppie del training (create_interaction_features) non
+        sono nel dizionario: vengono ricalcolate dalle feature base, e le
+        colonne mancanti prendono il default dello schema. Con gli alberi
+        compilati la riga viene assemblata direttamente nelle colonne
+        selezionate, senza DataFrame.
+        """
+        if self.compiled is not None and self.compiled.feature_names is not None:
+            row = self._feature_row(features, self.compiled.feature_names)
+            return float(self._predict_selected(row[np.newaxis, :])[0])
+
+        names = getattr(self.feature_selector, 'feature_names_in_', None)
+        if names is None:
+            return float(self.predict(pd.DataFrame([features]))[0])
+        names = list(names)
+        return float(self.predict(pd.DataFrame(self._feature_row(features, names)[np.newaxis, :], columns=names))[0])
+
+    def _derived_columns(self) -> Dict[str, Tuple[str, str, str]]:
+        """Colonne di interazione del training -> (sinistra, destra, operazione).
+
+        create_interaction_features aggiunge le interazioni dopo le colonne
+        originali: le coppie sono quelle delle colonne che precedono la prima
+        interazione, nello stesso ordine.
+        """
+        if self.derived_features is None:
+            names = list(getattr(self.feature_selector, 'feature_names_in_', []))
+            first = next((i for i, name in enumerate(names) if name.endswith('_interaction')), len(names))
+            known, derived = set(names), {}
+            for i, left in enumerate(names[:first]):
+                for right in names[i + 1:first]:
+                    for operation in ('interaction', 'ratio'):
+                        name = f'{left}_{right}_{operation}'
+                        if name in known:
+                            derived[name] = (left, right, operation)
+            self.derived_features = derived
+        return self.derived_features
+
+    def _feature_row(self, features: Dict[str, Any], names: List[str]) -> np.ndarray:
+        """Riga float32 nelle colonne names: valori del dizionario, interazioni ricalcolate o default"""
+        derived = self._derived_columns()
+
+        def value(name: str) -> float:
+            raw = features.get(name)
+            if isinstance(raw, (int, float, np.number)) and not isinstance(raw, bool):
+                return float(raw)
+            if name in derived:
+                left, right, operation = derived[name]
+                left, right = value(left), value(right)
+                return left * right if operation == 'interaction' else left / (right + 1e-8)
+            return MODEL_SCHEMA.defaults.get(name, 0.0)
+
+        row = np.array([value(name) for name in names], dtype=np.float32)
+        return np.nan_to_num(row, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def _predict_selected(self, X_selected: np.ndarray) -> np.ndarray:
+        compiled = self.compiled
+
+        def predict_member(name: str, model) -> np.ndarray:
+            started = time.perf_counter()
+            if compiled is not None:
+                pred = compiled.predict_member(name, X_selected)
+            else:
+                pred = self._member_predict(model, X_selected)
+            self.predict_time.setdefault(name, LatencyHistogram()).observe(time.perf_counter() - started)
+            return pred
+
+        with self._slots():
+            started = time.perf_counter()
+            base_predictions = self._run_members(predict_member)
+        with self._stats_lock:
+            self.rows_predicted += len(X_selected)
+            self.predict_seconds += time.perf_counter() - started
+        stacked_features = np.column_stack([base_predictions[name] for name in self.base_models])
         meta_input = torch.FloatTensor(stacked_features)
 
         self.meta_model.eval()
@@ -612,12 +788,28 @@ class AdvancedEnsembleModel:
 
         return final_predictions.flatten()
 
+    def get_timings(self) -> Dict[str, Any]:
+        """Tempi di training e latenza di predizione per membro, con i thread assegnati"""
+        with self._stats_lock:
+            rows, seconds = self.rows_predicted, self.predict_seconds
+        return {
+            'threads': ensemble_thread_budget(list(self.base_models)),
+            'tree_backends': self.compiled.backends if self.compiled else 'library',
+            'rows_predicted': rows,
+            'predictions_per_second': round(rows / seconds, 1) if seconds else None,
+            'fit_seconds': dict(self.fit_seconds),
+            'predict': {name: histogram.snapshot() for name, histogram in sorted(self.predict_time.items())},
+        }
+
+os.register_at_fork(after_in_child=AdvancedEnsembleModel._reset_pool_after_fork)
+
 class ReinforcementLearningAgent:
     """Agente RL per ottimizzazione dinamica delle raccomandazioni"""
 
     def __init__(self, state_dim: int = 50, action_dim: int = 10):
         self.state_dim = state_dim
         self.action_dim = action_dim
+        from stable_baselines3 import PPO, A2C
 
         # Crea environment personalizzato
         self.env = self._create_badge_env()
@@ -653,6 +845,9 @@ class ReinforcementLearningAgent:
 
     def _create_badge_env(self):
         """Crea environment RL per ottimizzazione badge"""
+        import gymnasium as gym
+        from gymnasium import spaces
+        from stable_baselines3.common.vec_env import DummyVecEnv
 
         class BadgeRecommendationEnv(gym.Env):
             def __init__(self, state_dim=50, action_dim=10):
@@ -755,6 +950,9 @@ class ExplainabilityEngine:
 
     def initialize_explainers(self, model, X_train: pd.DataFrame):
         """Inizializza gli explainer"""
+        import shap
+        from lime.lime_tabular import LimeTabularExplainer
+
         self.feature_names = X_train.columns.tolist()
 
         # SHAP explainer
@@ -817,6 +1015,10 @@ class AdvancedClusteringEngine:
     def perform_advanced_clustering(self, user_features: pd.DataFrame,
                                    n_clusters_range: range = range(2, 11)) -> Dict[str, Any]:
         """Esegue clustering avanzato con valutazione automatica"""
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.decomposition import PCA
+        from sklearn.cluster import KMeans, SpectralClustering, HDBSCAN
+        from sklearn.metrics import silhouette_score, calinski_harabasz_score
 
         # Preprocessing
         scaler = StandardScaler()
@@ -925,10 +1127,10 @@ class AdvancedClusteringEngine:
 
             self.segment_profiles[f'cluster_{cluster_id}'] = profile
 
-    def get_user_segment(self, user_id: str, user_features: pd.DataFrame) -> str:
-        """Determina il segmento di un utente"""
+    def get_user_segment(self, user_id: str, user_features: Union[Dict[str, Any], pd.DataFrame]) -> str:
+        """Determina il segmento di un utente (feature come dizionario o DataFrame)"""
         # Simplified: return based on dominant features
-        if user_features.empty:
+        if user_features is None or len(user_features) == 0:
             return 'unknown'
 
         # Calculate distances to cluster centers (simplified)
@@ -1063,41 +1265,104 @@ class TemporalAnalysisEngine:
             for f in forecast
         ]
 
+def _preprocess_training_frame(feature_engineer: AdvancedFeatureEngineer, data: pd.DataFrame) -> pd.DataFrame:
+    """Preprocessing di training (funzione di modulo: picklable per il process pool)"""
+    processed_data = data.copy()
+
+    # Feature engineering
+    processed_data = feature_engineer.create_temporal_features(processed_data)
+    processed_data = feature_engineer.create_interaction_features(processed_data)
+
+    # Handle missing values
+    processed_data = processed_data.fillna(processed_data.mean())
+
+    # Remove infinite values
+    processed_data = processed_data.replace([np.inf, -np.inf], np.nan).fillna(0)
+
+    return processed_data
+
+def _compute_feature_frame(feature_engineer: AdvancedFeatureEngineer, user_ids: List[str], stats: Dict[str, Dict],
+                           activity: Dict[str, List[Dict]]) -> pd.DataFrame:
+    """Come UltraAdvancedClas2eAI._compute_ultra_features, per tutti gli utenti insieme.
+
+    Funzione di modulo su dati semplici (nessun modello): picklable per il process pool.
+    """
+    events = pd.DataFrame([
+        {'user_id': user_id, **event} for user_id, user_activity in activity.items() for event in user_activity
+    ])
+    if events.empty:
+        events = pd.DataFrame(columns=['user_id', 'activity_type', 'timestamp'])
+    # Un'unica conversione dei timestamp per feature comportamentali e temporali
+    events['timestamp'] = pd.to_datetime(events['timestamp'], utc=True)
+
+    frame = pd.DataFrame.from_dict(stats, orient='index').reindex(pd.Index(user_ids, name='user_id'))
+    frame = frame.join(feature_engineer.create_behavioral_features_batch(events, user_ids))
+    if not events.empty:
+        frame = frame.join(feature_engineer.summarize_temporal_features_batch(events))
+    return frame
+
 class UltraAdvancedClas2eAI:
     """AI Engine completo per tutto l'ecosistema clas2e"""
 
+    # Motori costruiti al primo utilizzo (vedi ai.engine_registry)
+    # Componenti di base (già esistenti)
+    feature_engineer = LazyEngine("AdvancedFeatureEngineer", "Feature engineering")
+    ensemble_model = LazyEngine("AdvancedEnsembleModel", "Stacking ensemble (xgboost, lightgbm, catboost)")
+    rl_agent = LazyEngine("ReinforcementLearningAgent", "PPO/A2C recommendation agent")
+    explainability_engine = LazyEngine("ExplainabilityEngine", "SHAP/LIME explanations")
+    clustering_engine = LazyEngine("AdvancedClusteringEngine", "User segmentation")
+    temporal_engine = LazyEngine("TemporalAnalysisEngine", "Temporal patterns")
+
+    # NUOVI COMPONENTI ULTRA-ENHANCED PER NEXT-GENERATION ECOSYSTEM
+    continuous_learner = LazyEngine("ContinuousLearningEngine", "Continuous learning")
+    iot_integrator = LazyEngine("IoTIntegrationEngine", "IoT integration")
+    ar_vr_engine = LazyEngine("ARVREngine", "AR/VR experiences")
+    certification_engine = LazyEngine("AutomaticCertificationEngine", "Automatic certification")
+    portfolio_engine = LazyEngine("DigitalPortfolioEngine", "Digital portfolios")
+    mentorship_ai = LazyEngine("AIMentorshipEngine", "Mentorship matching")
+    career_predictor = LazyEngine("CareerPredictionEngine", "Career prediction")
+    equity_engine = LazyEngine("EquityAndInclusionEngine", "Equity and inclusion")
+    marketplace_engine = LazyEngine("PeerToPeerMarketplaceEngine", "Peer-to-peer marketplace")
+    microservices_orchestrator = LazyEngine("AIMicroservicesOrchestrator", "Microservices orchestration")
+
+    # Tecnologie avanzate (quantum, federated, etc.)
+    quantum_engine = LazyEngine("QuantumMachineLearningEngine", "Quantum ML")
+    federated_engine = LazyEngine("FederatedLearningEngine", "Federated learning")
+    causal_engine = LazyEngine("CausalInferenceEngine", "Causal inference")
+    meta_learning_engine = LazyEngine("MetaLearningEngine", "Meta-learning")
+    ssl_engine = LazyEngine("SelfSupervisedLearningEngine", "Self-supervised learning")
+    multimodal_engine = LazyEngine("MultiModalLearningEngine", "Multi-modal learning")
+    nas_engine = LazyEngine("NeuralArchitectureSearchEngine", "Neural architecture search")
+    bayesian_opt_engine = LazyEngine("AdvancedBayesianOptimizationEngine", "Bayesian optimization")
+    real_time_engine = LazyEngine("RealTimeAdaptationEngine", "Online adaptation")
+    cognitive_engine = LazyEngine("CognitiveComputingEngine", "Cognitive computing")
+
     def __init__(self):
-        # Componenti di base (già esistenti)
-        self.feature_engineer = AdvancedFeatureEngineer()
-        self.ensemble_model = AdvancedEnsembleModel()
-        self.rl_agent = ReinforcementLearningAgent()
-        self.explainability_engine = ExplainabilityEngine()
-        self.clustering_engine = AdvancedClusteringEngine()
-        self.temporal_engine = TemporalAnalysisEngine()
-
-        # NUOVI COMPONENTI ULTRA-ENHANCED PER NEXT-GENERATION ECOSYSTEM
-        self.continuous_learner = ContinuousLearningEngine()
-        self.iot_integrator = IoTIntegrationEngine()
-        self.ar_vr_engine = ARVREngine()
-        self.certification_engine = AutomaticCertificationEngine()
-        self.portfolio_engine = DigitalPortfolioEngine()
-        self.mentorship_ai = AIMentorshipEngine()
-        self.career_predictor = CareerPredictionEngine()
-        self.equity_engine = EquityAndInclusionEngine()
-        self.marketplace_engine = PeerToPeerMarketplaceEngine()
-        self.microservices_orchestrator = AIMicroservicesOrchestrator()
-
-        # Tecnologie avanzate (quantum, federated, etc.)
-        self.quantum_engine = QuantumMachineLearningEngine()
-        self.federated_engine = FederatedLearningEngine()
-        self.causal_engine = CausalInferenceEngine()
-        self.meta_learning_engine = MetaLearningEngine()
-        self.ssl_engine = SelfSupervisedLearningEngine()
-        self.multimodal_engine = MultiModalLearningEngine()
-        self.nas_engine = NeuralArchitectureSearchEngine()
-        self.bayesian_opt_engine = AdvancedBayesianOptimizationEngine()
-        self.real_time_engine = RealTimeAdaptationEngine()
-        self.cognitive_engine = CognitiveComputingEngine()
+        # Grafo degli stadi di analisi (valutazione parziale per sezioni)
+        # ed esecutore che lancia in parallelo gli stadi indipendenti
+        self.analysis_graph = self._build_analysis_graph()
+        self.stage_executor = StageExecutor()
+
+        # Registro versionato dei modelli: ogni richiesta usa il bundle attivo al suo inizio,
+        # un reload lo sostituisce atomicamente per le richieste successive
+        self.model_registry = ModelRegistry()
+        self.model_bundle = ModelBundle(version=None)
+        self._reload_lock = asyncio.Lock()
+
+        # Micro-batching delle predizioni deep: un forward pass per batch di richieste
+        # (ogni elemento porta il modello del bundle della sua richiesta)
+        self.lstm_batcher = MicroBatcher(self._deep_forward_grouped, label="batch:lstm")
+        self.transformer_batcher = MicroBatcher(self._deep_forward_grouped, label="batch:transformer")
+
+        # Studente distillato: serve i punteggi al posto dello stack completo se
+        # AI_STUDENT_SERVING=on, la fedeltà è sufficiente e l'input è in distribuzione
+        self.student_model: Optional[DistilledStudent] = None
+        self.student_serving = os.getenv("AI_STUDENT_SERVING", "off").lower() == "on"
+        self.student_min_r2 = float(os.getenv("AI_STUDENT_MIN_R2", "0.9"))
+        self.student_max_z = float(os.getenv("AI_STUDENT_MAX_Z", "6"))
+        self.student_stats = {'served': 0, 'fallback': {}}
+        # Lo stadio gira sui thread del compute executor: contatori aggiornati sotto lock
+        self._student_lock = threading.Lock()
 
         # Stato del sistema
         self.is_initialized = False
@@ -1106,6 +1371,12 @@ class UltraAdvancedClas2eAI:
         self.performance_metrics = {}
         self.next_gen_engines_ready = False
 
+        # Avvio: tempi di warm-up (readiness); preloaded se i modelli sono già
+        # stati caricati nel master gunicorn prima del fork
+        self.warmup_ms: Dict[str, float] = {}
+        self.is_warm = False
+        self.models_preloaded = False
+
         # Configurazione per tutto clas2e
         self.config = {
             'ecosystem_wide_analytics': True,
@@ -1124,8 +1395,9 @@ class UltraAdvancedClas2eAI:
         try:
             logger.info("Starting UltraAdvancedAIEngine v3.0 initialization...")
 
-            # Inizializza modelli deep learning
-            await self._initialize_deep_learning_models()
+            # Inizializza modelli deep learning (già fatto nel master in preload)
+            if not self.models_preloaded:
+                await self._initialize_deep_learning_models()
 
             # Inizializza sistemi di ottimizzazione
             await self._initialize_optimization_systems()
@@ -1133,8 +1405,15 @@ class UltraAdvancedClas2eAI:
             # NUOVO: Inizializza motori next-generation
             await self._initialize_next_gen_engines()
 
-            # Carica modelli esistenti se disponibili
-            await self._load_existing_models()
+            # Carica modelli esistenti se disponibili; dopo il preload del master restano
+            # da compilare gli alberi, con le loro predizioni di parità, nel worker
+            if not self.models_preloaded:
+                await self._load_existing_models()
+            else:
+                await self._compile_trees(self.model_bundle)
+
+            # Warm-up: il primo utente reale non paga inizializzazioni e allocazioni
+            await self._warm_up_models()
 
             # Verifica integrità sistema avanzato
             await self._perform_system_integrity_check()
@@ -1147,6 +1426,27 @@ class UltraAdvancedClas2eAI:
             logger.error(f"Failed to initialize UltraAdvancedAIEngine v3.0: {e}")
             raise
 
+    def preload_models(self):
+        """Costruisce e carica i modelli prima del fork dei worker (gunicorn preload_app).
+
+        I pesi restano in pagine condivise copy-on-write tra i worker. Nel master
+        non gira alcuna predizione: compilazione degli alberi con la parità,
+        warm-up e pool di thread partono in ogni worker, dopo il fork. xgboost e
+        lightgbm avvierebbero i pool OpenMP (libgomp), che non sopravvivono al
+        fork e bloccano i worker; anche torch resta a un thread durante la
+        costruzione dei modelli (post_fork ripristina il budget del worker).
+        """
+        async def preload():
+            await self._initialize_deep_learning_models()
+            await self._load_existing_models(compile_trees=False)
+
+        torch.set_num_threads(1)
+        asyncio.run(preload())
+        # I thread usati per il caricamento non sopravvivono al fork
+        compute_executor.shutdown()
+        self.models_preloaded = True
+        logger.info(f"Models preloaded before fork (version {self.model_bundle.version or 'legacy'})")
+
     async def _initialize_next_gen_engines(self):
         """Inizializza tutti i motori next-generation"""
         logger.info("Initializing NEXT-GENERATION AI engines...")
@@ -1194,13 +1494,16 @@ class UltraAdvancedClas2eAI:
         """Inizializza tutti i modelli di deep learning"""
         logger.info("Initializing deep learning models...")
 
+        factories = self._deep_model_factories()
+
         # LSTM per sequenze temporali
-        self.lstm_predictor = LSTMPredictor(input_size=100, hidden_size=256)
+        self.lstm_predictor = factories['lstm_predictor']()
 
         # Transformer per analisi comportamentale
-        self.transformer_predictor = TransformerPredictor(input_size=100, d_model=512)
+        self.transformer_predictor = factories['transformer_predictor']()
 
         # GAN per generazione badge
+        from ai.deep_models import BadgeGAN
         self.badge_gan = BadgeGAN(latent_dim=200, badge_dim=100)
 
         # GNN per relazioni utente-badge (inizializzato dopo aver caricato dati)
@@ -1214,35 +1517,210 @@ class UltraAdvancedClas2eAI:
         
         try:
             # Skip RL training during initialization to avoid I/O issues
-            # The RL agents will be trained on-demand when needed
-            logger.info("RL agents created - training will be performed on-demand")
-            self.rl_agent.is_trained = False  # Mark as not trained yet
+            # The RL agents are built and trained on-demand when needed
+            logger.info("RL agents will be created and trained on-demand")
             
         except Exception as e:
             logger.warning(f"RL system initialization failed: {e}")
             # Continue without RL - not critical for basic functionality
 
-    async def _load_existing_models(self):
-        """Carica modelli esistenti dal disco"""
+    async def _load_existing_models(self, compile_trees: bool = True):
+        """Carica la versione corrente del registro (o i file sciolti di ai/models)"""
         try:
-            models_path = "ai/models"
-
-            # Carica ensemble model
-            ensemble_path = os.path.join(models_path, 'ensemble_model.pkl')
-            if os.path.exists(ensemble_path):
-                self.ensemble_model = joblib.load(ensemble_path)
-                logger.info("✅ Loaded existing ensemble model")
-
-            # Carica modelli deep learning
-            lstm_path = os.path.join(models_path, 'lstm_predictor.pth')
-            if os.path.exists(lstm_path):
-                self.lstm_predictor.load_state_dict(torch.load(lstm_path))
-                logger.info("Loaded existing LSTM model")
+            self.model_bundle = await self._load_bundle(self.model_registry.current_version(), compile_trees)
+        except Exception as e:
+            logger.warning(f"Could not load existing models: {e}")
 
-            # Altre caricazioni...
+    @staticmethod
+    def _deep_model_factories() -> Dict[str, Callable[[], nn.Module]]:
+        from ai.deep_models import LSTMPredictor, TransformerPredictor
+        return {
+            'lstm_predictor': lambda: LSTMPredictor(input_size=DEEP_MODEL_INPUT_SIZE, hidden_size=256),
+            'transformer_predictor': lambda: TransformerPredictor(input_size=DEEP_MODEL_INPUT_SIZE, d_model=512),
+        }
+
+    def _deep_models(self) -> Dict[str, nn.Module]:
+        return {name: getattr(self, name, None) for name in self._deep_model_factories()}
+
+    def _bundle_directory(self, version: Optional[str]) -> str:
+        return LEGACY_MODELS_PATH if version is None else self.model_registry.version_path(version)
+
+    async def _load_bundle(self, version: Optional[str], compile_trees: bool = True) -> ModelBundle:
+        """Carica in parallelo (memory-mapped) gli artefatti di una versione in un nuovo bundle.
+
+        Con compile_trees=False (preload nel master) non esegue nessuna predizione:
+        gli alberi vanno compilati dopo con _compile_trees.
+        """
+        started = time.perf_counter()
+        directory = self._bundle_directory(version)
+        if version is not None:
+            await compute_executor.run(self.model_registry.verify, version, label="load:verify")
+
+        # Gli artefatti devono essere stati addestrati sullo stesso layout delle feature
+        schema = FeatureSchema.load(directory)
+        if schema is not None:
+            MODEL_SCHEMA.validate(schema)
+        elif version is not None:
+            logger.warning(f"Model version {version} predates the feature schema, assuming {MODEL_SCHEMA.version}")
+
+        models, serving, backends, load_ms = {}, {}, {}, {}
+
+        async def load(name: str, path: str, loader):
+            if not os.path.exists(path):
+                return None
+            step_started = time.perf_counter()
+            try:
+                result = await compute_executor.run(loader, path, label=f"load:{name}")
+            except Exception as e:
+                logger.warning(f"Could not load {name} from {path}: {e}")
+                return None
+            load_ms[name] = round((time.perf_counter() - step_started) * 1000, 2)
+            logger.info(f"✅ Loaded {name} in {load_ms[name]}ms")
+            return result
+
+        async def load_ensemble():
+            ensemble = await load('ensemble_model', os.path.join(directory, 'ensemble_model.pkl'), load_joblib_mmap)
+            if ensemble is not None:
+                models['ensemble_model'] = ensemble
+
+        async def load_student():
+            student = await load('student_model', os.path.join(directory, 'student_model.pkl'), joblib.load)
+            if student is not None:
+                models['student_model'] = student
+
+        from ai.model_export import load_inference_model
+
+        async def load_deep(name: str, factory: Callable[[], nn.Module]):
+            model = await load(name, os.path.join(directory, f'{name}.pth'),
+                               lambda path: load_state_dict_mmap(factory(), path))
+            if model is None:
+                # Nessun peso salvato: si serve il modello in memoria
+                model = getattr(self, name, None)
+            if model is None:
+                return
+            models[name] = model
+
+            # Artefatti di inferenza (TorchScript / int8) secondo AI_INFERENCE_BACKEND
+            selected = await load(f'{name}:serving', directory,
+                                  lambda path: load_inference_model(name, model, path))
+            if selected is not None:
+                serving[name], backends[name] = selected
+
+        await asyncio.gather(
+            load_ensemble(),
+            load_student(),
+            *(load_deep(name, factory) for name, factory in self._deep_model_factories().items())
+        )
 
+        logger.info(f"Model version {version or 'legacy'} loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+        bundle = ModelBundle(version, models, serving, backends, load_ms,
+                             schema_version=schema.version if schema is not None else None)
+        if compile_trees:
+            await self._compile_trees(bundle)
+        return bundle
+
+    async def _compile_trees(self, bundle: ModelBundle):
+        """Alberi compilati (AI_TREE_BACKEND), con parità verificata sul modello appena caricato"""
+        ensemble = bundle.models.get('ensemble_model')
+        if ensemble is None:
+            return
+        try:
+            bundle.backends['ensemble_model'] = await compute_executor.run(
+                ensemble.compile, directory=self._bundle_directory(bundle.version), label="load:compile_trees"
+            )
         except Exception as e:
-            logger.warning(f"Could not load existing models: {e}")
+            logger.warning(f"Tree compilation failed, serving the library predict: {e}")
+
+    async def reload_models(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """Carica una versione (default: CURRENT) e la attiva per le nuove richieste.
+
+        Una versione esplicita (pin o rollback) viene prima resa CURRENT nel
+        registro: questo worker la adotta subito, gli altri al prossimo polling,
+        e nessun watcher la riporta indietro. Le richieste in corso tengono il
+        bundle con cui sono partite; quello vecchio viene liberato quando
+        l'ultima termina.
+        """
+        async with self._reload_lock:
+            if version is not None:
+                self.model_registry.activate(version)
+            version = self.model_registry.current_version()
+            previous = self.model_bundle.version
+            if version is None or version == previous:
+                return {'version': previous, 'swapped': False}
+
+            bundle = await self._load_bundle(version)
+
+            # Warm-up del nuovo bundle prima che riceva traffico
+            token = current_bundle.set(bundle)
+            try:
+                await self._warm_up_models()
+            finally:
+                current_bundle.reset(token)
+
+            self.model_bundle = bundle
+            logger.info(f"🔄 Serving model version {version} (was {previous or 'legacy'})")
+            return {'version': version, 'previous_version': previous, 'swapped': True, 'load_ms': bundle.load_ms}
+
+    async def watch_model_registry(self, interval: Optional[float] = None):
+        """Adotta senza riavvio le versioni pubblicate nel registro (polling di CURRENT)"""
+        interval = interval if interval is not None else float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "30"))
+        if interval <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.model_registry.current_version() not in (None, self.model_bundle.version):
+                    await self.reload_models()
+            except Exception as e:
+                logger.warning(f"Model registry reload failed: {e}")
+
+    def active_bundle(self) -> ModelBundle:
+        """Bundle della richiesta corrente, o quello attivo fuori da una richiesta"""
+        return current_bundle.get() or self.model_bundle
+
+    @property
+    def artifact_load_ms(self) -> Dict[str, float]:
+        return self.model_bundle.load_ms
+
+    async def _warm_up_models(self):
+        """Passa un batch sintetico in ogni modello prima di dichiararsi pronto"""
+        started = time.perf_counter()
+        synthetic_user = {
+            'id': 'warmup', 'level': 1, 'xp_points': 0, 'total_active_days': 0,
+            'consecutive_active_days': 0, 'total_quizzes': 0, 'total_comments': 0,
+            'total_materials': 0, 'total_discussions': 0
+        }
+
+        async def warm(name: str, fn, *args):
+            step_started = time.perf_counter()
+            try:
+                result = await compute_executor.run(fn, *args, label=f"warmup:{name}")
+                self.warmup_ms[name] = round((time.perf_counter() - step_started) * 1000, 2)
+                return result
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed: {e}")
+
+        # Feature engineering, poi modelli deep su batch di 1 e di dimensione massima
+        features = await warm('user_features', self._compute_ultra_features, 'warmup', synthetic_user, []) or {}
+        vector = self._model_input_vector(features)
+        steps = []
+        for name, batcher in (('lstm_predictor', self.lstm_batcher), ('transformer_predictor', self.transformer_batcher)):
+            if getattr(self, name, None) is not None:
+                steps.append(warm(name, lambda name=name, size=batcher.max_batch_size: [
+                    self._deep_forward(self._serving_model(name), [vector] * batch) for batch in (1, size)
+                ]))
+        if self._check_ensemble_model():
+            steps.append(warm('ensemble_model', self._compute_multi_model_analysis, features, {}))
+
+        await asyncio.gather(*steps)
+        self.is_warm = True
+        logger.info(f"✅ Warm-up completed in {(time.perf_counter() - started) * 1000:.0f}ms: {self.warmup_ms}")
+
+    def _serving_model(self, name: str) -> Any:
+        """Modello del bundle attivo (artefatto di serving o eager), con ripiego su quello in memoria"""
+        model = self.active_bundle().get(name)
+        return model if model is not None else getattr(self, name, None)
 
     async def _perform_system_integrity_check(self):
         """Verifica integrità del sistema"""
@@ -1270,86 +1748,150 @@ class UltraAdvancedClas2eAI:
             self.badge_gan is not None
         ])
 
+    def ensemble_timings(self) -> Dict[str, Any]:
+        """Tempi per membro dell'ensemble in serving (vuoto se non addestrato)"""
+        ensemble = self._serving_model('ensemble_model')
+        return ensemble.get_timings() if getattr(ensemble, 'is_trained', False) else {}
+
     def _check_ensemble_model(self) -> bool:
         """Verifica ensemble model"""
-        return hasattr(self.ensemble_model, 'is_trained') and self.ensemble_model.is_trained
+        return getattr(self._serving_model('ensemble_model'), 'is_trained', False)
 
     def _check_rl_agent(self) -> bool:
-        """Verifica agente RL"""
-        return hasattr(self.rl_agent, 'is_trained') and self.rl_agent.is_trained
+        """Verifica agente RL (senza costruirlo se non è ancora stato usato)"""
+        return is_engine_loaded(self, 'rl_agent') and self.rl_agent.is_trained
 
     def _check_feature_engineer(self) -> bool:
         """Verifica feature engineer"""
         return hasattr(self.feature_engineer, 'create_behavioral_features')
 
-    async def analyze_user_ultra_advanced(self, user_id: str) -> Dict[str, Any]:
-        """Analisi utente ultra-avanzata con tutti i modelli"""
+    async def analyze_student_comprehensive(self, user_id: str,
+                                            sections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Analisi completa servita dalla cache multi-livello (usata dagli endpoint API)"""
+        sections = self.analysis_graph.resolve_sections(sections) if sections is not None else None
+        variant = "full" if sections is None else ",".join(sorted(sections))
+        return await analysis_cache.get_or_compute(
+            user_id, lambda: self.analyze_user_ultra_advanced(user_id, sections), variant=variant
+        )
+
+    def _build_analysis_graph(self) -> AnalysisGraph:
+        """Dichiara gli stadi dell'analisi con i loro input e le sezioni della risposta"""
+        graph = AnalysisGraph(roots=('user_id', 'user_stats'))
+
+        # Stadi (i lambda risolvono i metodi a runtime, così restano sostituibili)
+        graph.node('recent_activity', ['user_id'],
+                   lambda user_id: get_recent_user_activity(user_id, 50), blocking=False)
+        graph.node('user_features', ['user_id', 'user_stats', 'recent_activity'],
+                   lambda user_id, user_stats, recent_activity:
+                       self._compute_ultra_features(user_id, user_stats, recent_activity))
+        # Vettore float32 dello schema, assemblato una volta e condiviso dai modelli
+        graph.node('model_input', ['user_features'],
+                   lambda user_features: self._model_input_vector(user_features), blocking=False)
+        graph.node('student_scores', ['model_input'],
+                   lambda model_input: self._student_scores(model_input))
+        graph.node('dl_predictions', ['model_input', 'student_scores'],
+                   lambda model_input, student_scores:
+                       {} if student_scores else self._predict_deep_learning(model_input), blocking=False)
+        graph.node('analysis_results', ['user_features', 'model_input', 'dl_predictions', 'student_scores'],
+                   lambda user_features, model_input, dl_predictions, student_scores:
+                       self._compute_multi_model_analysis(user_features, dl_predictions, student_scores,
+                                                          model_input))
+        graph.node('behavior_profile', ['user_features'],
+                   lambda user_features: self._analyze_behavior_profile(user_features))
+        graph.node('risk_factors', ['user_features'],
+                   lambda user_features: self._assess_user_risks(user_features))
+        graph.node('optimized_recommendations', ['user_features'],
+                   lambda user_features: self._optimize_recommendations_rl(user_features))
+        graph.node('explanations', ['user_features', 'analysis_results'],
+                   lambda user_features, analysis_results:
+                       self._generate_full_explanations(user_features, analysis_results))
+        graph.node('temporal_insights', ['user_id', 'recent_activity'],
+                   lambda user_id, recent_activity: self._analyze_temporal_behavior(user_id, recent_activity))
+        graph.node('user_segment', ['user_id', 'user_features'],
+                   lambda user_id, user_features: self.clustering_engine.get_user_segment(user_id, user_features))
+        graph.node('badge_suggestions', ['user_features'],
+                   lambda user_features: self._generate_badge_suggestions(user_features))
+        graph.node('learning_path', ['user_features', 'behavior_profile', 'risk_factors'],
+                   lambda user_features, behavior_profile, risk_factors:
+                       self._build_learning_path(user_features, behavior_profile, risk_factors))
+        graph.node('tutoring_plan', ['user_features', 'behavior_profile', 'risk_factors'],
+                   lambda user_features, behavior_profile, risk_factors:
+                       self._build_tutoring_plan(user_features, behavior_profile, risk_factors))
+
+        # Sezioni della risposta
+        graph.section('confidence_score', 'analysis_results', lambda r: r.get('overall_confidence', 0.0), default=0.0)
+
+        # Metriche core
+        graph.section('engagement_score', 'analysis_results', lambda r: r.get('engagement_prediction', 0.0), default=0.0)
+        graph.section('retention_probability', 'analysis_results', lambda r: r.get('retention_probability', 0.0), default=0.0)
+        graph.section('growth_potential', 'analysis_results', lambda r: r.get('growth_potential', 0.0), default=0.0)
+
+        # Comportamento
+        graph.section('behavior_profile', 'behavior_profile', default={})
+        graph.section('activity_patterns', 'temporal_insights', lambda t: t.get('patterns', {}), default={})
+        graph.section('anomalies_detected', 'temporal_insights', lambda t: t.get('anomalies', []), default=[])
+
+        # Segmentazione
+        graph.section('user_segment', 'user_segment', default='unknown')
+        graph.section('segment_characteristics', 'user_segment',
+                      lambda segment: self.clustering_engine.segment_profiles.get(segment, {}), default={})
+
+        # Raccomandazioni ottimizzate
+        graph.section('optimized_recommendations', 'optimized_recommendations', default={})
+        graph.section('recommendation_confidence', 'optimized_recommendations', lambda r: r.get('confidence', 0.0), default=0.0)
+
+        # Generazione badge
+        graph.section('suggested_new_badges', 'badge_suggestions', default=[])
+
+        # Explainability
+        graph.section('decision_explanations', 'explanations', default={})
+
+        # Predizioni future
+        graph.section('future_predictions', 'analysis_results', lambda r: r.get('predictions', {}), default={})
+
+        # Percorso di apprendimento e tutoring
+        graph.section('personalized_learning_path', 'learning_path', default=[])
+        graph.section('ai_tutoring', 'tutoring_plan', default={})
+
+        # Metriche di sistema
+        graph.section('analysis_quality_score', 'analysis_results', lambda r: self._calculate_analysis_quality(r), default=0.0)
+
+        return graph
+
+    async def analyze_user_ultra_advanced(self, user_id: str,
+                                          sections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Analisi utente ultra-avanzata; con sections valuta solo gli stadi necessari"""
+        sections = self.analysis_graph.resolve_sections(sections)
+        started = time.perf_counter()
+
+        # Tutti gli stadi (anche nei thread del compute executor) vedono la stessa versione dei modelli
+        bundle = self.active_bundle()
+        bundle_token = current_bundle.set(bundle)
+
         try:
             # Ottieni dati utente di base
             user_stats = await get_user_stats(user_id)
             if not user_stats:
                 return {"error": "User not found", "user_id": user_id}
 
-            recent_activity = await get_recent_user_activity(user_id, 50)
-
-            # Feature engineering avanzato
-            user_features = await self._extract_ultra_features(user_id, user_stats, recent_activity)
-
-            # Analisi multi-modello
-            analysis_results = await self._perform_multi_model_analysis(user_features)
-
-            # Ottimizzazione RL delle raccomandazioni
-            optimized_recommendations = self._optimize_recommendations_rl(user_features)
-
-            # Explainability completa
-            explanations = self._generate_full_explanations(user_features, analysis_results)
-
-            # Analisi temporale
-            temporal_insights = self._analyze_temporal_behavior(user_id, recent_activity)
-
-            # Clustering e segmentazione
-            user_segment = self.clustering_engine.get_user_segment(user_id, pd.DataFrame([user_features]))
-
-            # Generazione badge intelligente
-            badge_generation_suggestions = self._generate_badge_suggestions(user_features)
+            values = await self.analysis_graph.evaluate(
+                sections, {'user_id': user_id, 'user_stats': user_stats}, runner=self.stage_executor
+            )
 
-            return {
+            result = {
                 "user_id": user_id,
                 "analysis_timestamp": datetime.utcnow().isoformat(),
-                "confidence_score": analysis_results.get('overall_confidence', 0.0),
-
-                # Metriche core
-                "engagement_score": analysis_results.get('engagement_prediction', 0.0),
-                "retention_probability": analysis_results.get('retention_probability', 0.0),
-                "growth_potential": analysis_results.get('growth_potential', 0.0),
-
-                # Comportamento
-                "behavior_profile": analysis_results.get('behavior_profile', {}),
-                "activity_patterns": temporal_insights.get('patterns', {}),
-                "anomalies_detected": temporal_insights.get('anomalies', []),
-
-                # Segmentazione
-                "user_segment": user_segment,
-                "segment_characteristics": self.clustering_engine.segment_profiles.get(user_segment, {}),
-
-                # Raccomandazioni ottimizzate
-                "optimized_recommendations": optimized_recommendations,
-                "recommendation_confidence": optimized_recommendations.get('confidence', 0.0),
-
-                # Generazione badge
-                "suggested_new_badges": badge_generation_suggestions,
-
-                # Explainability
-                "decision_explanations": explanations,
-
-                # Predizioni future
-                "future_predictions": analysis_results.get('predictions', {}),
-
-                # Metriche di sistema
-                "analysis_quality_score": self._calculate_analysis_quality(analysis_results),
-                "processing_time_ms": 0,  # Placeholder
+                **self.analysis_graph.render(sections, values),
+                "model_version": bundle.version,
+                "processing_time_ms": round((time.perf_counter() - started) * 1000, 2),
             }
 
+            # Stadi lenti o falliti degradano solo le proprie sezioni
+            degraded = self.analysis_graph.failures(sections, values)
+            if degraded:
+                result["degraded_sections"] = degraded
+            return result
+
         except Exception as e:
             logger.error(f"Error in ultra-advanced user analysis for {user_id}: {e}")
             return {
@@ -1357,47 +1899,92 @@ class UltraAdvancedClas2eAI:
                 "user_id": user_id,
                 "fallback_analysis": await self._fallback_analysis(user_id)
             }
+        finally:
+            current_bundle.reset(bundle_token)
 
     async def _extract_ultra_features(self, user_id: str, user_stats: Dict, recent_activity: List) -> Dict[str, Any]:
         """Estrae feature ultra-avanzate"""
+        return await compute_executor.run(self._compute_ultra_features, user_id, user_stats, recent_activity,
+                                          label="ultra_features")
+
+    def _compute_ultra_features(self, user_id: str, user_stats: Dict, recent_activity: List) -> Dict[str, Any]:
+        """Feature engineering sincrono, eseguibile fuori dall'event loop.
+
+        Le interazioni a coppie non passano più da un DataFrame di una riga:
+        vengono calcolate sul vettore dello schema (vedi _model_input_vector) e,
+        per l'ensemble, sulla sua riga di input (AdvancedEnsembleModel._feature_row).
+        """
         features = {}
 
         # Feature base
         features.update(user_stats)
 
-        # Feature comportamentali avanzate
-        behavioral_features = self.feature_engineer.create_behavioral_features(recent_activity)
+        # Feature comportamentali avanzate: stato incrementale dell'utente (vedi ai.feature_state),
+        # costruito dalla cronologia solo se assente o scaduto
+        behavioral_features = behavioral_states.features(user_id, recent_activity)
         features.update(behavioral_features)
 
-        # Feature temporali
+        # Feature temporali (medie cicliche calcolate direttamente dai timestamp)
         if recent_activity:
-            activity_df = pd.DataFrame(recent_activity)
-            temporal_features = self.feature_engineer.create_temporal_features(activity_df)
-            features.update(temporal_features.mean().to_dict())
-
-        # Feature di interazione
-        user_df = pd.DataFrame([features])
-        interaction_features = self.feature_engineer.create_interaction_features(user_df)
-        features.update(interaction_features.iloc[0].to_dict())
+            features.update(self.feature_engineer.summarize_temporal_features(recent_activity))
 
         # Embeddings utente (placeholder per sistema avanzato)
         features['user_embedding'] = self._generate_user_embedding(features)
 
         return features
 
+    async def build_feature_frame(self, user_ids: List[str], days: int = 50) -> pd.DataFrame:
+        """Feature di molti utenti (statistiche, comportamentali, temporali), una riga per user_id.
+
+        Due round trip al database e feature engineering raggruppato invece di
+        un'analisi per utente: serve a costruire il training set e a dare un
+        punteggio all'intera base utenti (righe -> MODEL_SCHEMA.assemble_batch).
+        """
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        stats, activity = await asyncio.gather(
+            get_user_stats_many(user_ids),
+            get_recent_user_activity_many(user_ids, days)
+        )
+        return await compute_executor.run(_compute_feature_frame, self.feature_engineer, user_ids, stats, activity,
+                                          label="bulk_features", process_safe=True)
+
     async def _perform_multi_model_analysis(self, user_features: Dict) -> Dict[str, Any]:
         """Esegue analisi con tutti i modelli disponibili"""
+        vector = self._model_input_vector(user_features)
+        dl_predictions = await self._predict_deep_learning(vector)
+        return await compute_executor.run(self._compute_multi_model_analysis, user_features, dl_predictions,
+                                          None, vector, label="multi_model_analysis")
+
+    def _compute_multi_model_analysis(self, user_features: Dict,
+                                      dl_predictions: Optional[Dict[str, Any]] = None,
+                                      student_scores: Optional[Dict[str, Any]] = None,
+                                      vector: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Predizioni sincrone (ensemble, deep learning), eseguibili fuori dall'event loop.
+
+        dl_predictions arriva già calcolato dal micro-batcher; se manca le reti
+        vengono eseguite qui su un batch di un solo utente. Con student_scores
+        i punteggi vengono dallo studente distillato e lo stack non viene eseguito.
+        """
         results = {}
 
-        # Ensemble model prediction
-        if self.ensemble_model.is_trained:
-            feature_df = pd.DataFrame([user_features])
-            ensemble_pred = self.ensemble_model.predict(feature_df)
-            results['engagement_prediction'] = float(ensemble_pred[0])
-
-        # Deep learning predictions
-        dl_predictions = self._get_deep_learning_predictions(user_features)
-        results.update(dl_predictions)
+        if student_scores:
+            results.update(student_scores)
+        else:
+            # Ensemble model prediction
+            ensemble = self._serving_model('ensemble_model')
+            if ensemble.is_trained:
+                try:
+                    results['engagement_prediction'] = ensemble.predict_features(user_features)
+                except Exception as e:
+                    logger.warning(f"Ensemble prediction failed: {e}")
+                    results['ensemble_error'] = str(e)
+
+            # Deep learning predictions
+            if dl_predictions is None:
+                dl_predictions = self._get_deep_learning_predictions(
+                    vector if vector is not None else self._model_input_vector(user_features))
+            results.update(dl_predictions)
+            results['scored_by'] = 'full_stack'
 
         # Behavioral analysis
         results['behavior_profile'] = self._analyze_behavior_profile(user_features)
@@ -1410,27 +1997,82 @@ class UltraAdvancedClas2eAI:
 
         return results
 
-    def _get_deep_learning_predictions(self, user_features: Dict) -> Dict[str, Any]:
-        """Ottieni predizioni da modelli deep learning"""
+    def _student_scores(self, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Punteggi dello studente distillato, o None per ricadere sullo stack completo"""
+        if not self.student_serving:
+            return None
+
+        student = self._serving_model('student_model')
+        reason = None
+        try:
+            if student is None:
+                reason = 'no_student'
+            elif not student.fidelity_ok(self.student_min_r2):
+                reason = 'low_fidelity'
+            else:
+                if not student.in_distribution(vector, self.student_max_z):
+                    reason = 'out_of_distribution'
+                else:
+                    scores = {**student.predict_one(vector), 'scored_by': 'student'}
+                    with self._student_lock:
+                        self.student_stats['served'] += 1
+                    return scores
+        except Exception as e:
+            logger.warning(f"Student scoring failed: {e}")
+            reason = 'error'
+
+        with self._student_lock:
+            fallback = self.student_stats['fallback']
+            fallback[reason] = fallback.get(reason, 0) + 1
+        return None
+
+    def student_report(self) -> Dict[str, Any]:
+        """Fedeltà dello studente in serving e quante richieste ha servito o rimandato allo stack"""
+        student = self._serving_model('student_model')
+        with self._student_lock:
+            stats = {'served': self.student_stats['served'], 'fallback': dict(self.student_stats['fallback'])}
+        return {
+            'enabled': self.student_serving,
+            'min_r2': self.student_min_r2,
+            'max_z': self.student_max_z,
+            'fidelity': student.fidelity if student is not None else None,
+            **stats,
+        }
+
+    async def _predict_deep_learning(self, vector: np.ndarray) -> Dict[str, Any]:
+        """Predizioni deep tramite micro-batcher: le richieste concorrenti condividono il forward"""
         predictions = {}
 
         try:
-            # Converti features in tensor
-            feature_tensor = torch.FloatTensor(list(user_features.values())).unsqueeze(0)
+            pending = {}
+            if getattr(self, 'lstm_predictor', None):
+                pending['lstm_engagement'] = self.lstm_batcher.submit((self._serving_model('lstm_predictor'), vector))
+            if getattr(self, 'transformer_predictor', None):
+                pending['transformer_engagement'] = self.transformer_batcher.submit(
+                    (self._serving_model('transformer_predictor'), vector))
+
+            outputs = await asyncio.gather(*pending.values())
+            predictions.update({key: float(value) for key, value in zip(pending, outputs)})
 
+        except Exception as e:
+            logger.warning(f"Deep learning prediction failed: {e}")
+            predictions['dl_error'] = str(e)
+
+        return predictions
+
+    def _get_deep_learning_predictions(self, vector: np.ndarray) -> Dict[str, Any]:
+        """Ottieni predizioni da modelli deep learning (percorso sincrono, batch di 1)"""
+        predictions = {}
+
+        try:
             # LSTM prediction
-            if self.lstm_predictor:
-                self.lstm_predictor.eval()
-                with torch.no_grad():
-                    lstm_out = self.lstm_predictor(feature_tensor)
-                    predictions['lstm_engagement'] = float(lstm_out.item())
+            if getattr(self, 'lstm_predictor', None):
+                predictions['lstm_engagement'] = self._deep_forward(self._serving_model('lstm_predictor'), [vector])[0]
 
             # Transformer prediction
-            if self.transformer_predictor:
-                self.transformer_predictor.eval()
-                with torch.no_grad():
-                    transformer_out = self.transformer_predictor(feature_tensor)
-                    predictions['transformer_engagement'] = float(transformer_out.item())
+            if getattr(self, 'transformer_predictor', None):
+                predictions['transformer_engagement'] = self._deep_forward(
+                    self._serving_model('transformer_predictor'), [vector])[0]
 
         except Exception as e:
             logger.warning(f"Deep learning prediction failed: {e}")
@@ -1438,6 +2080,35 @@ class UltraAdvancedClas2eAI:
 
         return predictions
 
+    @staticmethod
+    def _model_input_vector(user_features: Dict) -> np.ndarray:
+        """Vettore float32 di DEEP_MODEL_INPUT_SIZE elementi secondo lo schema delle feature"""
+        return MODEL_SCHEMA.assemble(user_features)
+
+    @staticmethod
+    def _deep_forward(model: nn.Module, vectors: List[np.ndarray]) -> List[float]:
+        """Un forward pass su un batch di vettori (sequenza di lunghezza 1, come in training)"""
+        model.eval()
+        with torch.no_grad():
+            # Un solo vettore: vista senza copia; più vettori: un'unica matrice di batch
+            rows = vectors[0][None, :] if len(vectors) == 1 else np.stack(vectors)
+            batch = torch.from_numpy(rows).unsqueeze(1)
+            return model(batch).reshape(len(vectors), -1)[:, 0].tolist()
+
+    @classmethod
+    def _deep_forward_grouped(cls, items: List[Tuple[nn.Module, np.ndarray]]) -> List[float]:
+        """Forward di un micro-batch di (modello, vettore): un pass per modello distinto"""
+        groups: Dict[int, Tuple[nn.Module, List[int]]] = {}
+        for index, (model, _) in enumerate(items):
+            groups.setdefault(id(model), (model, []))[1].append(index)
+
+        results: List[float] = [0.0] * len(items)
+        for model, indices in groups.values():
+            outputs = cls._deep_forward(model, [items[i][1] for i in indices])
+            for index, output in zip(indices, outputs):
+                results[index] = output
+        return results
+
     def _analyze_behavior_profile(self, user_features: Dict) -> Dict[str, Any]:
         """Analizza profilo comportamentale dettagliato"""
         profile = {
@@ -1542,11 +2213,15 @@ class UltraAdvancedClas2eAI:
     def _optimize_recommendations_rl(self, user_features: Dict) -> Dict[str, Any]:
         """Ottimizza raccomandazioni usando RL"""
         try:
-            # Converti features in state per RL
-            state = np.array(list(user_features.values())[:50])  # Primi 50 features
+            # Converti features in state per RL (prime colonne dello schema, ordine fisso)
+            state = self._model_input_vector(user_features)[:RL_STATE_SIZE]
 
-            # Ottieni raccomandazioni ottimizzate dall'agente RL
-            optimized_badges = self.rl_agent.optimize_recommendations(state)
+            # Ottieni raccomandazioni ottimizzate dall'agente RL; un agente mai
+            # costruito non è addestrato: stesso default senza importare stable_baselines3
+            if is_engine_loaded(self, 'rl_agent'):
+                optimized_badges = self.rl_agent.optimize_recommendations(state)
+            else:
+                optimized_badges = list(range(5))
 
             return {
                 'recommended_badges': optimized_badges,
@@ -1658,6 +2333,55 @@ class UltraAdvancedClas2eAI:
 
         return suggestions
 
+    def _build_learning_path(self, user_features: Dict, behavior_profile: Dict,
+                             risk_factors: List[str]) -> List[Dict[str, Any]]:
+        """Percorso di apprendimento personalizzato dal profilo comportamentale"""
+        path = []
+
+        if user_features.get('total_quizzes', 0) < 5:
+            path.append({'step': 'foundations', 'action': 'complete_practice_quizzes',
+                         'reason': 'Few quizzes completed so far'})
+        if user_features.get('total_materials', 0) == 0:
+            path.append({'step': 'study_materials', 'action': 'review_course_materials',
+                         'reason': 'No study material engagement yet'})
+        if behavior_profile.get('social_orientation') == 'independent':
+            path.append({'step': 'community', 'action': 'join_a_discussion',
+                         'reason': 'Learning with peers improves retention'})
+        if 'decreasing_engagement' in risk_factors or 'high_churn_risk' in risk_factors:
+            path.insert(0, {'step': 'reengage', 'action': 'short_daily_goal',
+                            'reason': 'Recent activity is declining'})
+
+        path.append({
+            'step': 'advance',
+            'action': 'deep_dive_sessions' if behavior_profile.get('learning_style') == 'deep_focus'
+                      else 'regular_short_sessions',
+            'reason': f"Matches a {behavior_profile.get('learning_style', 'regular_pacer')} learning style"
+        })
+
+        for order, step in enumerate(path, start=1):
+            step['order'] = order
+        return path
+
+    def _build_tutoring_plan(self, user_features: Dict, behavior_profile: Dict,
+                             risk_factors: List[str]) -> Dict[str, Any]:
+        """Piano di tutoring AI: aree di focus, azioni suggerite e orario consigliato"""
+        focus_areas = []
+        if user_features.get('total_quizzes', 0) < 5:
+            focus_areas.append('quiz_practice')
+        if user_features.get('total_comments', 0) + user_features.get('total_discussions', 0) == 0:
+            focus_areas.append('asking_questions')
+        if behavior_profile.get('consistency_score', 1.0) < 0.3:
+            focus_areas.append('study_consistency')
+
+        return {
+            'focus_areas': focus_areas or ['advanced_topics'],
+            'intervention_needed': bool(risk_factors),
+            'risk_factors': risk_factors,
+            'suggested_study_hour': int(user_features.get('peak_hour', 16)),
+            'coaching_style': 'encouraging' if risk_factors else 'challenging',
+            'engagement_type': behavior_profile.get('engagement_type', 'balanced')
+        }
+
     def _calculate_analysis_quality(self, analysis_results: Dict) -> float:
         """Calcola qualità dell'analisi"""
         quality_factors = []
@@ -1708,17 +2432,24 @@ class UltraAdvancedClas2eAI:
 
             # Training ensemble model
             logger.info("Training ensemble model...")
-            self.ensemble_model.fit(processed_data, processed_data[target_column])
+            await compute_executor.run(self.ensemble_model.fit, processed_data, processed_data[target_column],
+                                       label="train:ensemble")
 
             # Training deep learning models
             await self._train_deep_learning_models(processed_data, target_column)
 
+            # Distillazione dello stack appena addestrato in uno studente compatto
+            await self._train_student_model(processed_data, target_column)
+
             # Training clustering
             logger.info("Training clustering system...")
-            clustering_results = self.clustering_engine.perform_advanced_clustering(processed_data)
+            clustering_results = await compute_executor.run(
+                self.clustering_engine.perform_advanced_clustering, processed_data, label="train:clustering"
+            )
 
             # Update explainability
-            self.explainability_engine.initialize_explainers(self.ensemble_model, processed_data)
+            await compute_executor.run(self.explainability_engine.initialize_explainers,
+                                       self.ensemble_model, processed_data, label="train:explainers")
 
             # Save trained models
             await self._save_trained_models()
@@ -1734,88 +2465,159 @@ class UltraAdvancedClas2eAI:
 
     async def _preprocess_training_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Preprocessa dati di training"""
-        processed_data = data.copy()
-
-        # Feature engineering
-        processed_data = self.feature_engineer.create_temporal_features(processed_data)
-        processed_data = self.feature_engineer.create_interaction_features(processed_data)
-
-        # Handle missing values
-        processed_data = processed_data.fillna(processed_data.mean())
-
-        # Remove infinite values
-        processed_data = processed_data.replace([np.inf, -np.inf], np.nan).fillna(0)
-
-        return processed_data
+        return await compute_executor.run(_preprocess_training_frame, self.feature_engineer, data,
+                                          label="train:preprocess", process_safe=True)
 
     async def _train_deep_learning_models(self, data: pd.DataFrame, target: str):
         """Addestra modelli deep learning"""
         try:
-            # Prepare data for deep learning
-            features = data.drop(columns=[target]).values
-            targets = data[target].values
-
-            # Convert to tensors
-            X_tensor = torch.FloatTensor(features)
-            y_tensor = torch.FloatTensor(targets).unsqueeze(1)
-
-            # Create datasets
-            dataset = torch.utils.data.TensorDataset(X_tensor, y_tensor)
-            dataloader = torch.utils.data.DataLoader(dataset, batch_size=32, shuffle=True)
-
-            # Train LSTM
-            logger.info("Training LSTM model...")
-            lstm_optimizer = torch.optim.Adam(self.lstm_predictor.parameters(), lr=0.001)
-            lstm_criterion = nn.MSELoss()
-
-            self.lstm_predictor.train()
-            for epoch in range(10):
-                for batch_X, batch_y in dataloader:
-                    lstm_optimizer.zero_grad()
-                    outputs = self.lstm_predictor(batch_X.unsqueeze(1))  # Add sequence dimension
-                    loss = lstm_criterion(outputs, batch_y)
-                    loss.backward()
-                    lstm_optimizer.step()
-
-            # Train Transformer
-            logger.info("Training Transformer model...")
-            transformer_optimizer = torch.optim.Adam(self.transformer_predictor.parameters(), lr=0.001)
-            transformer_criterion = nn.MSELoss()
-
-            self.transformer_predictor.train()
-            for epoch in range(10):
-                for batch_X, batch_y in dataloader:
-                    transformer_optimizer.zero_grad()
-                    outputs = self.transformer_predictor(batch_X.unsqueeze(1))
-                    loss = transformer_criterion(outputs, batch_y)
-                    loss.backward()
-                    transformer_optimizer.step()
-
+            await compute_executor.run(self._fit_deep_learning_models, data, target, label="train:deep_learning")
             logger.info("✅ Deep learning models trained")
 
         except Exception as e:
             logger.error(f"Deep learning training failed: {e}")
 
-    async def _save_trained_models(self):
-        """Salva modelli addestrati"""
+    def _fit_deep_learning_models(self, data: pd.DataFrame, target: str):
+        """Training sincrono di LSTM e Transformer.
+
+        Si addestrano istanze nuove, con i pesi copiati da quelle in serving:
+        nessun oggetto raggiungibile dal bundle attivo viene modificato, e gli
+        attributi dell'engine passano ai nuovi modelli solo a training finito.
+        Gli input sono i vettori di MODEL_SCHEMA, lo stesso layout del serving
+        e di feature_schema.json.
+        """
+        models = {}
+        for name, factory in self._deep_model_factories().items():
+            models[name] = factory()
+            serving = self.model_bundle.models.get(name)
+            if serving is not None:
+                models[name].load_state_dict(serving.state_dict())
+        lstm_predictor, transformer_predictor = models['lstm_predictor'], models['transformer_predictor']
+
+        # Prepare data for deep learning: stessi vettori dello schema usati in serving
+        features = MODEL_SCHEMA.assemble_batch(data.drop(columns=[target]).to_dict('records'))
+        targets = data[target].values
+
+        # Convert to tensors
+        X_tensor = torch.from_numpy(features)
+        y_tensor = torch.FloatTensor(targets).unsqueeze(1)
+
+        # Create datasets
+        dataset = torch.utils.data.TensorDataset(X_tensor, y_tensor)
+        dataloader = torch.utils.data.DataLoader(dataset, batch_size=32, shuffle=True)
+
+        # Train LSTM
+        logger.info("Training LSTM model...")
+        lstm_optimizer = torch.optim.Adam(lstm_predictor.parameters(), lr=0.001)
+        lstm_criterion = nn.MSELoss()
+
+        lstm_predictor.train()
+        for epoch in range(10):
+            for batch_X, batch_y in dataloader:
+                lstm_optimizer.zero_grad()
+                outputs = lstm_predictor(batch_X.unsqueeze(1))  # Add sequence dimension
+                loss = lstm_criterion(outputs, batch_y)
+                loss.backward()
+                lstm_optimizer.step()
+
+        # Train Transformer
+        logger.info("Training Transformer model...")
+        transformer_optimizer = torch.optim.Adam(transformer_predictor.parameters(), lr=0.001)
+        transformer_criterion = nn.MSELoss()
+
+        transformer_predictor.train()
+        for epoch in range(10):
+            for batch_X, batch_y in dataloader:
+                transformer_optimizer.zero_grad()
+                outputs = transformer_predictor(batch_X.unsqueeze(1))
+                loss = transformer_criterion(outputs, batch_y)
+                loss.backward()
+                transformer_optimizer.step()
+
+        # Solo ora i nuovi modelli sostituiscono quelli dell'engine (il bundle tiene i vecchi)
+        self.lstm_predictor = lstm_predictor.eval()
+        self.transformer_predictor = transformer_predictor.eval()
+
+    async def _train_student_model(self, data: pd.DataFrame, target: str):
+        """Addestra lo studente sulle uscite di ensemble e reti deep"""
         try:
-            models_path = "ai/models"
-            os.makedirs(models_path, exist_ok=True)
+            fidelity = await compute_executor.run(self._fit_student_model, data, target, label="train:student")
+            logger.info(f"✅ Student model distilled (min R² {fidelity['min_r2']:.3f}, "
+                        f"speedup x{fidelity.get('speedup', '?')})")
 
-            # Save ensemble model
-            joblib.dump(self.ensemble_model, os.path.join(models_path, 'ensemble_model.pkl'))
+        except Exception as e:
+            logger.error(f"Student distillation failed: {e}")
 
-            # Save deep learning models
-            if self.lstm_predictor:
-                torch.save(self.lstm_predictor.state_dict(), os.path.join(models_path, 'lstm_predictor.pth'))
-            if self.transformer_predictor:
-                torch.save(self.transformer_predictor.state_dict(), os.path.join(models_path, 'transformer_predictor.pth'))
+    def _fit_student_model(self, data: pd.DataFrame, target: str) -> Dict[str, Any]:
+        """Etichetta i dati con lo stack completo (teacher) e vi addestra lo studente"""
+        started = time.perf_counter()
+        # Stesso input del serving: il vettore delle feature numeriche dell'utente
+        vectors = MODEL_SCHEMA.assemble_batch(data.drop(columns=[target]).to_dict('records'))
+
+        teacher = {}
+        if self.ensemble_model.is_trained:
+            teacher['engagement_prediction'] = np.asarray(self.ensemble_model.predict(data), dtype=np.float32)
+        for output, name in (('lstm_engagement', 'lstm_predictor'), ('transformer_engagement', 'transformer_predictor')):
+            model = getattr(self, name, None)
+            if model is not None:
+                teacher[output] = np.array([
+                    value for start in range(0, len(vectors), 256)
+                    for value in self._deep_forward(model, list(vectors[start:start + 256]))
+                ], dtype=np.float32)
+        if not teacher:
+            raise ValueError("No trained teacher model to distill")
+        teacher_seconds = (time.perf_counter() - started) / len(vectors)
+
+        from ai.distillation import DistilledStudent
+        student = DistilledStudent(outputs=tuple(teacher))
+        fidelity = student.fit(vectors, np.column_stack(list(teacher.values())),
+                               teacher_seconds_per_row=teacher_seconds)
+        self.student_model = student
+        return fidelity
 
-            logger.info("All trained models saved successfully")
+    async def _save_trained_models(self):
+        """Pubblica i modelli addestrati come nuova versione e la mette in serving"""
+        try:
+            version = await compute_executor.run(self._write_models_to_disk, label="save_models")
+            logger.info(f"All trained models saved as version {version}")
+            await self.reload_models(version)
 
         except Exception as e:
             logger.error(f"Failed to save models: {e}")
 
+    def _write_models_to_disk(self) -> str:
+        """Serializzazione sincrona (joblib, torch) dei modelli addestrati in una nuova versione"""
+
+        from ai.model_export import export_deep_models
+        from ai.tree_compiler import tree_backend
+
+        def write(directory: str):
+            # Layout delle feature con cui sono stati addestrati i modelli
+            MODEL_SCHEMA.save(directory)
+
+            # Save ensemble model (non compresso: caricabile con mmap_mode)
+            joblib.dump(self.ensemble_model, os.path.join(directory, 'ensemble_model.pkl'))
+            if tree_backend() == "treelite" and self.ensemble_model.is_trained:
+                self.ensemble_model.export_compiled(directory)
+
+            # Save deep learning models
+            for name, model in self._deep_models().items():
+                if model is not None:
+                    torch.save(model.state_dict(), os.path.join(directory, f'{name}.pth'))
+
+            # Artefatti di inferenza con verifica di parità
+            export_deep_models(self._deep_models(), DEEP_MODEL_INPUT_SIZE, directory)
+
+            if self.student_model is not None:
+                joblib.dump(self.student_model, os.path.join(directory, 'student_model.pkl'))
+
+        metadata = {'trained_at': datetime.utcnow().isoformat(), 'feature_schema': MODEL_SCHEMA.version}
+        if self.student_model is not None:
+            metadata['student_fidelity'] = self.student_model.fidelity
+        version = self.model_registry.publish(write, metadata=metadata)
+        self.model_registry.prune(keep=int(os.getenv("MODEL_REGISTRY_KEEP", "3")))
+        return version
+
     async def get_system_health(self) -> Dict[str, Any]:
         """Restituisce stato di salute del sistema AI ULTRA-AVANZATO"""
         return {
@@ -1824,6 +2626,12 @@ class UltraAdvancedClas2eAI:
             'next_gen_engines_ready': self.next_gen_engines_ready,
             'last_training': self.last_training.isoformat() if self.last_training else None,
             'performance_metrics': self.performance_metrics,
+            'model_version': self.model_bundle.version,
+            'inference_backends': self.model_bundle.backends,
+            'student_model': self.student_report(),
+            'artifact_load_ms': self.artifact_load_ms,
+            'warmup_ms': self.warmup_ms,
+            'is_warm': self.is_warm,
             'system_components': {
                 # Componenti core
                 'deep_learning': self._check_deep_learning_models(),
@@ -1873,12 +2681,12 @@ class UltraAdvancedClas2eAI:
 
     # Legacy methods for backward compatibility
     async def analyze_user(self, user_id: str) -> Dict[str, Any]:
-        """Metodo legacy - reindirizza all'analisi ultra-avanzata"""
-        return await self.analyze_user_ultra_advanced(user_id)
+        """Metodo legacy - reindirizza all'analisi ultra-avanzata (in cache)"""
+        return await self.analyze_student_comprehensive(user_id)
 
     async def get_recommendations(self, user_id: str) -> List[Dict[str, Any]]:
         """Metodo legacy per raccomandazioni"""
-        analysis = await self.analyze_user_ultra_advanced(user_id)
+        analysis = await self.analyze_student_comprehensive(user_id)
         return analysis.get('optimized_recommendations', {}).get('recommended_badges', [])
 
     async def assign_badges_to_user(self, user_id: str):
@@ -2009,6 +2817,10 @@ class UltraAdvancedClas2eAI:
         """Controlla se il sistema è pronto"""
         return self.is_initialized and self.models_trained
 
+    def engine_report(self) -> Dict[str, Dict[str, Any]]:
+        """Motori caricati/in attesa con tempi di import e costruzione"""
+        return engine_report(self)
+
 class QuantumMachineLearningEngine:
     """Quantum Machine Learning per ottimizzazioni quantistiche avanzate"""
 
@@ -0,0 +1,284 @@
+"""
+CACHE MULTI-LIVELLO PER LE ANALISI UTENTE
+=========================================
+
+Evita di ricalcolare l'intera pipeline di analisi per ogni endpoint:
+
+├── Tier 1: LRU in-process (nessun round trip)
+├── Tier 2: Redis condiviso tra i worker (JSON compatto + zlib)
+├── Chiave: user_id + variante + watermark di versione dei dati
+├── Stale-while-revalidate: risultati scaduti serviti subito, refresh in background
+└── Invalidazione esplicita quando viene registrata nuova attività
+"""
+
+import os
+import copy
+import json
+import time
+import zlib
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis opzionale: solo tier locale
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+AnalysisFactory = Callable[[], Awaitable[Dict[str, Any]]]
+
+def _json_default(value: Any) -> Any:
+    """Scalari e array numpy come numeri e liste (non stringhe), date in ISO"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+class LocalLRUCache:
+    """LRU in-process con limite di voci (restituite per riferimento, non copiate)"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class AnalysisCache:
+    """Cache a due livelli per i risultati di analyze_user_ultra_advanced"""
+
+    def __init__(self):
+        self.enabled = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() != "false"
+        self.fresh_ttl = float(os.getenv("ANALYSIS_CACHE_TTL", "300"))
+        self.stale_ttl = float(os.getenv("ANALYSIS_CACHE_STALE_TTL", "3600"))
+        # Per quanto un hit locale è valido senza ricontrollare il watermark su Redis
+        self.local_ttl = float(os.getenv("ANALYSIS_CACHE_LOCAL_TTL", "30"))
+        self.key_prefix = os.getenv("ANALYSIS_CACHE_PREFIX", "analysis")
+
+        self.local = LocalLRUCache(int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024")))
+        self.redis_client = None
+        self._versions: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: set = set()
+        self.stats = {
+            'local_hits': 0, 'redis_hits': 0, 'stale_hits': 0,
+            'misses': 0, 'refreshes': 0, 'invalidations': 0, 'errors': 0
+        }
+
+    async def connect(self):
+        """Connette il tier Redis (opzionale); idempotente, API e monitor possono condividere il processo"""
+        if not self.enabled or redis is None or self.redis_client is not None:
+            return
+
+        try:
+            self.redis_client = redis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                db=int(os.getenv("REDIS_DB", "0")),
+                decode_responses=False
+            )
+            await self.redis_client.ping()
+            logger.info("✅ Redis tier enabled for analysis cache")
+        except Exception as e:
+            logger.warning(f"Redis not available, analysis cache is process-local: {e}")
+            self.redis_client = None
+
+    async def close(self):
+        for task in list(self._refresh_tasks):
+            task.cancel()
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+
+    # ------------------------------------------------------------------
+    # API pubblica
+    # ------------------------------------------------------------------
+
+    async def get_or_compute(self, user_id: str, compute: AnalysisFactory,
+                             variant: str = "full") -> Dict[str, Any]:
+        """Restituisce l'analisi in cache o la calcola (una sola volta per chiave)"""
+        if not self.enabled:
+            return await compute()
+
+        user_id = str(user_id)
+        key = self._entry_key(user_id, variant)
+        entry, version = await self._lookup(user_id, key)
+
+        # Copie: un chiamante che modifica il risultato non altera la voce in cache
+        if entry is not None:
+            age = time.time() - entry['t']
+            if age < self.fresh_ttl:
+                return copy.deepcopy(entry['v'])
+            if age < self.stale_ttl:
+                self.stats['stale_hits'] += 1
+                self._schedule_refresh(user_id, key, version, compute)
+                return copy.deepcopy(entry['v'])
+
+        self.stats['misses'] += 1
+        return await self._compute_once(user_id, key, version, compute)
+
+    async def invalidate(self, user_id: str):
+        """Invalida tutte le analisi di un utente (nuova attività registrata)"""
+        user_id = str(user_id)
+        self.stats['invalidations'] += 1
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        self.local.delete_prefix(f"{self._entry_key(user_id, '')}")
+
+        if self.redis_client:
+            try:
+                self._versions[user_id] = int(await self.redis_client.incr(self._version_key(user_id)))
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Analysis cache invalidation on Redis failed for {user_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiche di utilizzo della cache"""
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'local_entries': len(self.local),
+            'redis_connected': self.redis_client is not None,
+            'inflight': len(self._inflight),
+            'fresh_ttl_seconds': self.fresh_ttl,
+            'stale_ttl_seconds': self.stale_ttl
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _entry_key(self, user_id: str, variant: str) -> str:
+        return f"{self.key_prefix}:{user_id}:{variant}"
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}:version:{user_id}"
+
+    async def _lookup(self, user_id: str, key: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Cerca prima nel tier locale, poi su Redis; restituisce (voce, watermark corrente)"""
+        version = self._versions.get(user_id, 0)
+        entry = self.local.get(key)
+        if entry is not None and entry['w'] == version and (
+                self.redis_client is None or time.time() - entry['checked'] < self.local_ttl):
+            self.stats['local_hits'] += 1
+            return entry, version
+
+        if self.redis_client is None:
+            return None, version
+
+        try:
+            raw_version, raw_entry = await self.redis_client.mget(self._version_key(user_id), key)
+            version = int(raw_version or 0)
+            self._versions[user_id] = version
+
+            if entry is not None and entry['w'] == version:
+                # Stesso watermark: la copia locale è ancora valida
+                entry['checked'] = time.time()
+                self.stats['local_hits'] += 1
+                return entry, version
+
+            if raw_entry is not None:
+                entry = self._decode(raw_entry)
+                if entry['w'] == version:
+                    entry['checked'] = time.time()
+                    self.local.set(key, entry)
+                    self.stats['redis_hits'] += 1
+                    return entry, version
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Analysis cache lookup on Redis failed for {user_id}: {e}")
+
+        return None, version
+
+    async def _store(self, key: str, version: int, value: Dict[str, Any]):
+        now = time.time()
+        entry = {'w': version, 't': now, 'v': copy.deepcopy(value)}
+        self.local.set(key, {**entry, 'checked': now})
+
+        if self.redis_client:
+            try:
+                await self.redis_client.set(key, self._encode(entry), ex=int(self.stale_ttl))
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Analysis cache store on Redis failed for {key}: {e}")
+
+    async def _compute_once(self, user_id: str, key: str, version: int,
+                            compute: AnalysisFactory) -> Dict[str, Any]:
+        """Calcola l'analisi deduplicando le richieste concorrenti sulla stessa chiave"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            # Non mettere in cache analisi fallite o degradate, né risultati superati da un'invalidazione
+            cacheable = isinstance(value, dict) and 'error' not in value and not value.get('degraded_sections')
+            if cacheable and self._versions.get(user_id, 0) == version:
+                await self._store(key, version, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita "Future exception was never retrieved" quando nessuno è in attesa
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _schedule_refresh(self, user_id: str, key: str, version: int, compute: AnalysisFactory):
+        """Ricalcola in background una voce scaduta (una sola volta per chiave)"""
+        if key in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._compute_once(user_id, key, version, compute)
+                self.stats['refreshes'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Background analysis refresh failed for {user_id}: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    @staticmethod
+    def _encode(entry: Dict[str, Any]) -> bytes:
+        payload = json.dumps(entry, separators=(',', ':'), default=_json_default)
+        return zlib.compress(payload.encode('utf-8'), 6)
+
+    @staticmethod
+    def _decode(raw: bytes) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(raw).decode('utf-8'))
+
+# Istanza globale condivisa da engine, API e monitor
+analysis_cache = AnalysisCache()
@@ -0,0 +1,155 @@
+"""
+GRAFO DELLE DIPENDENZE DELL'ANALISI UTENTE
+==========================================
+
+Ogni stadio della pipeline è un nodo con i suoi input; ogni sezione della
+risposta dichiara il nodo da cui deriva. Chiedendo solo alcune sezioni
+viene valutato solo il sottografo necessario.
+
+Gli stadi indipendenti partono appena i loro input sono pronti; uno stadio
+lento o fallito degrada solo le sezioni che dipendono da lui.
+"""
+
+import copy
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Awaitable, Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AnalysisNode:
+    """Stadio della pipeline: calcola un valore a partire dai suoi input"""
+    name: str
+    inputs: Tuple[str, ...]
+    builder: Callable[..., Any]
+    blocking: bool = True  # lavoro sincrono da eseguire fuori dall'event loop
+    timeout: Optional[float] = None  # None = timeout di default dell'executor
+
+@dataclass
+class AnalysisSection:
+    """Sezione della risposta, estratta dal valore di un nodo"""
+    name: str
+    node: str
+    extract: Callable[[Any], Any] = field(default=lambda value: value)
+    default: Any = None  # valore restituito se lo stadio fallisce
+
+@dataclass
+class StageFailure:
+    """Segnaposto per il valore di uno stadio fallito, scaduto o saltato"""
+    stage: str
+    reason: str
+
+async def run_inline(node: AnalysisNode, inputs: Dict[str, Any]) -> Any:
+    """Runner di default: esegue lo stadio direttamente sull'event loop"""
+    result = node.builder(**inputs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+class AnalysisGraph:
+    """DAG di nodi e sezioni con valutazione parziale"""
+
+    def __init__(self, roots: Sequence[str] = ()):
+        self.roots = set(roots)
+        self.nodes: Dict[str, AnalysisNode] = {}
+        self.sections: Dict[str, AnalysisSection] = {}
+
+    def node(self, name: str, inputs: Iterable[str], builder: Callable[..., Any],
+             blocking: bool = True, timeout: Optional[float] = None):
+        """Registra un nodo; il builder riceve gli input come argomenti keyword"""
+        inputs = tuple(inputs)
+        unknown = [i for i in inputs if i not in self.nodes and i not in self.roots]
+        if unknown:
+            raise ValueError(f"Node '{name}' depends on unknown inputs: {unknown}")
+        self.nodes[name] = AnalysisNode(name, inputs, builder, blocking, timeout)
+
+    def section(self, name: str, node: str, extract: Optional[Callable[[Any], Any]] = None,
+                default: Any = None):
+        """Registra una sezione della risposta"""
+        if node not in self.nodes:
+            raise ValueError(f"Section '{name}' refers to unknown node '{node}'")
+        self.sections[name] = AnalysisSection(name, node, extract or (lambda value: value), default)
+
+    def resolve_sections(self, sections: Optional[Iterable[str]] = None) -> List[str]:
+        """Valida le sezioni richieste (None = tutte)"""
+        if sections is None:
+            return list(self.sections)
+        sections = list(dict.fromkeys(sections))
+        unknown = [s for s in sections if s not in self.sections]
+        if unknown:
+            raise ValueError(f"Unknown analysis sections: {unknown}. Available: {sorted(self.sections)}")
+        return sections
+
+    def plan(self, sections: Iterable[str], available: Iterable[str] = ()) -> List[str]:
+        """Nodi da valutare, in ordine topologico, per produrre le sezioni richieste"""
+        available = set(available) | self.roots
+        ordered: List[str] = []
+        visited: Set[str] = set()
+
+        def visit(name: str):
+            if name in visited or name in available:
+                return
+            visited.add(name)
+            for dependency in self.nodes[name].inputs:
+                visit(dependency)
+            ordered.append(name)
+
+        for section in sections:
+            visit(self.sections[section].node)
+        return ordered
+
+    async def evaluate(self, sections: Iterable[str], values: Dict[str, Any],
+                       runner: Callable[[AnalysisNode, Dict[str, Any]], Awaitable[Any]] = run_inline
+                       ) -> Dict[str, Any]:
+        """Valuta il sottografo necessario e restituisce i valori dei nodi (values viene esteso).
+
+        Ogni stadio parte appena i suoi input sono pronti. Uno stadio fallito
+        produce uno StageFailure e i suoi dipendenti vengono saltati.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run(node: AnalysisNode):
+            await asyncio.gather(*(tasks[i] for i in node.inputs if i in tasks))
+
+            failed = [i for i in node.inputs if isinstance(values[i], StageFailure)]
+            if failed:
+                values[node.name] = StageFailure(node.name, f"skipped: '{failed[0]}' failed")
+                return
+
+            try:
+                values[node.name] = await runner(node, {i: values[i] for i in node.inputs})
+            except asyncio.TimeoutError:
+                logger.warning(f"Analysis stage '{node.name}' timed out")
+                values[node.name] = StageFailure(node.name, "timeout")
+            except Exception as e:
+                logger.warning(f"Analysis stage '{node.name}' failed: {e}")
+                values[node.name] = StageFailure(node.name, f"error: {e}")
+
+        # plan() è in ordine topologico: le dipendenze hanno già il loro task
+        for name in self.plan(sections, values):
+            tasks[name] = asyncio.ensure_future(run(self.nodes[name]))
+        await asyncio.gather(*tasks.values())
+        return values
+
+    def render(self, sections: Iterable[str], values: Dict[str, Any]) -> Dict[str, Any]:
+        """Costruisce la risposta con le sole sezioni richieste (default per gli stadi falliti)"""
+        response = {}
+        for name in sections:
+            section = self.sections[name]
+            value = values[section.node]
+            if isinstance(value, StageFailure):
+                response[name] = copy.copy(section.default)
+            else:
+                response[name] = section.extract(value)
+        return response
+
+    def failures(self, sections: Iterable[str], values: Dict[str, Any]) -> Dict[str, str]:
+        """Sezioni degradate con il motivo (stadio fallito, scaduto o saltato)"""
+        return {
+            name: f"{values[self.sections[name].node].stage}: {values[self.sections[name].node].reason}"
+            for name in sections
+            if isinstance(values[self.sections[name].node], StageFailure)
+        }
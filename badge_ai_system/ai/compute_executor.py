@@ -0,0 +1,184 @@
+"""
+ESECUTORE PER IL CALCOLO CPU-BOUND
+==================================
+
+Tiene il lavoro sincrono pesante (pandas, torch, sklearn, SHAP/LIME)
+fuori dall'event loop di asyncio:
+
+├── Thread pool (default): condivide i modelli già caricati, zero copie
+├── Process pool (opzionale): per funzioni picklable marcate process_safe
+└── Metriche: profondità della coda, attesa in coda, tempi per etichetta
+
+Configurazione: AI_COMPUTE_EXECUTOR=thread|process, AI_COMPUTE_WORKERS=N
+
+Con process vanno nei processi solo le fasi che lavorano su dati semplici,
+senza modelli: preprocessing del training (train:preprocess) e feature di
+molti utenti (bulk_features). Le fasi di serving che usano i modelli caricati
+(ensemble, reti deep, SHAP/LIME) e le feature del singolo utente (con lo stato
+incrementale del processo) restano sui thread: copiarle in un processo a ogni
+richiesta costerebbe più del calcolo. La latenza della singola richiesta non
+cambia con AI_COMPUTE_EXECUTOR.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+from app.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+def _call_in_process(fn: Callable, args: tuple, kwargs: dict):
+    """Eseguito nel processo worker: restituisce anche l'istante di inizio"""
+    return time.time(), fn(*args, **kwargs)
+
+class ComputeExecutor:
+    """Pool configurabile per il lavoro CPU-bound, con metriche di coda"""
+
+    def __init__(self, kind: Optional[str] = None, max_workers: Optional[int] = None):
+        self.kind = (kind or os.getenv("AI_COMPUTE_EXECUTOR", "thread")).lower()
+        if self.kind not in ("thread", "process"):
+            raise ValueError(f"Unknown compute executor kind: {self.kind}")
+        self.max_workers = max_workers or int(os.getenv("AI_COMPUTE_WORKERS", str(os.cpu_count() or 2)))
+
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Contatori: submitted - started = in coda, started - finished = in esecuzione
+        self.submitted = 0
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.queue_wait = LatencyHistogram()
+        self.run_time: Dict[str, LatencyHistogram] = {}
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-compute")
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._process_pool
+
+    @property
+    def queue_depth(self) -> int:
+        return self.submitted - self.started
+
+    @property
+    def running(self) -> int:
+        return self.started - self.finished
+
+    async def run(self, fn: Callable, *args, label: Optional[str] = None,
+                  process_safe: bool = False, **kwargs) -> Any:
+        """Esegue fn fuori dall'event loop e ne attende il risultato.
+
+        Con AI_COMPUTE_EXECUTOR=process solo le chiamate process_safe (funzione e
+        argomenti picklable) vanno al process pool; le altre restano sui thread.
+        """
+        label = label or getattr(fn, '__name__', 'anonymous')
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        self._on_submit()
+
+        if process_safe and self.kind == "process":
+            submitted_wall = time.time()
+            try:
+                started_wall, result = await loop.run_in_executor(
+                    self.process_pool, functools.partial(_call_in_process, fn, args, kwargs)
+                )
+            except Exception:
+                self._on_start(None)
+                self._on_finish(label, time.perf_counter() - submitted_at, failed=True)
+                raise
+            # Il processo figlio non aggiorna i contatori: si ricostruiscono a posteriori
+            wait = max(0.0, started_wall - submitted_wall)
+            self._on_start(wait)
+            self._on_finish(label, time.perf_counter() - submitted_at - wait)
+            return result
+
+        context = contextvars.copy_context()
+
+        def call():
+            self._on_start(time.perf_counter() - submitted_at)
+            started_at = time.perf_counter()
+            failed = True
+            try:
+                result = context.run(fn, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self._on_finish(label, time.perf_counter() - started_at, failed=failed)
+
+        return await loop.run_in_executor(self.thread_pool, call)
+
+    def _on_submit(self):
+        with self._lock:
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.submitted - self.started)
+
+    def _on_start(self, wait_seconds: Optional[float]):
+        with self._lock:
+            self.started += 1
+        if wait_seconds is not None:
+            self.queue_wait.observe(wait_seconds)
+
+    def _on_finish(self, label: str, seconds: float, failed: bool = False):
+        with self._lock:
+            self.finished += 1
+            if failed:
+                self.failed += 1
+            histogram = self.run_time.setdefault(label, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Profondità della coda, attesa e tempi di esecuzione per etichetta"""
+        with self._lock:
+            counters = {
+                'submitted': self.submitted,
+                'completed': self.finished,
+                'failed': self.failed,
+                'queue_depth': self.submitted - self.started,
+                'running': self.started - self.finished,
+                'max_queue_depth': self.max_queue_depth,
+            }
+            run_time = dict(self.run_time)
+
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            **counters,
+            'queue_wait': self.queue_wait.snapshot(),
+            'run_time': {label: histogram.snapshot() for label, histogram in sorted(run_time.items())}
+        }
+
+    def shutdown(self):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+
+    def _reset_after_fork(self):
+        """Nel figlio i thread del padre non esistono: i pool si ricreano al primo uso"""
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+
+# Istanza globale condivisa da engine e API
+compute_executor = ComputeExecutor()
+
+# Preload-then-fork (gunicorn --preload): i worker non ereditano pool senza thread
+os.register_at_fork(after_in_child=compute_executor._reset_after_fork)
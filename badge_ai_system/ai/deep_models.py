@@ -0,0 +1,198 @@
+"""
+MODELLI DEEP (TORCH) DEL MOTORE AI
+==================================
+
+Reti neurali di UltraAdvancedClas2eAI, separate da ai.ai_engine perché
+l'import del motore non paghi quello di torch:
+
+├── LSTMPredictor: LSTM bidirezionale con attenzione (engagement)
+├── TransformerPredictor: encoder Transformer (analisi comportamentale)
+├── BadgeGAN: generatore/discriminatore di badge
+└── GraphNeuralNetwork: GCN/GAT sulle relazioni utente-badge
+
+ai.ai_engine importa questo modulo (e torch) solo quando un modello viene
+costruito; i nomi restano importabili anche da ai.ai_engine.
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+class LSTMPredictor(nn.Module):
+    """LSTM per predizioni temporali avanzate"""
+
+    def __init__(self, input_size: int, hidden_size: int = 128, num_layers: int = 3,
+                 dropout: float = 0.3, output_size: int = 1):
+        super(LSTMPredictor, self).__init__()
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+
+        self.lstm = nn.LSTM(
+            input_size=input_size,
+            hidden_size=hidden_size,
+            num_layers=num_layers,
+            dropout=dropout if num_layers > 1 else 0,
+            batch_first=True,
+            bidirectional=True
+        )
+
+        self.attention = nn.MultiheadAttention(hidden_size * 2, num_heads=8, dropout=0.1)
+
+        self.fc_layers = nn.Sequential(
+            nn.Linear(hidden_size * 2, hidden_size),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_size, hidden_size // 2),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_size // 2, output_size)
+        )
+
+        self.layer_norm = nn.LayerNorm(hidden_size * 2)
+
+    def forward(self, x):
+        # LSTM layers
+        lstm_out, (h_n, c_n) = self.lstm(x)
+
+        # Attention mechanism
+        attn_out, _ = self.attention(lstm_out, lstm_out, lstm_out)
+
+        # Global average pooling
+        pooled = torch.mean(attn_out, dim=1)
+
+        # Layer normalization
+        normalized = self.layer_norm(pooled)
+
+        # Fully connected layers
+        output = self.fc_layers(normalized)
+        return output
+
+class TransformerPredictor(nn.Module):
+    """Transformer per analisi di sequenze comportamentali"""
+
+    def __init__(self, input_size: int, d_model: int = 256, nhead: int = 8,
+                 num_layers: int = 6, dropout: float = 0.1, output_size: int = 1):
+        super(TransformerPredictor, self).__init__()
+
+        self.input_projection = nn.Linear(input_size, d_model)
+        self.positional_encoding = nn.Parameter(torch.randn(1, 1000, d_model))
+
+        encoder_layer = nn.TransformerEncoderLayer(
+            d_model=d_model,
+            nhead=nhead,
+            dim_feedforward=d_model * 4,
+            dropout=dropout,
+            activation='gelu',
+            batch_first=True
+        )
+
+        self.transformer_encoder = nn.TransformerEncoder(
+            encoder_layer, num_layers=num_layers
+        )
+
+        self.output_projection = nn.Sequential(
+            nn.Linear(d_model, d_model // 2),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(d_model // 2, output_size)
+        )
+
+    def forward(self, x):
+        # Input projection
+        x = self.input_projection(x)
+
+        # Add positional encoding
+        seq_len = x.size(1)
+        x = x + self.positional_encoding[:, :seq_len, :]
+
+        # Transformer encoding
+        encoded = self.transformer_encoder(x)
+
+        # Global average pooling
+        pooled = torch.mean(encoded, dim=1)
+
+        # Output projection
+        output = self.output_projection(pooled)
+        return output
+
+class BadgeGAN(nn.Module):
+    """GAN per generazione intelligente di nuovi badge"""
+
+    def __init__(self, latent_dim: int = 100, badge_dim: int = 50):
+        super(BadgeGAN, self).__init__()
+        self.latent_dim = latent_dim
+        self.badge_dim = badge_dim
+
+        # Generator
+        self.generator = nn.Sequential(
+            nn.Linear(latent_dim, 256),
+            nn.BatchNorm1d(256),
+            nn.ReLU(),
+            nn.Linear(256, 512),
+            nn.BatchNorm1d(512),
+            nn.ReLU(),
+            nn.Linear(512, badge_dim),
+            nn.Tanh()
+        )
+
+        # Discriminator
+        self.discriminator = nn.Sequential(
+            nn.Linear(badge_dim, 512),
+            nn.LeakyReLU(0.2),
+            nn.Dropout(0.3),
+            nn.Linear(512, 256),
+            nn.LeakyReLU(0.2),
+            nn.Dropout(0.3),
+            nn.Linear(256, 1),
+            nn.Sigmoid()
+        )
+
+    def generate_badge(self, num_badges: int = 1):
+        """Genera nuovi badge"""
+        z = torch.randn(num_badges, self.latent_dim)
+        return self.generator(z)
+
+    def discriminate(self, badges):
+        """Discrimina badge reali vs generati"""
+        return self.discriminator(badges)
+
+class GraphNeuralNetwork(nn.Module):
+    """GNN per modellare relazioni tra utenti e badge"""
+
+    def __init__(self, num_features: int, hidden_channels: int = 64, num_classes: int = 2):
+        super(GraphNeuralNetwork, self).__init__()
+        from torch_geometric.nn import GCNConv, GATConv
+
+        self.conv1 = GCNConv(num_features, hidden_channels)
+        self.conv2 = GCNConv(hidden_channels, hidden_channels)
+        self.conv3 = GCNConv(hidden_channels, hidden_channels)
+
+        self.attention = GATConv(hidden_channels, hidden_channels, heads=8, concat=False)
+
+        self.classifier = nn.Sequential(
+            nn.Linear(hidden_channels, hidden_channels // 2),
+            nn.ReLU(),
+            nn.Dropout(0.5),
+            nn.Linear(hidden_channels // 2, num_classes)
+        )
+
+    def forward(self, x, edge_index):
+        # Graph convolutions
+        x = self.conv1(x, edge_index)
+        x = F.relu(x)
+        x = F.dropout(x, p=0.5, training=self.training)
+
+        x = self.conv2(x, edge_index)
+        x = F.relu(x)
+        x = F.dropout(x, p=0.5, training=self.training)
+
+        x = self.conv3(x, edge_index)
+        x = F.relu(x)
+
+        # Attention mechanism
+        x = self.attention(x, edge_index)
+        x = F.relu(x)
+
+        # Classification
+        out = self.classifier(x)
+        return F.log_softmax(out, dim=1)
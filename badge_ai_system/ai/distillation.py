@@ -0,0 +1,162 @@
+"""
+DISTILLAZIONE DELLO STACK COMPLETO IN UN MODELLO STUDENTE
+=========================================================
+
+Lo stack di serving (sei ensemble ad alberi, meta-model torch, LSTM e
+Transformer) viene imitato da un MLP compatto:
+
+├── Teacher: le uscite numeriche dello stack sui dati di training
+├── Student: MLP addestrato con sklearn su input e uscite standardizzati,
+│   servito con matmul numpy float32 (standardizzazioni incorporate nei pesi)
+├── Fedeltà: MAE, RMSE, R², accordo entro tolleranza e speedup sul teacher
+└── Fallback: fedeltà insufficiente o input fuori distribuzione -> stack completo
+
+Il serving dallo studente si attiva con AI_STUDENT_SERVING=on.
+"""
+
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Uscite dello stack completo imitate dallo studente
+TEACHER_OUTPUTS = ('engagement_prediction', 'lstm_engagement', 'transformer_engagement')
+
+# Errore assoluto entro cui studente e teacher si considerano d'accordo
+FIDELITY_TOLERANCE = float(os.getenv("AI_STUDENT_TOLERANCE", "0.05"))
+
+def fidelity_report(teacher: np.ndarray, student: np.ndarray, outputs: Sequence[str],
+                    tolerance: float = FIDELITY_TOLERANCE) -> Dict[str, Any]:
+    """Metriche di fedeltà per uscita: quanto lo studente riproduce il teacher"""
+    report = {}
+    for column, name in enumerate(outputs):
+        expected = teacher[:, column].astype(np.float64)
+        actual = student[:, column].astype(np.float64)
+        error = actual - expected
+        variance = float(np.sum((expected - expected.mean()) ** 2))
+        report[name] = {
+            'mae': float(np.mean(np.abs(error))),
+            'rmse': float(np.sqrt(np.mean(error ** 2))),
+            'max_abs_error': float(np.max(np.abs(error))),
+            # Teacher costante: R² perfetto solo se lo studente lo riproduce esattamente
+            'r2': 1.0 - float(np.sum(error ** 2)) / variance if variance > 0 else float(np.allclose(error, 0)),
+            'agreement': float(np.mean(np.abs(error) <= tolerance)),
+        }
+    return report
+
+# Sotto questa soglia di righe lbfgs (full batch) converge meglio e più in fretta di adam
+LBFGS_MAX_ROWS = 20000
+
+class DistilledStudent:
+    """MLP compatto addestrato sulle uscite dello stack completo"""
+
+    # Studenti salvati prima del folding: pesi da applicare a input standardizzati
+    scaling_folded = False
+
+    def __init__(self, hidden_layers: Tuple[int, ...] = (64, 32), outputs: Sequence[str] = TEACHER_OUTPUTS):
+        self.hidden_layers = tuple(hidden_layers)
+        self.outputs = tuple(outputs)
+        self.mean: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self.weights: list = []
+        self.biases: list = []
+        self.fidelity: Dict[str, Any] = {}
+        self.is_trained = False
+
+    def fit(self, X: np.ndarray, Y: np.ndarray, teacher_seconds_per_row: Optional[float] = None,
+            validation_fraction: float = 0.2, seed: int = 0) -> Dict[str, Any]:
+        """Addestra lo studente su (input, uscite del teacher) e misura la fedeltà su un holdout"""
+        from sklearn.neural_network import MLPRegressor
+        from sklearn.preprocessing import StandardScaler
+
+        X = np.asarray(X, dtype=np.float32)
+        Y = np.asarray(Y, dtype=np.float32).reshape(len(X), -1)
+
+        # Holdout per la fedeltà (con una sola riga si valuta sul training)
+        order = np.random.default_rng(seed).permutation(len(X))
+        holdout = max(1, int(len(X) * validation_fraction)) if len(X) > 1 else 0
+        valid, train = order[:holdout], order[holdout:]
+
+        # Input e uscite standardizzati per l'addestramento; media e scala degli input
+        # restano salvate per il controllo di distribuzione
+        x_scaler = StandardScaler().fit(X[train])
+        y_scaler = StandardScaler().fit(Y[train])
+        self.mean = x_scaler.mean_.astype(np.float32)
+        self.scale = x_scaler.scale_.astype(np.float32)
+
+        # Niente early_stopping: su poche centinaia di righe il suo split di validazione
+        # è troppo piccolo e ferma l'addestramento lontano dal teacher
+        mlp = MLPRegressor(hidden_layer_sizes=self.hidden_layers, activation='relu',
+                           solver='lbfgs' if len(train) <= LBFGS_MAX_ROWS else 'adam',
+                           max_iter=2000, random_state=seed)
+        targets = y_scaler.transform(Y[train])
+        mlp.fit(x_scaler.transform(X[train]), targets if Y.shape[1] > 1 else targets[:, 0])
+
+        # Solo i pesi, con le due standardizzazioni incorporate nel primo e nell'ultimo
+        # layer: il serving è un forward numpy sugli input grezzi, senza sklearn
+        weights = [w.astype(np.float64) for w in mlp.coefs_]
+        biases = [b.astype(np.float64) for b in mlp.intercepts_]
+        biases[0] = biases[0] - (x_scaler.mean_ / x_scaler.scale_) @ weights[0]
+        weights[0] = weights[0] / x_scaler.scale_[:, None]
+        weights[-1] = weights[-1] * y_scaler.scale_[None, :]
+        biases[-1] = biases[-1] * y_scaler.scale_ + y_scaler.mean_
+        self.weights = [w.astype(np.float32) for w in weights]
+        self.biases = [b.astype(np.float32) for b in biases]
+        self.scaling_folded = True
+        self.is_trained = True
+
+        evaluation = valid if len(valid) else train
+        self.fidelity = {
+            'outputs': fidelity_report(Y[evaluation], self.predict(X[evaluation]), self.outputs),
+            'samples': {'train': int(len(train)), 'holdout': int(len(valid))},
+            'tolerance': FIDELITY_TOLERANCE,
+            'trained_at': datetime.utcnow().isoformat(),
+        }
+        self.fidelity['min_r2'] = min(entry['r2'] for entry in self.fidelity['outputs'].values())
+        self.fidelity.update(self._benchmark(X[evaluation][:256], teacher_seconds_per_row))
+
+        logger.info(f"✅ Student model trained: min R² {self.fidelity['min_r2']:.3f}, "
+                    f"{self.fidelity['student_us_per_row']}µs/row")
+        return self.fidelity
+
+    def _benchmark(self, X: np.ndarray, teacher_seconds_per_row: Optional[float]) -> Dict[str, Any]:
+        """Costo per utente dello studente (una riga alla volta, come online) rispetto al teacher"""
+        started = time.perf_counter()
+        for row in X:
+            self.predict_one(row)
+        student_seconds = (time.perf_counter() - started) / max(1, len(X))
+
+        report = {'student_us_per_row': round(student_seconds * 1e6, 2)}
+        if teacher_seconds_per_row:
+            report['teacher_us_per_row'] = round(teacher_seconds_per_row * 1e6, 2)
+            report['speedup'] = round(teacher_seconds_per_row / max(student_seconds, 1e-9), 1)
+        return report
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean) / self.scale
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Uscite (righe, len(outputs)) con un forward numpy float32"""
+        if not self.is_trained:
+            raise ValueError("Student model not trained yet")
+        hidden = np.asarray(X, dtype=np.float32).reshape(-1, len(self.mean))
+        if not self.scaling_folded:
+            hidden = self._standardize(hidden)
+        for weight, bias in zip(self.weights[:-1], self.biases[:-1]):
+            hidden = np.maximum(hidden @ weight + bias, 0.0)
+        return (hidden @ self.weights[-1] + self.biases[-1]).reshape(-1, len(self.outputs))
+
+    def predict_one(self, vector: np.ndarray) -> Dict[str, float]:
+        return dict(zip(self.outputs, self.predict(vector)[0].tolist()))
+
+    def in_distribution(self, vector: np.ndarray, max_z: float) -> bool:
+        """False se una feature è oltre max_z deviazioni standard dai dati di training"""
+        return bool(np.all(np.abs(self._standardize(np.asarray(vector, dtype=np.float32))) <= max_z))
+
+    def fidelity_ok(self, min_r2: float) -> bool:
+        return self.is_trained and self.fidelity.get('min_r2', float('-inf')) >= min_r2
@@ -0,0 +1,137 @@
+"""
+REGISTRO LAZY DEI MOTORI AI
+===========================
+
+Ogni motore viene dichiarato una sola volta come attributo di classe e
+importato/costruito solo al primo accesso:
+
+├── LazyEngine: descriptor che costruisce e memorizza il motore sull'istanza
+├── Target: classe/callable, nome nel modulo del proprietario o "modulo:attributo"
+├── Thread-safe: il primo accesso concorrente costruisce il motore una volta
+├── Report: tempo di costruzione e moduli importati, per istanza
+└── LazyModule: librerie pesanti (pandas, torch) importate al primo uso
+
+L'istanza costruita finisce nel __dict__ dell'oggetto: gli accessi successivi
+(e le riassegnazioni, es. un modello caricato da disco) non passano più dal
+descriptor. Anche il report di costruzione sta nel __dict__ dell'oggetto
+(ENGINE_REPORTS_ATTR): il descriptor è condiviso da tutte le istanze.
+"""
+
+import sys
+import time
+import logging
+import importlib
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+EngineFactory = Union[str, Callable[[], Any]]
+
+# Chiave del __dict__ dell'istanza con i report di costruzione dei suoi motori
+ENGINE_REPORTS_ATTR = '_lazy_engine_reports'
+
+class LazyModule:
+    """Modulo importato al primo accesso a un suo attributo (es. pd.DataFrame, torch.no_grad)"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        # Chiamato solo per gli attributi che il proxy non ha: sono quelli del modulo
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    @property
+    def is_imported(self) -> bool:
+        return self._module is not None or self._name in sys.modules
+
+    def __repr__(self) -> str:
+        return f"<LazyModule {self._name} ({'imported' if self.is_imported else 'pending'})>"
+
+class LazyEngine:
+    """Descriptor per un motore costruito al primo utilizzo"""
+
+    def __init__(self, factory: EngineFactory, description: str = ""):
+        self.factory = factory
+        self.description = description
+        self.name: Optional[str] = None
+        self.owner_module: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+        self.owner_module = owner.__module__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        with self._lock:
+            # Un altro thread può averlo costruito mentre si attendeva il lock
+            if self.name in instance.__dict__:
+                return instance.__dict__[self.name]
+            reports = instance.__dict__.setdefault(ENGINE_REPORTS_ATTR, {})
+            engine = self._build(reports)
+            instance.__dict__[self.name] = engine
+            return engine
+
+    def _resolve(self) -> Callable[[], Any]:
+        if callable(self.factory):
+            return self.factory
+        module_name, _, attribute = self.factory.rpartition(":")
+        module = importlib.import_module(module_name) if module_name else sys.modules[self.owner_module]
+        return getattr(module, attribute)
+
+    def _build(self, reports: Dict[str, Dict[str, Any]]) -> Any:
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        try:
+            engine = self._resolve()()
+        except Exception as e:
+            reports[self.name] = self._report(started, modules_before, error=str(e))
+            logger.error(f"Failed to build engine '{self.name}': {e}")
+            raise
+
+        report = reports[self.name] = self._report(started, modules_before)
+        logger.info(f"Engine '{self.name}' ready in {report['seconds']:.3f}s "
+                    f"({report['modules_imported']} modules imported)")
+        return engine
+
+    def _report(self, started: float, modules_before: int, error: Optional[str] = None) -> Dict[str, Any]:
+        report = {
+            'seconds': round(time.perf_counter() - started, 4),
+            'modules_imported': len(sys.modules) - modules_before,
+            'loaded_at': datetime.utcnow().isoformat(),
+        }
+        if error:
+            report['error'] = error
+        return report
+
+def lazy_engines(owner: type) -> Dict[str, LazyEngine]:
+    """Motori lazy dichiarati su una classe (incluse le classi base)"""
+    engines = {}
+    for cls in reversed(owner.__mro__):
+        engines.update({name: value for name, value in vars(cls).items() if isinstance(value, LazyEngine)})
+    return engines
+
+def is_engine_loaded(instance: Any, name: str) -> bool:
+    """True se il motore è già stato costruito su questa istanza"""
+    return name in instance.__dict__
+
+def engine_report(instance: Any) -> Dict[str, Dict[str, Any]]:
+    """Stato di ogni motore: caricato o in attesa, con tempi di import/costruzione"""
+    reports = instance.__dict__.get(ENGINE_REPORTS_ATTR, {})
+    report = {}
+    for name, engine in lazy_engines(type(instance)).items():
+        entry = {'status': 'pending', 'description': engine.description}
+        load_report = reports.get(name)
+        if is_engine_loaded(instance, name):
+            entry.update(status='loaded', **(load_report or {}))
+        elif load_report and 'error' in load_report:
+            entry.update(status='failed', **load_report)
+        report[name] = entry
+    return report
@@ -0,0 +1,186 @@
+"""
+SCHEMA VERSIONATO DELLE FEATURE DI INPUT DEI MODELLI
+====================================================
+
+Ordine fisso delle feature numeriche che entrano in LSTM, Transformer,
+studente distillato e agente RL, assemblate direttamente in un vettore float32:
+
+├── Base: statistiche utente (livello, XP, giorni attivi, contatori)
+├── Comportamentali: conteggi per tipo di attività, sessioni, picchi
+├── Temporali: medie di ora/giorno/mese e delle loro codifiche cicliche
+├── Interazioni: prodotti e rapporti a coppie delle feature base,
+│   calcolati vettorialmente sul vettore già assemblato
+├── Default: valore di ogni feature mancante o non numerica (0 se non indicato)
+└── Versione: hash di nomi, ordine, default e dimensione
+
+Lo schema viene salvato accanto agli artefatti di ogni versione del registro
+(feature_schema.json) e confrontato al caricamento: modelli addestrati su un
+layout diverso non vengono messi in serving.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ai.model_registry import ModelIntegrityError
+
+SCHEMA_FILE = "feature_schema.json"
+
+# Dimensione dell'input dei modelli deep (feature dello schema + padding)
+MODEL_INPUT_SIZE = 100
+
+BASE_FEATURES = (
+    'level', 'xp_points', 'total_active_days', 'consecutive_active_days',
+    'total_quizzes', 'total_comments', 'total_materials', 'total_discussions',
+)
+
+# Tipi di attività restituiti da get_recent_user_activity
+ACTIVITY_TYPES = ('quiz', 'comment', 'material', 'discussion')
+
+BEHAVIORAL_FEATURES = tuple(f'activity_{activity}_count' for activity in ACTIVITY_TYPES) + (
+    'avg_session_length', 'avg_session_duration', 'sessions_per_day', 'avg_unique_activities_per_session',
+    'peak_hour', 'peak_day', 'activity_concentration', 'weekend_ratio', 'transition_diversity',
+)
+
+TEMPORAL_FEATURES = (
+    'hour', 'day_of_week', 'month',
+    'hour_sin', 'hour_cos', 'day_sin', 'day_cos', 'month_sin', 'month_cos',
+)
+
+# Feature lette dal dizionario dell'utente, nell'ordine del vettore
+DIRECT_FEATURES = BASE_FEATURES + BEHAVIORAL_FEATURES + TEMPORAL_FEATURES
+
+# Valori per le feature assenti (le altre valgono 0)
+FEATURE_DEFAULTS = {'level': 1.0}
+
+# Lunghezza dello stato dell'agente RL: prime colonne del vettore dello schema
+RL_STATE_SIZE = 50
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """datetime da asyncpg o stringa ISO da Supabase (con suffisso Z)"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return None
+
+def _is_numeric(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+class FeatureSchemaMismatch(ModelIntegrityError):
+    """Artefatti addestrati con uno schema delle feature diverso da quello in uso"""
+
+class FeatureSchema:
+    """Nomi delle feature -> colonne del vettore di input, con default e interazioni derivate"""
+
+    def __init__(self, direct: Iterable[str], interaction_base: Iterable[str], size: int,
+                 defaults: Optional[Mapping[str, float]] = None):
+        self.direct = tuple(direct)
+        self.interaction_base = tuple(interaction_base)
+        self.size = size
+        self.defaults = {name: float(value) for name, value in (defaults or {}).items()}
+
+        pairs = list(combinations(self.interaction_base, 2))
+        self.features: Tuple[str, ...] = self.direct + tuple(
+            f'{left}_{right}_interaction' for left, right in pairs
+        ) + tuple(
+            f'{left}_{right}_ratio' for left, right in pairs
+        )
+        if len(self.features) > size:
+            raise ValueError(f"Feature schema has {len(self.features)} features, more than size {size}")
+        if len(set(self.features)) != len(self.features):
+            raise ValueError("Feature schema has duplicate feature names")
+
+        self.columns: Dict[str, int] = {name: i for i, name in enumerate(self.features)}
+        self._left = np.array([self.columns[left] for left, _ in pairs], dtype=np.intp)
+        self._right = np.array([self.columns[right] for _, right in pairs], dtype=np.intp)
+        self._default_row = np.array([self.defaults.get(name, 0.0) for name in self.direct], dtype=np.float32)
+        self.version = hashlib.sha256(json.dumps(self._spec(), sort_keys=True).encode()).hexdigest()[:16]
+
+    def _spec(self) -> Dict[str, Any]:
+        return {
+            'direct': list(self.direct),
+            'interaction_base': list(self.interaction_base),
+            'size': self.size,
+            'defaults': self.defaults,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': self.version, **self._spec(), 'features': list(self.features)}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'FeatureSchema':
+        schema = cls(data['direct'], data['interaction_base'], data['size'], data.get('defaults'))
+        if data.get('version') not in (None, schema.version):
+            raise FeatureSchemaMismatch(f"Feature schema file is corrupted (version {data['version']} "
+                                        f"does not match its content, {schema.version})")
+        return schema
+
+    def save(self, directory: str) -> str:
+        path = os.path.join(directory, SCHEMA_FILE)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['FeatureSchema']:
+        """Schema salvato con gli artefatti, None per versioni precedenti allo schema"""
+        path = os.path.join(directory, SCHEMA_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def validate(self, other: 'FeatureSchema'):
+        """Solleva FeatureSchemaMismatch se other (degli artefatti) non coincide con questo schema"""
+        if other.version == self.version:
+            return
+        removed = [name for name in other.features if name not in self.columns]
+        added = [name for name in self.features if name not in other.columns]
+        moved = [name for name in self.features if name in other.columns and other.columns[name] != self.columns[name]]
+        raise FeatureSchemaMismatch(
+            f"Artifacts use feature schema {other.version}, runtime is {self.version} "
+            f"(size {other.size} -> {self.size}, added {added[:5]}, removed {removed[:5]}, moved {moved[:5]})"
+        )
+
+    def index(self, name: str) -> int:
+        return self.columns[name]
+
+    def assemble(self, features: Mapping[str, Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vettore float32 dello schema; feature mancanti o non numeriche prendono il default.
+
+        Con out (preallocato, size elementi) il vettore viene scritto in place,
+        ad esempio in una riga di una matrice di batch.
+        """
+        vector = out if out is not None else np.empty(self.size, dtype=np.float32)
+        direct = len(self.direct)
+        vector[:direct] = self._default_row
+        for i, name in enumerate(self.direct):
+            value = features.get(name)
+            if _is_numeric(value):
+                vector[i] = value
+
+        pairs = len(self._left)
+        left, right = vector[self._left], vector[self._right]
+        np.multiply(left, right, out=vector[direct:direct + pairs])
+        np.divide(left, right + 1e-8, out=vector[direct + pairs:direct + 2 * pairs])
+        vector[len(self.features):] = 0.0
+
+        return np.nan_to_num(vector, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def assemble_batch(self, records: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """Matrice (righe, size) preallocata: ogni record viene scritto nella sua riga"""
+        records = list(records)
+        batch = np.empty((len(records), self.size), dtype=np.float32)
+        for row, features in zip(batch, records):
+            self.assemble(features, out=row)
+        return batch
+
+# Schema in uso: cambiarlo (feature, ordine, default, dimensione) ne cambia la versione
+MODEL_SCHEMA = FeatureSchema(DIRECT_FEATURES, BASE_FEATURES, MODEL_INPUT_SIZE, FEATURE_DEFAULTS)
+MODEL_FEATURES = MODEL_SCHEMA.features
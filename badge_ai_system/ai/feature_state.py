@@ -0,0 +1,416 @@
+"""
+STATO INCREMENTALE DELLE FEATURE COMPORTAMENTALI
+================================================
+
+Le feature di create_behavioral_features mantenute per utente e aggiornate a
+ogni evento in O(1), invece di ricalcolarle dall'intera lista di attività:
+
+├── Contatori: attività per tipo
+├── Istogrammi: 24 ore e 7 giorni (UTC), con somma e somma dei quadrati
+│   dei bin non vuoti per la concentrazione oraria
+├── Transizioni: matrice (precedente, corrente) in ordine di prima comparsa
+├── Sessioni: medie incrementali (Welford) di lunghezza, durata e attività
+│   distinte; una sessione aperta aggiorna il proprio contributo alla media
+└── Store: LRU per utente, stati costruiti dalla cronologia, riallineati a
+    ogni richiesta con i soli eventi della cronologia oltre il watermark e
+    ricostruiti quando un evento esce dalla finestra della cronologia. Se il
+    monitor gira nello stesso processo dell'API li aggiorna anche a ogni
+    evento (solo tipi restituiti dalla cronologia), spostandoli poi
+    sull'orario della loro riga nel database (o ricostruendo, se la riga ne
+    cambia la posizione); l'API servita da gunicorn non lo avvia, e lì gli
+    stati avanzano solo dalla cronologia
+
+Gli eventi vanno applicati in ordine di timestamp (a parità, in ordine di
+arrivo): è l'ordine con cui create_behavioral_features costruisce le transizioni.
+"""
+
+import os
+import math
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ai.analysis_cache import LocalLRUCache
+from ai.feature_schema import ACTIVITY_TYPES, parse_timestamp
+
+# Valori delle feature di un utente senza attività
+DEFAULT_BEHAVIORAL_FEATURES = {
+    'peak_hour': 0,
+    'peak_day': 0,
+    'activity_concentration': 0.0,
+    'weekend_ratio': 0.0,
+}
+
+def _utc(timestamp: datetime) -> datetime:
+    """Orari in UTC, come pd.to_datetime(..., utc=True) (i naive sono già UTC)"""
+    return timestamp.astimezone(timezone.utc) if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+class RunningMean:
+    """Media di Welford; replace aggiorna un valore già contato (sessione ancora aperta)"""
+
+    __slots__ = ('count', 'mean')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+
+    def replace(self, old: float, new: float):
+        self.mean += (new - old) / self.count
+
+    @property
+    def value(self) -> float:
+        return self.mean if self.count else float('nan')
+
+class _Session:
+    __slots__ = ('length', 'start', 'end', 'activity_types')
+
+    def __init__(self, timestamp: datetime):
+        self.length = 0
+        self.start = self.end = timestamp
+        self.activity_types: set = set()
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start).total_seconds()
+
+class _Observed:
+    """Evento del monitor applicato allo stato, in attesa della sua riga nel database"""
+    __slots__ = ('activity_type', 'timestamp', 'events', 'previous_first', 'previous_last')
+
+    def __init__(self, state: 'BehavioralFeatureState', activity_type: Optional[str], timestamp: datetime):
+        self.activity_type, self.timestamp = activity_type, timestamp
+        # Stato prima dell'evento: per spostarlo sul timestamp del database
+        self.previous_first, self.previous_last = state.first_timestamp, state.last_timestamp
+        self.events = state.events + 1
+
+class BehavioralFeatureState:
+    """Feature comportamentali di un utente, aggiornate evento per evento"""
+
+    def __init__(self):
+        self.events = 0
+        self.activity_counts: Dict[str, int] = {}
+        self.hourly = [0] * 24
+        self.daily = [0] * 7
+        # Bin orari non vuoti e somma dei quadrati dei loro conteggi (la somma è events)
+        self._hour_bins = 0
+        self._hour_sum_sq = 0
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        # Tipi degli eventi applicati con timestamp uguale a last_timestamp (watermark della cronologia)
+        self.last_timestamp_types: Dict[str, int] = {}
+        self.last_activity: Optional[str] = None
+        self.transitions: Dict[Tuple[str, str], int] = {}
+        self.transition_count = 0
+        # Sessioni solo se gli eventi portano session_id (come la colonna del DataFrame)
+        self.has_sessions = False
+        self.sessions: Dict[Any, _Session] = {}
+        self.session_length = RunningMean()
+        self.session_duration = RunningMean()
+        self.session_unique_activities = RunningMean()
+
+    @classmethod
+    def from_activity(cls, activity_data: Iterable[Dict[str, Any]]) -> 'BehavioralFeatureState':
+        """Stato costruito da una cronologia in qualunque ordine (es. dal database, più recenti prima)"""
+        timed = [(parse_timestamp(event.get('timestamp')), event) for event in activity_data]
+        timed = [(_utc(timestamp), event) for timestamp, event in timed if timestamp is not None]
+        state = cls()
+        # sorted è stabile: a parità di timestamp resta l'ordine della cronologia
+        for timestamp, event in sorted(timed, key=lambda item: item[0]):
+            state._apply(timestamp, event)
+        return state
+
+    def update(self, event: Dict[str, Any]) -> bool:
+        """Applica un evento (activity_type, timestamp, eventualmente session_id); False se senza timestamp"""
+        timestamp = parse_timestamp(event.get('timestamp'))
+        if timestamp is None:
+            return False
+        self._apply(_utc(timestamp), event)
+        return True
+
+    def _apply(self, timestamp: datetime, event: Dict[str, Any]):
+        activity_type = event.get('activity_type')
+        self.events += 1
+        self.activity_counts[activity_type] = self.activity_counts.get(activity_type, 0) + 1
+
+        self._add_to_histograms(timestamp, 1)
+
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp, self.last_timestamp_types = timestamp, {activity_type: 1}
+        elif timestamp == self.last_timestamp:
+            self.last_timestamp_types[activity_type] = self.last_timestamp_types.get(activity_type, 0) + 1
+
+        if self.last_activity is not None:
+            pair = (str(self.last_activity), str(activity_type))
+            self.transitions[pair] = self.transitions.get(pair, 0) + 1
+            self.transition_count += 1
+        self.last_activity = activity_type
+        self._apply_history_session(timestamp, event)
+
+    def _add_to_histograms(self, timestamp: datetime, delta: int):
+        # Un bin che passa da v a v+1 aggiunge 2v+1 alla somma dei quadrati (da v a v-1 toglie 2v-1)
+        hour_count = self.hourly[timestamp.hour]
+        self._hour_bins += (hour_count + delta > 0) - (hour_count > 0)
+        self._hour_sum_sq += 2 * hour_count * delta + 1
+        self.hourly[timestamp.hour] = hour_count + delta
+        self.daily[timestamp.weekday()] += delta
+
+    def _move_observed(self, observed: _Observed, timestamp: datetime) -> bool:
+        """Porta un evento del monitor sul timestamp della sua riga nel database.
+
+        Possibile solo se è ancora l'ultimo evento applicato e la riga resta
+        dopo tutti i precedenti: la posizione nelle transizioni non cambia e
+        basta spostarlo di bin orario e giornaliero. Altrimenti False: l'ordine
+        di create_behavioral_features è un altro e lo stato va ricostruito.
+        """
+        if self.events != observed.events or \
+                (observed.previous_last is not None and timestamp <= observed.previous_last):
+            return False
+        self._add_to_histograms(observed.timestamp, -1)
+        self._add_to_histograms(timestamp, 1)
+        self.first_timestamp = observed.previous_first or timestamp
+        self.last_timestamp, self.last_timestamp_types = timestamp, {observed.activity_type: 1}
+        return True
+
+    def _apply_history_session(self, timestamp: datetime, event: Dict[str, Any]):
+        if 'session_id' in event:
+            self.has_sessions = True
+            if event['session_id'] is not None:
+                self._apply_session(event['session_id'], timestamp, event.get('activity_type'))
+
+    def _apply_session(self, session_id: Any, timestamp: datetime, activity_type: Optional[str]):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = _Session(timestamp)
+            self.session_length.add(0)
+            self.session_duration.add(0.0)
+            self.session_unique_activities.add(0)
+
+        old_duration, old_unique = session.duration, len(session.activity_types)
+        session.length += 1
+        session.start, session.end = min(session.start, timestamp), max(session.end, timestamp)
+        session.activity_types.add(activity_type)
+
+        self.session_length.replace(session.length - 1, session.length)
+        self.session_duration.replace(old_duration, session.duration)
+        self.session_unique_activities.replace(old_unique, len(session.activity_types))
+
+    def features(self) -> Dict[str, Any]:
+        """Stesse chiavi e valori di AdvancedFeatureEngineer.create_behavioral_features"""
+        if not self.events:
+            return dict(DEFAULT_BEHAVIORAL_FEATURES)
+
+        features = {f'activity_{act}_count': count for act, count in self.activity_counts.items()}
+
+        if self.has_sessions:
+            span_days = (self.last_timestamp - self.first_timestamp).days
+            features.update({
+                'avg_session_length': self.session_length.value,
+                'avg_session_duration': self.session_duration.value,
+                'sessions_per_day': len(self.sessions) / max(1, span_days),
+                'avg_unique_activities_per_session': self.session_unique_activities.value,
+            })
+
+        # Deviazione standard campionaria dei bin orari non vuoti (NaN con un solo bin, come pandas)
+        bins, total = self._hour_bins, self.events
+        mean = total / bins
+        variance = (self._hour_sum_sq - total * mean) / (bins - 1) if bins > 1 else float('nan')
+        features.update({
+            'peak_hour': self.hourly.index(max(self.hourly)),
+            'peak_day': self.daily.index(max(self.daily)),
+            'activity_concentration': math.sqrt(max(variance, 0.0)) / mean if bins > 1 else float('nan'),
+            'weekend_ratio': (self.daily[5] + self.daily[6]) / total,
+        })
+
+        if self.transition_count:
+            # max restituisce il primo massimo: a parità vince la transizione apparsa per prima
+            previous, current = max(self.transitions, key=self.transitions.get)
+            features['most_common_transition'] = f"{previous}->{current}"
+            features['transition_diversity'] = len(self.transitions) / self.transition_count
+
+        return features
+
+def _history_delta(activity_data: List[Dict[str, Any]], watermark: Tuple[Optional[datetime], Dict[str, int]],
+                   first_timestamp: Optional[datetime]) -> Optional[List[Tuple[datetime, Dict[str, Any]]]]:
+    """Eventi della cronologia non ancora applicati, in ordine di applicazione; None se va ricostruita.
+
+    watermark è (ultimo timestamp applicato, tipi degli eventi applicati con
+    quel timestamp): a parità di timestamp vengono applicati solo gli eventi
+    in più per tipo, ovunque il database li metta tra i pari merito.
+    La cronologia è ordinata (dal database: più recenti prima), quindi la
+    scansione parte dal lato più recente e si ferma al primo evento più
+    vecchio del watermark: O(eventi nuovi), non O(cronologia). Se l'evento
+    più vecchio della cronologia è più recente di first_timestamp, qualcosa
+    è uscito dalla finestra e lo stato non può toglierlo: None.
+    """
+    since, applied_at_since = watermark
+    timed = [parse_timestamp(activity_data[i].get('timestamp')) for i in (0, -1)] if activity_data else []
+    if any(timestamp is None for timestamp in timed):
+        return None
+    timed = [_utc(timestamp) for timestamp in timed]
+    oldest = min(timed) if timed else None
+    if first_timestamp is not None and (oldest is None or oldest > first_timestamp):
+        return None
+
+    ascending = bool(timed) and timed[0] < timed[1]
+    indices = range(len(activity_data) - 1, -1, -1) if ascending else range(len(activity_data))
+    newer, ties = [], []
+    for i in indices:
+        timestamp = parse_timestamp(activity_data[i].get('timestamp'))
+        if timestamp is None:
+            continue
+        timestamp = _utc(timestamp)
+        if since is not None and timestamp < since:
+            break
+        (ties if timestamp == since else newer).append((timestamp, i))
+
+    # Ordine della cronologia a parità di timestamp, come in from_activity
+    ties.sort(key=lambda item: item[1])
+    seen = dict(applied_at_since)
+    for timestamp, i in ties:
+        activity_type = activity_data[i].get('activity_type')
+        if seen.get(activity_type, 0) > 0:
+            seen[activity_type] -= 1
+        else:
+            newer.append((timestamp, i))
+    newer.sort()
+    return [(timestamp, activity_data[i]) for timestamp, i in newer]
+
+def _advance_watermark(watermark: Tuple[Optional[datetime], Dict[str, int]],
+                       applied: List[Tuple[datetime, Dict[str, Any]]]) -> Tuple[Optional[datetime], Dict[str, int]]:
+    since, types = watermark[0], dict(watermark[1])
+    for timestamp, event in applied:
+        if timestamp != since:
+            since, types = timestamp, {}
+        activity_type = event.get('activity_type')
+        types[activity_type] = types.get(activity_type, 0) + 1
+    return since, types
+
+class BehavioralStateStore:
+    """Stati per utente (LRU), costruiti dalla cronologia, aggiornati dal monitor
+    evento per evento e riallineati alla cronologia a ogni richiesta"""
+
+    def __init__(self):
+        self.enabled = os.getenv("AI_FEATURE_STATE_ENABLED", "true").lower() != "false"
+        # Ricostruzione periodica di sicurezza (attività modificate o cancellate nel database)
+        self.ttl = float(os.getenv("AI_FEATURE_STATE_TTL", "3600"))
+        # Distanza massima tra il timestamp del monitor e quello della riga nel database
+        self.match_seconds = float(os.getenv("AI_FEATURE_STATE_MATCH_SECONDS", "60"))
+        self.states = LocalLRUCache(int(os.getenv("AI_FEATURE_STATE_MAX_USERS", "10000")))
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'builds': 0, 'updates': 0, 'observed': 0, 'matched': 0, 'dropped': 0}
+
+    def features(self, user_id: str, activity_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Feature dell'utente dalla cronologia appena letta (ordinata per timestamp, in un verso o nell'altro).
+
+        Con uno stato caldo vengono applicati solo gli eventi della cronologia
+        oltre il suo watermark (quelli già visti dal monitor vengono solo
+        riconosciuti); senza stato, scaduto, con eventi usciti dalla finestra o
+        con eventi del monitor che la cronologia ha superato senza riportarli
+        lo ricostruisce da activity_data.
+        """
+        if not self.enabled:
+            return BehavioralFeatureState.from_activity(activity_data).features()
+
+        with self._lock:
+            entry = self.states.get(str(user_id))
+            if entry is not None and time.monotonic() - entry['built_at'] < self.ttl:
+                state = entry['state']
+                newer = _history_delta(activity_data, entry['watermark'], state.first_timestamp)
+                if newer is not None and self._apply_history(entry, newer) and not self._drop_unmatched(entry):
+                    self.stats['hits'] += 1
+                    return state.features()
+
+        # Costruzione fuori dal lock: O(cronologia), una volta per TTL o per uscita dalla finestra
+        state = BehavioralFeatureState.from_activity(activity_data)
+        with self._lock:
+            self.states.set(str(user_id), {
+                'state': state,
+                'built_at': time.monotonic(),
+                'watermark': (state.last_timestamp, dict(state.last_timestamp_types)),
+                # Eventi del monitor non ancora comparsi nella cronologia (_Observed)
+                'observed': [],
+            })
+            self.stats['builds'] += 1
+            return state.features()
+
+    def observe(self, user_id: str, event: Dict[str, Any]) -> bool:
+        """Applica un evento del monitor allo stato caldo dell'utente; False se non c'è nulla da aggiornare
+        o se il tipo di attività non è tra quelli della cronologia (ACTIVITY_TYPES).
+
+        L'evento resta in attesa della sua riga nel database: quando arriva
+        con la cronologia viene riconosciuto (stesso tipo, timestamp entro
+        AI_FEATURE_STATE_MATCH_SECONDS) invece di essere contato due volte.
+        Il session_id del monitor non esiste nel database: le sessioni vengono
+        solo dalla cronologia.
+        """
+        # Tipi che la cronologia non restituisce non verrebbero mai riconosciuti
+        if event.get('activity_type') not in ACTIVITY_TYPES:
+            return False
+        timestamp = parse_timestamp(event.get('timestamp'))
+        if timestamp is None:
+            return False
+        timestamp = _utc(timestamp)
+        with self._lock:
+            entry = self.states.get(str(user_id))
+            if entry is None:
+                return False
+            event = {key: value for key, value in event.items() if key != 'session_id'}
+            entry['observed'].append(_Observed(entry['state'], event.get('activity_type'), timestamp))
+            entry['state']._apply(timestamp, event)
+            self.stats['observed'] += 1
+            return True
+
+    def _apply_history(self, entry: Dict[str, Any], newer: List[Tuple[datetime, Dict[str, Any]]]) -> bool:
+        """Applica gli eventi della cronologia oltre il watermark; False se lo stato va ricostruito"""
+        state = entry['state']
+        for timestamp, event in newer:
+            observed = self._match_observed(entry, timestamp, event)
+            if observed is None:
+                state._apply(timestamp, event)
+            elif state._move_observed(observed, timestamp):
+                # Il conteggio c'è già; mancano solo le sessioni, se la cronologia le porta
+                state._apply_history_session(timestamp, event)
+                self.stats['matched'] += 1
+            else:
+                return False
+        entry['watermark'] = _advance_watermark(entry['watermark'], newer)
+        self.stats['updates'] += len(newer)
+        return True
+
+    def _match_observed(self, entry: Dict[str, Any], timestamp: datetime,
+                        event: Dict[str, Any]) -> Optional[_Observed]:
+        """Riconosce (e toglie dall'attesa) l'evento del monitor di una riga del database"""
+        for i, observed in enumerate(entry['observed']):
+            if observed.activity_type == event.get('activity_type') and \
+                    abs((timestamp - observed.timestamp).total_seconds()) <= self.match_seconds:
+                return entry['observed'].pop(i)
+        return None
+
+    def _drop_unmatched(self, entry: Dict[str, Any]) -> bool:
+        """True se la cronologia ha superato eventi del monitor senza riportarli: lo stato li conta
+        ma create_behavioral_features no, e non potendoli togliere va ricostruito dalla cronologia"""
+        since = entry['watermark'][0]
+        if since is None:
+            return False
+        unmatched = sum(1 for observed in entry['observed']
+                        if (since - observed.timestamp).total_seconds() > self.match_seconds)
+        self.stats['dropped'] += unmatched
+        return unmatched > 0
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self.states.delete(str(user_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'enabled': self.enabled, 'users': len(self.states), 'ttl_seconds': self.ttl, **self.stats}
+
+# Istanza globale condivisa da engine, monitor ed endpoint di sistema
+behavioral_states = BehavioralStateStore()
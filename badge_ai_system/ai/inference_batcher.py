@@ -0,0 +1,116 @@
+"""
+MICRO-BATCHING PER L'INFERENZA DEI MODELLI DEEP
+===============================================
+
+Raccoglie le richieste concorrenti di predizione e le esegue con un solo
+forward pass per modello:
+
+├── Flush dopo max_wait_ms dal primo elemento o a max_batch_size elementi
+├── Forward eseguito sul ComputeExecutor (fuori dall'event loop)
+├── Risultati restituiti a ciascuna coroutine in attesa
+└── Metriche: batch eseguiti, dimensione media, latenza del forward
+
+Configurazione: AI_BATCH_MAX_SIZE=N, AI_BATCH_MAX_WAIT_MS=ms
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.metrics import LatencyHistogram
+from ai.compute_executor import ComputeExecutor, compute_executor
+
+logger = logging.getLogger(__name__)
+
+BatchForward = Callable[[List[Any]], Sequence[Any]]
+
+class MicroBatcher:
+    """Accorpa le chiamate concorrenti a submit() in un'unica chiamata a forward"""
+
+    def __init__(self, forward: BatchForward, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None, compute: Optional[ComputeExecutor] = None,
+                 label: str = "batch"):
+        self.forward = forward
+        self.max_batch_size = max_batch_size or int(os.getenv("AI_BATCH_MAX_SIZE", "32"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("AI_BATCH_MAX_WAIT_MS", "5"))) / 1000
+        self.compute = compute or compute_executor
+        self.label = label
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.largest_batch = 0
+        self.forward_latency = LatencyHistogram()
+
+    async def submit(self, item: Any) -> Any:
+        """Accoda un elemento e attende il suo risultato dal prossimo batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        started = time.perf_counter()
+
+        try:
+            results = await self.compute.run(self.forward, items, label=self.label)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.label}: forward returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Batched inference '{self.label}' failed for {len(items)} items: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.forward_latency.observe(time.perf_counter() - started)
+
+        self.batches += 1
+        self.items += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+
+        # Le coroutine cancellate nel frattempo hanno già il future chiuso
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Batch eseguiti, dimensione media e latenza del forward"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batches,
+            'items': self.items,
+            'errors': self.errors,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'pending': len(self._pending),
+            'forward': self.forward_latency.snapshot()
+        }
@@ -0,0 +1,163 @@
+"""
+EXPORT DEI MODELLI DEEP PER L'INFERENZA CPU
+===========================================
+
+Produce artefatti ottimizzati per il serving di LSTMPredictor e
+TransformerPredictor a partire dai modelli eager float32:
+
+├── torchscript: modello tracciato (float32, senza overhead Python)
+├── int8: quantizzazione dinamica di Linear/LSTM + TorchScript
+├── Parità: confronto con il modello eager su un batch di riferimento
+└── Manifest: errore, tolleranza, tempi e dimensione di ogni artefatto
+
+Il serving sceglie il backend con AI_INFERENCE_BACKEND=eager|torchscript|int8;
+artefatti mancanti o che non superano la parità ricadono sul modello eager.
+"""
+
+import os
+import copy
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_BACKENDS = ("eager", "torchscript", "int8")
+MANIFEST_FILE = "inference_manifest.json"
+
+# Errore massimo relativo ammesso rispetto al modello eager
+PARITY_TOLERANCE = {
+    "torchscript": float(os.getenv("AI_PARITY_TOLERANCE_TORCHSCRIPT", "1e-4")),
+    "int8": float(os.getenv("AI_PARITY_TOLERANCE_INT8", "0.05")),
+}
+
+def inference_backend() -> str:
+    """Backend di inferenza configurato (default: eager)"""
+    backend = os.getenv("AI_INFERENCE_BACKEND", "eager").lower()
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Available: {INFERENCE_BACKENDS}")
+    return backend
+
+def artifact_path(models_path: str, name: str, backend: str) -> str:
+    return os.path.join(models_path, f"{name}.{backend}.pt")
+
+def reference_batch(input_size: int, batch_size: int = 64, seed: int = 0) -> torch.Tensor:
+    """Batch deterministico (batch, seq=1, feature) usato per tracing e parità"""
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(batch_size, 1, input_size, generator=generator)
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    """Copia del modello con Linear e LSTM quantizzati dinamicamente a int8"""
+    return torch.ao.quantization.quantize_dynamic(
+        copy.deepcopy(model).eval(), {nn.Linear, nn.LSTM}, dtype=torch.qint8
+    )
+
+def trace(model: nn.Module, example: torch.Tensor) -> torch.jit.ScriptModule:
+    with torch.no_grad():
+        return torch.jit.trace(model.eval(), example, check_trace=False)
+
+def _timed_forward(model: nn.Module, batch: torch.Tensor, repeats: int = 5) -> Tuple[torch.Tensor, float]:
+    """Output e tempo medio (ms) di un forward sul batch"""
+    with torch.no_grad():
+        output = model(batch)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            model(batch)
+    return output, (time.perf_counter() - started) * 1000 / repeats
+
+def check_parity(reference: nn.Module, candidate: nn.Module, batch: torch.Tensor,
+                 tolerance: float) -> Dict[str, Any]:
+    """Confronta le uscite del candidato con quelle del modello eager"""
+    reference.eval()
+    expected, reference_ms = _timed_forward(reference, batch)
+    actual, candidate_ms = _timed_forward(candidate, batch)
+
+    max_abs_error = float((expected - actual).abs().max())
+    scale = max(1.0, float(expected.abs().max()))
+    return {
+        'max_abs_error': max_abs_error,
+        'relative_error': max_abs_error / scale,
+        'tolerance': tolerance,
+        'passed': max_abs_error / scale <= tolerance,
+        'eager_ms': round(reference_ms, 3),
+        'exported_ms': round(candidate_ms, 3),
+    }
+
+def export_model(name: str, model: nn.Module, input_size: int, models_path: str) -> Dict[str, Any]:
+    """Esporta un modello in tutti i backend e ne verifica la parità"""
+    batch = reference_batch(input_size)
+    example = batch[:1]
+    candidates = {
+        "torchscript": lambda: trace(model, example),
+        "int8": lambda: trace(quantize_dynamic_int8(model), example),
+    }
+
+    report = {}
+    for backend, build in candidates.items():
+        path = artifact_path(models_path, name, backend)
+        try:
+            exported = build()
+            parity = check_parity(model, exported, batch, PARITY_TOLERANCE[backend])
+            torch.jit.save(exported, path)
+            report[backend] = {
+                **parity,
+                'file': os.path.basename(path),
+                'size_bytes': os.path.getsize(path),
+                'exported_at': datetime.utcnow().isoformat(),
+            }
+            level = logging.INFO if parity['passed'] else logging.WARNING
+            logger.log(level, f"Exported {name} ({backend}): relative error {parity['relative_error']:.2e}, "
+                              f"{parity['eager_ms']}ms -> {parity['exported_ms']}ms per batch")
+        except Exception as e:
+            logger.warning(f"Export of {name} ({backend}) failed: {e}")
+            report[backend] = {'passed': False, 'error': str(e)}
+
+    return report
+
+def export_deep_models(models: Dict[str, nn.Module], input_size: int, models_path: str) -> Dict[str, Any]:
+    """Esporta i modelli deep e aggiorna il manifest degli artefatti"""
+    os.makedirs(models_path, exist_ok=True)
+    manifest = read_manifest(models_path)
+    for name, model in models.items():
+        if model is not None:
+            manifest[name] = export_model(name, model, input_size, models_path)
+
+    tmp_path = os.path.join(models_path, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(models_path, MANIFEST_FILE))
+    return manifest
+
+def read_manifest(models_path: str) -> Dict[str, Any]:
+    path = os.path.join(models_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def load_inference_model(name: str, eager_model: nn.Module, models_path: str,
+                         backend: Optional[str] = None) -> Tuple[nn.Module, str]:
+    """Modello da usare in serving e backend effettivo (eager se l'artefatto non è utilizzabile)"""
+    backend = backend or inference_backend()
+    if backend == "eager":
+        return eager_model, "eager"
+
+    entry = read_manifest(models_path).get(name, {}).get(backend)
+    path = artifact_path(models_path, name, backend)
+    if not entry or not entry.get('passed') or not os.path.exists(path):
+        logger.warning(f"No validated {backend} artifact for {name}, serving the eager model")
+        return eager_model, "eager"
+
+    try:
+        model = torch.jit.load(path, map_location="cpu")
+        model.eval()
+        logger.info(f"✅ Serving {name} from {backend} artifact")
+        return model, backend
+    except Exception as e:
+        logger.warning(f"Could not load {backend} artifact for {name}: {e}")
+        return eager_model, "eager"
@@ -0,0 +1,195 @@
+"""
+REGISTRO VERSIONATO DEI MODELLI
+===============================
+
+Sostituisce i file sciolti in ai/models con versioni immutabili:
+
+├── registry/<versione>/: artefatti + manifest.json con sha256 e dimensioni
+├── registry/CURRENT: puntatore alla versione attiva, aggiornato atomicamente
+├── Caricamento memory-mapped (joblib mmap_mode, torch mmap): i worker
+│   condividono le pagine dei pesi tramite la page cache del sistema
+└── ModelBundle: snapshot immutabile di una versione; ogni richiesta usa
+    quello attivo al suo inizio (contextvar), le nuove passano al successivo
+
+Pubblicare una versione non tocca quella in uso: i worker la adottano al
+prossimo reload. L'unica fonte di verità è CURRENT: anche il pin/rollback
+dall'endpoint di amministrazione sposta CURRENT, e ogni worker converge
+tramite il polling.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import contextvars
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+# Nome generato da publish(): solo cifre e lettere fisse, mai separatori di percorso
+VERSION_PATTERN = re.compile(r"\d{8}T\d{6}\d+Z")
+
+class ModelIntegrityError(Exception):
+    """Artefatto mancante o con checksum diverso dal manifest"""
+
+class UnknownModelVersion(ModelIntegrityError):
+    """Versione malformata o non pubblicata nel registro"""
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Snapshot dei modelli di una versione del registro"""
+    version: Optional[str]
+    models: Dict[str, Any] = field(default_factory=dict)
+    serving: Dict[str, Any] = field(default_factory=dict)
+    backends: Dict[str, Any] = field(default_factory=dict)
+    load_ms: Dict[str, float] = field(default_factory=dict)
+    loaded_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    schema_version: Optional[str] = None
+
+    def get(self, name: str) -> Any:
+        """Modello di serving se presente, altrimenti quello eager"""
+        model = self.serving.get(name)
+        return model if model is not None else self.models.get(name)
+
+# Bundle fissato per la richiesta corrente (copiato nei thread dal ComputeExecutor)
+current_bundle: contextvars.ContextVar[Optional[ModelBundle]] = contextvars.ContextVar(
+    "current_model_bundle", default=None
+)
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class ModelRegistry:
+    """Versioni immutabili di artefatti con manifest e puntatore atomico"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("MODEL_REGISTRY_PATH", os.path.join("ai", "models", "registry"))
+
+    def version_path(self, version: str) -> str:
+        if not isinstance(version, str) or not VERSION_PATTERN.fullmatch(version):
+            raise UnknownModelVersion(f"Invalid model version {version!r}")
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        """Versioni pubblicate, dalla più vecchia alla più recente"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if VERSION_PATTERN.fullmatch(name) and os.path.exists(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def check_version(self, version: str) -> str:
+        """Accetta solo versioni pubblicate: il nome è validato prima di costruire qualsiasi percorso"""
+        if not isinstance(version, str) or not VERSION_PATTERN.fullmatch(version) or version not in self.versions():
+            raise UnknownModelVersion(f"Model version {version!r} is not published")
+        return version
+
+    def current_version(self) -> Optional[str]:
+        path = os.path.join(self.root, CURRENT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip() or None
+
+    def manifest(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self.version_path(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def publish(self, write: Callable[[str], None], metadata: Optional[Dict[str, Any]] = None,
+                activate: bool = True) -> str:
+        """Scrive una nuova versione in staging, ne calcola i checksum e la pubblica.
+
+        write riceve la directory di staging e vi salva gli artefatti; la versione
+        diventa visibile solo a manifest completo (rename atomico della directory).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        staging = os.path.join(self.root, f".staging-{version}")
+        os.makedirs(staging)
+
+        try:
+            write(staging)
+            artifacts = {
+                name: {'sha256': file_sha256(os.path.join(staging, name)),
+                       'size_bytes': os.path.getsize(os.path.join(staging, name))}
+                for name in sorted(os.listdir(staging))
+            }
+            manifest = {
+                'version': version,
+                'created_at': datetime.utcnow().isoformat(),
+                'artifacts': artifacts,
+                **(metadata or {})
+            }
+            _write_atomic(os.path.join(staging, MANIFEST_FILE), json.dumps(manifest, indent=2))
+            os.rename(staging, self.version_path(version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info(f"✅ Published model version {version} ({len(artifacts)} artifacts)")
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        """Sposta atomicamente il puntatore CURRENT su una versione pubblicata"""
+        self.check_version(version)
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), version)
+        logger.info(f"Model version {version} is now current")
+
+    def verify(self, version: str) -> Dict[str, Any]:
+        """Controlla presenza e sha256 di ogni artefatto; restituisce il manifest"""
+        manifest = self.manifest(version)
+        directory = self.version_path(version)
+        for name, expected in manifest['artifacts'].items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                raise ModelIntegrityError(f"{version}/{name} is missing")
+            if file_sha256(path) != expected['sha256']:
+                raise ModelIntegrityError(f"{version}/{name} does not match its checksum")
+        return manifest
+
+    def prune(self, keep: int = 3) -> List[str]:
+        """Rimuove le versioni più vecchie, mai quella corrente"""
+        current = self.current_version()
+        candidates = [v for v in self.versions() if v != current]
+        removable = candidates[:max(0, len(candidates) - keep)]
+        for version in removable:
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+        return removable
+
+def load_joblib_mmap(path: str) -> Any:
+    """joblib.load con gli array numpy mappati in memoria (sola lettura)"""
+    import joblib
+    return joblib.load(path, mmap_mode="r")
+
+def load_state_dict_mmap(model, path: str):
+    """Carica i pesi mappando il file in memoria invece di copiarli"""
+    import torch
+    try:
+        state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, assign=True)
+    except TypeError:
+        # torch < 2.1: niente mmap/assign, caricamento tradizionale
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+    model.eval()
+    return model
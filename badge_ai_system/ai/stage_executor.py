@@ -0,0 +1,66 @@
+"""
+ESECUTORE DEGLI STADI DI ANALISI
+================================
+
+Esegue gli stadi del grafo di analisi con un timeout per stadio:
+gli stadi sincroni (pandas, torch, sklearn) passano dal ComputeExecutor,
+quelli asincroni (query al database) girano sull'event loop.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+from ai.analysis_graph import AnalysisNode, run_inline
+from ai.compute_executor import ComputeExecutor, compute_executor
+from app.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+class StageExecutor:
+    """Runner per AnalysisGraph.evaluate con timeout per stadio"""
+
+    def __init__(self, compute: Optional[ComputeExecutor] = None, default_timeout: Optional[float] = None):
+        self.compute = compute or compute_executor
+        self.default_timeout = default_timeout if default_timeout is not None else float(os.getenv("AI_STAGE_TIMEOUT", "10"))
+        self.stage_latency: Dict[str, LatencyHistogram] = {}
+        self.stage_outcomes: Dict[str, Dict[str, int]] = {}
+
+    async def __call__(self, node: AnalysisNode, inputs: Dict[str, Any]) -> Any:
+        """Esegue uno stadio; solleva asyncio.TimeoutError oltre il suo timeout"""
+        timeout = node.timeout if node.timeout is not None else self.default_timeout
+        started = time.perf_counter()
+        outcome = 'ok'
+
+        try:
+            if node.blocking:
+                # Allo scadere il worker non può essere interrotto: il risultato viene scartato
+                work = self.compute.run(node.builder, label=f"stage:{node.name}", **inputs)
+            else:
+                work = run_inline(node, inputs)
+            return await asyncio.wait_for(work, timeout=timeout)
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            raise
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self._record(node.name, time.perf_counter() - started, outcome)
+
+    def _record(self, stage: str, seconds: float, outcome: str):
+        self.stage_latency.setdefault(stage, LatencyHistogram()).observe(seconds)
+        outcomes = self.stage_outcomes.setdefault(stage, {'ok': 0, 'timeout': 0, 'error': 0})
+        outcomes[outcome] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Latenza ed esiti per stadio"""
+        return {
+            'default_timeout_seconds': self.default_timeout,
+            'stages': {
+                stage: {'latency': histogram.snapshot(), 'outcomes': dict(self.stage_outcomes.get(stage, {}))}
+                for stage, histogram in sorted(self.stage_latency.items())
+            }
+        }
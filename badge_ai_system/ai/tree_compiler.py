@@ -0,0 +1,177 @@
+"""
+BACKEND COMPILATO PER GLI ENSEMBLE AD ALBERI
+============================================
+
+Sostituisce il predict generico di ogni libreria (validazione, conversioni
+DataFrame, wrapper sklearn) con predittori diretti su matrici float32:
+
+├── library: predict_proba/predict delle librerie (comportamento originale)
+├── inplace: booster nativi (xgboost inplace_predict, lightgbm Booster,
+│   catboost/sklearn su float32 contigui), selezione feature per indici
+├── treelite: alberi compilati in una libreria nativa (tl2cgen) per
+│   xgboost, lightgbm e foreste sklearn; catboost resta inplace
+└── Parità: ogni membro compilato deve riprodurre la libreria (uscite
+    riportate alla forma di predict_proba), altrimenti torna al predict
+    della libreria
+
+Configurazione: AI_TREE_BACKEND=library|inplace|treelite (default inplace)
+"""
+
+import os
+import logging
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TREE_BACKENDS = ("library", "inplace", "treelite")
+
+# Errore assoluto massimo rispetto al predict della libreria
+TREE_PARITY_TOLERANCE = {
+    "inplace": float(os.getenv("AI_TREE_PARITY_TOLERANCE_INPLACE", "1e-5")),
+    # Soglie e foglie in float32 nella libreria compilata
+    "treelite": float(os.getenv("AI_TREE_PARITY_TOLERANCE_TREELITE", "1e-3")),
+}
+
+# Membri che treelite sa importare
+TREELITE_MEMBERS = ("xgboost", "lightgbm", "random_forest", "extra_trees", "gradient_boosting")
+
+def tree_backend() -> str:
+    """Backend configurato per gli alberi dell'ensemble (default: inplace)"""
+    backend = os.getenv("AI_TREE_BACKEND", "inplace").lower()
+    if backend not in TREE_BACKENDS:
+        raise ValueError(f"Unknown tree backend: {backend}. Available: {TREE_BACKENDS}")
+    return backend
+
+def library_predict(model) -> Callable[[np.ndarray], np.ndarray]:
+    """Predict generico della libreria (probabilità se disponibili)"""
+    return model.predict_proba if hasattr(model, 'predict_proba') else model.predict
+
+def inplace_predict(name: str, model) -> Callable[[np.ndarray], np.ndarray]:
+    """Predittore diretto sul booster nativo, senza il wrapper sklearn"""
+    if name == 'xgboost':
+        booster = model.get_booster()
+        return lambda X: booster.inplace_predict(X)
+    if name == 'lightgbm':
+        booster = model.booster_
+        return lambda X: booster.predict(X)
+    if name == 'catboost':
+        return lambda X: model.predict(X, prediction_type='Probability')
+    # Foreste sklearn: float32 contiguo evita la copia in check_array
+    return library_predict(model)
+
+def treelite_artifact_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.trees.so")
+
+def export_treelite(name: str, model, directory: str) -> str:
+    """Compila gli alberi di un membro in una libreria nativa nella directory della versione"""
+    import treelite
+    import tl2cgen
+
+    if name == 'xgboost':
+        compiled = treelite.frontend.from_xgboost(model.get_booster())
+    elif name == 'lightgbm':
+        compiled = treelite.frontend.from_lightgbm(model.booster_)
+    elif name in TREELITE_MEMBERS:
+        compiled = treelite.sklearn.import_model(model)
+    else:
+        raise ValueError(f"treelite cannot import {name}")
+
+    path = treelite_artifact_path(directory, name)
+    tl2cgen.export_lib(compiled, toolchain="gcc", libpath=path, params={'parallel_comp': os.cpu_count() or 1})
+    return path
+
+def treelite_predict(path: str, threads: int) -> Callable[[np.ndarray], np.ndarray]:
+    import tl2cgen
+
+    predictor = tl2cgen.Predictor(path, nthread=threads)
+
+    def predict(X: np.ndarray) -> np.ndarray:
+        output = predictor.predict(tl2cgen.DMatrix(X, dtype="float32"))
+        return output.reshape(len(X), -1)
+
+    return predict
+
+def _squeeze(output: np.ndarray) -> np.ndarray:
+    """Uscite a una colonna come vettore, come il predict dei regressori"""
+    output = np.asarray(output)
+    return output[:, 0] if output.ndim == 2 and output.shape[1] == 1 else output
+
+def _like_library(predict: Callable[[np.ndarray], np.ndarray], columns: int) -> Callable[[np.ndarray], np.ndarray]:
+    """Uscite nella forma della libreria: i booster binari danno (n,) probabilità
+    della classe positiva dove predict_proba dà (n, 2)"""
+    def predict_like_library(X: np.ndarray) -> np.ndarray:
+        output = _squeeze(predict(X))
+        if output.ndim == 1 and columns == 2:
+            return np.column_stack([1.0 - output, output])
+        return output
+
+    return predict_like_library
+
+class CompiledEnsemble:
+    """Predittori per membro su una matrice float32 già selezionata"""
+
+    def __init__(self, feature_names: Optional[Sequence[str]], feature_index: np.ndarray,
+                 members: Dict[str, Callable[[np.ndarray], np.ndarray]], backends: Dict[str, str]):
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.feature_index = feature_index
+        self.members = members
+        self.backends = backends
+
+    def select(self, X: Any) -> np.ndarray:
+        """Feature selezionate come float32 C-contigui (per nome da un DataFrame, per indice da un array)"""
+        if self.feature_names is not None and hasattr(X, 'columns'):
+            X = X[self.feature_names].to_numpy(dtype=np.float32)
+        else:
+            X = np.asarray(X, dtype=np.float32)[:, self.feature_index]
+        return np.ascontiguousarray(X)
+
+    def predict_member(self, name: str, X: np.ndarray) -> np.ndarray:
+        return _squeeze(self.members[name](X))
+
+def compile_ensemble(feature_selector, base_models: Dict[str, Any], reference: np.ndarray,
+                     threads: Dict[str, int], backend: Optional[str] = None,
+                     directory: Optional[str] = None) -> Optional[CompiledEnsemble]:
+    """Costruisce i predittori compilati e ne verifica la parità su righe di riferimento.
+
+    I membri che non superano la parità (o che il backend non supporta) usano
+    il predict della libreria: le predizioni non cambiano, solo il costo.
+    """
+    backend = backend or tree_backend()
+    if backend == "library":
+        return None
+
+    reference = np.ascontiguousarray(reference, dtype=np.float32)
+    members, backends = {}, {}
+    for name, model in base_models.items():
+        candidates = []
+        path = treelite_artifact_path(directory, name) if directory else None
+        if backend == "treelite" and path and os.path.exists(path):
+            candidates.append(("treelite", lambda: treelite_predict(path, threads.get(name, 1))))
+        candidates.append(("inplace", lambda: inplace_predict(name, model)))
+
+        members[name], backends[name] = library_predict(model), "library"
+        expected = _squeeze(library_predict(model)(reference))
+        columns = expected.shape[1] if expected.ndim == 2 else 1
+        for candidate, build in candidates:
+            try:
+                predict = _like_library(build(), columns)
+                error = float(np.max(np.abs(predict(reference) - expected)))
+            except Exception as e:
+                logger.warning(f"Compiled {candidate} predictor for {name} unavailable: {e}")
+                continue
+            if error <= TREE_PARITY_TOLERANCE[candidate]:
+                members[name], backends[name] = predict, candidate
+                break
+            logger.warning(f"{candidate} predictor for {name} failed parity (max error {error:.2e})")
+
+    names_in = getattr(feature_selector, 'feature_names_in_', None)
+    compiled = CompiledEnsemble(
+        feature_names=feature_selector.get_feature_names_out() if names_in is not None else None,
+        feature_index=feature_selector.get_support(indices=True),
+        members=members,
+        backends=backends,
+    )
+    logger.info(f"✅ Tree ensemble compiled: {backends}")
+    return compiled
@@ -4,15 +4,92 @@ Supports both Supabase (primary) and PostgreSQL (fallback)
 """
 
 import os
+import json
+import time
+import uuid
+import asyncio
 import asyncpg
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Iterable, Tuple
 from contextlib import asynccontextmanager
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from supabase import create_client, Client
 
+from app.metrics import QueryMetrics
+from app.query_builder import translate_select
+
+try:
+    # Async client (supabase-py >= 2.4): pooled keep-alive httpx.AsyncClient under the hood
+    from supabase import acreate_client
+except ImportError:
+    acreate_client = None
+
 logger = logging.getLogger(__name__)
 
+# Hot PostgreSQL statements, prepared once on every pooled connection
+NAMED_QUERIES: Dict[str, str] = {}
+
+# A missing RPC is retried after this long (e.g. once its migration has been deployed)
+RPC_RETRY_SECONDS = float(os.getenv("SUPABASE_RPC_RETRY_SECONDS", "300"))
+
+# Rows per PostgREST request when paging a table; must not exceed the server's max-rows
+# (1000 by default), otherwise a truncated page looks like the last one
+SUPABASE_PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+
+# PostgREST answers for a function that is not deployed (PGRST202 / 404) or that the
+# key may not execute (42501 insufficient_privilege / 401 / 403): retrying will not help
+UNAVAILABLE_RPC_CODES = ('PGRST202', '404', '42501', '401', '403')
+
+def _is_missing_rpc(error: Exception) -> bool:
+    """The RPC cannot be called with this deployment and key, rather than failing transiently"""
+    code = str(getattr(error, 'code', '') or '')
+    return code in UNAVAILABLE_RPC_CODES or any(code in str(error) for code in ('PGRST202', '42501'))
+
+# Triggers that keep user_activity_counters current (scripts/047, init-db.sql)
+ACTIVITY_COUNTER_TRIGGERS = (
+    'trigger_count_quiz_attempts', 'trigger_count_forum_comments',
+    'trigger_count_materials', 'trigger_count_forum_discussions',
+)
+
+def register_named_query(name: str, sql: str) -> str:
+    """Register a SQL statement under a name so the pool prepares it per connection"""
+    NAMED_QUERIES[name] = sql
+    return sql
+
+class PreparedConnection(asyncpg.Connection):
+    """asyncpg connection that keeps the registered named statements prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._named_statements: Dict[str, Any] = {}
+
+    async def prepare_named_queries(self):
+        """Prepare every registered statement (pool init hook)"""
+        for name in NAMED_QUERIES:
+            try:
+                await self.named_statement(name)
+            except Exception as e:
+                # Leave it to be prepared lazily; the failure resurfaces on first use
+                logger.warning(f"⚠️ Could not prepare named query '{name}': {e}")
+
+    async def named_statement(self, name: str):
+        """Prepared statement for a registered query, prepared on first use"""
+        statement = self._named_statements.get(name)
+        if statement is None:
+            statement = await self.prepare(NAMED_QUERIES[name])
+            self._named_statements[name] = statement
+        return statement
+
+    def forget_named_statement(self, name: str):
+        """Drop a cached statement so it is re-prepared (e.g. after a schema change)"""
+        self._named_statements.pop(name, None)
+
+async def _init_pool_connection(conn: PreparedConnection):
+    # jsonb as Python values, like PostgREST's JSON on the Supabase path (set before preparing)
+    await conn.set_type_codec('jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+    await conn.prepare_named_queries()
+
 class DatabaseManager:
     """Unified database manager supporting Supabase and PostgreSQL"""
 
@@ -20,8 +97,20 @@ class DatabaseManager:
         self.supabase: Optional[Client] = None
         self.pool: Optional[asyncpg.Pool] = None
         self.use_supabase = bool(os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_ANON_KEY"))
+        # RPCs found missing are skipped until this monotonic time, then tried again
+        self._rpc_disabled_until: Dict[str, float] = {}
+        # user_activity_counters is only read where the 047 triggers keep it current
+        self.activity_counters_maintained = False
+        self.metrics = QueryMetrics()
         self._connection_string = self._build_connection_string()
 
+        # Supabase requests never run on the event loop: either the async client awaits them,
+        # or they are handed to a dedicated thread pool. Both paths share one concurrency limit.
+        self.supabase_max_concurrency = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "10"))
+        self._supabase_is_async = False
+        self._supabase_semaphore: Optional[asyncio.Semaphore] = None
+        self._supabase_executor: Optional[ThreadPoolExecutor] = None
+
     def _build_connection_string(self) -> str:
         """Build PostgreSQL connection string from environment variables"""
         host = os.getenv("DB_HOST", "localhost")
@@ -41,10 +130,20 @@ class DatabaseManager:
                 supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY")
 
                 logger.info(f"🔗 Connecting to Supabase with {'service role' if os.getenv('SUPABASE_SERVICE_ROLE_KEY') else 'anon'} key")
-                self.supabase = create_client(supabase_url, supabase_key)
+                self._supabase_semaphore = asyncio.Semaphore(self.supabase_max_concurrency)
+                if acreate_client is not None:
+                    self.supabase = await acreate_client(supabase_url, supabase_key)
+                    self._supabase_is_async = True
+                else:
+                    logger.warning("⚠️ Async Supabase client not available - using a dedicated thread pool")
+                    self.supabase = create_client(supabase_url, supabase_key)
+                    self._supabase_executor = ThreadPoolExecutor(
+                        max_workers=self.supabase_max_concurrency,
+                        thread_name_prefix="supabase"
+                    )
 
                 # Test the connection immediately
-                test_result = self.supabase.table('users').select('count').limit(1).execute()
+                await self.supabase_execute(self.supabase.table('users').select('count').limit(1))
                 logger.info("✅ Connected to Supabase (main site database) - connection test successful")
                 return
             except Exception as e:
@@ -60,40 +159,142 @@ class DatabaseManager:
                 self._connection_string,
                 min_size=5,
                 max_size=20,
-                command_timeout=60
+                command_timeout=60,
+                connection_class=PreparedConnection,
+                init=_init_pool_connection
             )
             logger.info("✅ Connected to PostgreSQL (fallback)")
         except Exception as e:
             logger.error(f"❌ Failed to connect to PostgreSQL: {e}")
             raise
 
+        await self._detect_activity_counters()
+
+    async def _detect_activity_counters(self):
+        """Use the counters table only if every activity table has its counting trigger"""
+        try:
+            async with self.acquire() as conn:
+                rows = await conn.fetch(
+                    "SELECT tgname FROM pg_trigger WHERE tgname = ANY($1::text[]) AND NOT tgisinternal",
+                    list(ACTIVITY_COUNTER_TRIGGERS)
+                )
+            self.activity_counters_maintained = {row['tgname'] for row in rows} >= set(ACTIVITY_COUNTER_TRIGGERS)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not check activity counter triggers: {e}")
+            self.activity_counters_maintained = False
+
+        if not self.activity_counters_maintained:
+            logger.warning("⚠️ user_activity_counters triggers not installed, counting activity per query "
+                           "(run scripts/047_ai_user_activity_counters.sql or init-db.sql to enable them)")
+
+    def rpc_available(self, name: str) -> bool:
+        return time.monotonic() >= self._rpc_disabled_until.get(name, 0.0)
+
+    def rpc_failed(self, name: str, error: Exception, fallback: str):
+        """Skip a missing or forbidden RPC for a while; timeouts, resets and 5xx only fall back for the failed call.
+
+        The switch to the fallback is logged once, not on every retry or fallback call.
+        """
+        if _is_missing_rpc(error):
+            log = logger.debug if name in self._rpc_disabled_until else logger.warning
+            self._rpc_disabled_until[name] = time.monotonic() + RPC_RETRY_SECONDS
+            log(f"⚠️ {name} RPC not deployed or not granted, {fallback} "
+                f"(retrying every {RPC_RETRY_SECONDS:.0f}s): {error}")
+        else:
+            logger.warning(f"⚠️ {name} RPC failed, falling back for this call: {error}")
+
     async def disconnect(self):
         """Close database connections"""
         if self.supabase:
-            # Supabase client doesn't need explicit closing
+            if self._supabase_is_async:
+                try:
+                    await self.supabase.postgrest.aclose()
+                except Exception as e:
+                    logger.debug(f"Supabase HTTP client close failed: {e}")
             self.supabase = None
             logger.info("🔌 Supabase connection closed")
 
+        if self._supabase_executor:
+            self._supabase_executor.shutdown(wait=False)
+            self._supabase_executor = None
+
         if self.pool:
             await self.pool.close()
             logger.info("🔌 PostgreSQL connection pool closed")
 
+    async def supabase_execute(self, request):
+        """Execute a Supabase/PostgREST request builder without blocking the event loop"""
+        if self.supabase is None:
+            raise RuntimeError("Supabase connection configured but unavailable. Check credentials and network.")
+
+        async with self._supabase_semaphore:
+            if self._supabase_is_async:
+                return await request.execute()
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._supabase_executor, request.execute)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Acquire a pooled PostgreSQL connection, recording wait time and acquire/release counts"""
+        if not self.pool:
+            raise RuntimeError("No database connection available")
+
+        wait_started = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            self.metrics.record_acquire(time.perf_counter() - wait_started)
+            try:
+                yield conn
+            finally:
+                self.metrics.record_release()
+
+    async def fetch_named(self, name: str, *args) -> List[Dict[str, Any]]:
+        """Execute a registered named statement on PostgreSQL, recording latency and row count"""
+        async with self.acquire() as conn:
+            return await self.fetch_named_on(conn, name, *args)
+
+    async def fetch_named_on(self, conn: PreparedConnection, name: str, *args) -> List[Dict[str, Any]]:
+        """Execute a registered named statement on an already acquired connection (e.g. inside a transaction)"""
+        started = time.perf_counter()
+        try:
+            statement = await conn.named_statement(name)
+            rows = await statement.fetch(*args)
+        except Exception as e:
+            self.metrics.record_error(name)
+            conn.forget_named_statement(name)
+            logger.error(f"PostgreSQL named query '{name}' failed: {e}")
+            raise
+
+        self.metrics.observe_query(name, time.perf_counter() - started, len(rows))
+        return [dict(row) for row in rows]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Named query latency/row histograms plus pool usage"""
+        metrics = self.metrics.snapshot()
+        metrics['named_queries'] = sorted(NAMED_QUERIES)
+        if self.pool:
+            metrics['pool'].update({
+                'size': self.pool.get_size(),
+                'idle': self.pool.get_idle_size(),
+                'min_size': self.pool.get_min_size(),
+                'max_size': self.pool.get_max_size()
+            })
+        return metrics
+
     async def execute_query(self, query: str, *args, table: str = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results"""
         if self.use_supabase and table:
+            # Push the SQL down to PostgREST; untranslatable queries raise QueryTranslationError
+            request = translate_select(query, args, table=table)
             try:
-                # Convert SQL query to Supabase query
-                result = self.supabase.table(table).select("*").execute()
-                return result.data
+                result = await self.supabase_execute(request.build(self.supabase))
+                return request.rows(result)
             except Exception as e:
                 logger.error(f"Supabase query failed: {e}")
                 raise
 
         # PostgreSQL fallback
-        if not self.pool:
-            raise RuntimeError("No database connection available")
-
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             try:
                 rows = await conn.fetch(query, *args)
                 return [dict(row) for row in rows]
@@ -106,17 +307,14 @@ class DatabaseManager:
         if self.use_supabase and table and data:
             try:
                 # Use Supabase client for mutations
-                result = self.supabase.table(table).insert(data).execute()
+                await self.supabase_execute(self.supabase.table(table).insert(data))
                 return "INSERT 1"
             except Exception as e:
                 logger.error(f"Supabase command failed: {e}")
                 raise
 
         # PostgreSQL fallback
-        if not self.pool:
-            raise RuntimeError("No database connection available")
-
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             try:
                 result = await conn.execute(command, *args)
                 return result
@@ -152,13 +350,89 @@ async def get_db():
     if not db_manager.pool:
         raise RuntimeError("Database not initialized - running in offline mode")
 
-    async with db_manager.get_connection() as conn:
+    async with db_manager.acquire() as conn:
         yield conn
 
 # User data queries
+USER_STATS_RPC = 'get_user_stats_many'
+USER_COUNTER_SOURCES = {
+    # result key -> (table, user column)
+    'total_quizzes': ('quiz_attempts', 'user_id'),
+    'total_comments': ('forum_comments', 'user_id'),  # forum_comments, not exercise_comments
+    'total_materials': ('materials', 'uploaded_by'),
+    'total_discussions': ('forum_discussions', 'user_id'),
+}
+
+def _mock_user_stats(user_id: str) -> Dict[str, Any]:
+    """Mock statistics used in offline mode"""
+    return {
+        'id': user_id,
+        'xp_points': 100,
+        'level': 2,
+        'total_active_days': 10,
+        'consecutive_active_days': 3,
+        'total_quizzes': 5,
+        'total_comments': 8,
+        'total_materials': 2,
+        'total_discussions': 1
+    }
+
+def _build_user_stats(user: Dict[str, Any], counters: Dict[str, int]) -> Dict[str, Any]:
+    """Merge a users row with its activity counters"""
+    return {
+        'id': user['id'],
+        'level': user.get('level', 1),
+        'xp_points': user.get('xp_points', 0),
+        'total_active_days': user.get('total_active_days', 0),
+        'consecutive_active_days': user.get('consecutive_active_days', 0),
+        'created_at': user.get('created_at'),
+        **{key: counters.get(key, 0) or 0 for key in USER_COUNTER_SOURCES}
+    }
+
+# Counters joined as "c": the maintained table, or the same columns counted on the fly
+USER_COUNTERS_JOIN = "LEFT JOIN user_activity_counters c ON c.user_id = u.id"
+USER_COUNTS_JOIN = "LEFT JOIN LATERAL (SELECT {counts}) c ON true".format(counts=", ".join(
+    f"(SELECT COUNT(*) FROM {table} WHERE {column} = u.id) as {key}"
+    for key, (table, column) in USER_COUNTER_SOURCES.items()
+))
+
+def _counters_query(name: str, sql: str):
+    """Register a query in two variants: reading user_activity_counters, and counting activity"""
+    register_named_query(name, sql.format(counters_join=USER_COUNTERS_JOIN))
+    register_named_query(f"{name}_counted", sql.format(counters_join=USER_COUNTS_JOIN))
+
+def _counters_query_name(name: str) -> str:
+    return name if db_manager.activity_counters_maintained else f"{name}_counted"
+
+_counters_query('user_stats_many', """
+SELECT
+    u.id,
+    u.level,
+    u.xp_points,
+    u.total_active_days,
+    u.consecutive_active_days,
+    u.created_at,
+    COALESCE(c.total_quizzes, 0) as total_quizzes,
+    COALESCE(c.total_comments, 0) as total_comments,
+    COALESCE(c.total_materials, 0) as total_materials,
+    COALESCE(c.total_discussions, 0) as total_discussions
+FROM users u
+{counters_join}
+WHERE u.id = ANY($1::uuid[])
+""")
+
 async def get_user_stats(user_id: str) -> Dict[str, Any]:
     """Get comprehensive user statistics"""
-    logger.info(f"🔍 Getting stats for user {user_id}, using_supabase: {db_manager.use_supabase}")
+    stats = await get_user_stats_many([user_id])
+    return stats.get(str(user_id), {})
+
+async def get_user_stats_many(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get statistics for many users in one aggregate round trip, keyed by user id"""
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    if not user_ids:
+        return {}
+
+    logger.info(f"🔍 Getting stats for {len(user_ids)} user(s), using_supabase: {db_manager.use_supabase}")
 
     if db_manager.use_supabase:
         if db_manager.supabase is None:
@@ -167,43 +441,18 @@ async def get_user_stats(user_id: str) -> Dict[str, Any]:
             logger.error(f"❌ {error_msg}")
             raise RuntimeError(error_msg)
 
-        logger.info("📡 Using Supabase for user stats")
         try:
-            # Use Supabase to get user data
-            logger.info(f"Querying Supabase for user: {user_id}")
-            user_result = db_manager.supabase.table('users').select('*').eq('id', user_id).execute()
-            logger.info(f"Supabase user query result: {user_result}")
-
-            if not user_result.data:
-                logger.warning(f"No user found with ID: {user_id}")
-                return {}
-
-            user = user_result.data[0]
-            logger.info(f"Found user: {user.get('email', 'unknown')}")
-
-            # Get activity counts using Supabase
-            quiz_count = len(db_manager.supabase.table('quiz_attempts').select('id').eq('user_id', user_id).execute().data or [])
-            comment_count = len(db_manager.supabase.table('forum_comments').select('id').eq('user_id', user_id).execute().data or [])  # forum_comments, not exercise_comments
-            material_count = len(db_manager.supabase.table('materials').select('id').eq('uploaded_by', user_id).execute().data or [])
-            discussion_count = len(db_manager.supabase.table('forum_discussions').select('id').eq('user_id', user_id).execute().data or [])
-
-            result = {
-                'id': user['id'],
-                'email': user.get('email'),
-                'full_name': user.get('full_name'),
-                'level': user.get('level', 1),
-                'xp_points': user.get('xp_points', 0),
-                'total_active_days': user.get('total_active_days', 0),
-                'consecutive_active_days': user.get('consecutive_active_days', 0),
-                'created_at': user.get('created_at'),
-                'total_quizzes': quiz_count,
-                'total_comments': comment_count,
-                'total_materials': material_count,
-                'total_discussions': discussion_count
-            }
-
-            logger.info(f"✅ Returning real Supabase data: {result}")
-            return result
+            if db_manager.rpc_available(USER_STATS_RPC):
+                try:
+                    result = await db_manager.supabase_execute(db_manager.supabase.rpc(USER_STATS_RPC, {'user_ids': user_ids}))
+                    rows = result.data or []
+                    return {str(row['id']): _build_user_stats(row, row) for row in rows}
+                except Exception as e:
+                    # Not deployed (scripts/045_ai_user_stats_rpc.sql) or transient: count queries answer this call
+                    db_manager.rpc_failed(USER_STATS_RPC, e, "counting activity rows per user "
+                                          "(deploy scripts/045_ai_user_stats_rpc.sql)")
+
+            return await _get_user_stats_many_counted(user_ids)
 
         except Exception as e:
             logger.error(f"❌ Supabase query failed: {e}")
@@ -212,188 +461,459 @@ async def get_user_stats(user_id: str) -> Dict[str, Any]:
     # PostgreSQL fallback
     if not db_manager.pool:
         # Return mock data for offline mode
-        return {
-            'id': user_id,
-            'xp_points': 100,
-            'level': 2,
-            'total_active_days': 10,
-            'consecutive_active_days': 3,
-            'total_quizzes': 5,
-            'total_comments': 8,
-            'total_materials': 2,
-            'total_discussions': 1
-        }
-
-    query = """
-    SELECT
-        u.id,
-        u.email,
-        u.full_name,
-        u.level,
-        u.xp_points,
-        u.total_active_days,
-        u.consecutive_active_days,
-        u.created_at,
-        COALESCE(q.quiz_count, 0) as total_quizzes,
-        COALESCE(c.comment_count, 0) as total_comments,
-        COALESCE(m.material_count, 0) as total_materials,
-        COALESCE(d.discussion_count, 0) as total_discussions
-    FROM users u
-    LEFT JOIN (SELECT user_id, COUNT(*) as quiz_count FROM quiz_attempts GROUP BY user_id) q ON u.id = q.user_id::uuid
-    LEFT JOIN (SELECT user_id, COUNT(*) as comment_count FROM exercise_comments GROUP BY user_id) c ON u.id = c.user_id::uuid
-    LEFT JOIN (SELECT uploaded_by, COUNT(*) as material_count FROM materials GROUP BY uploaded_by) m ON u.id = m.uploaded_by::uuid
-    LEFT JOIN (SELECT user_id, COUNT(*) as discussion_count FROM forum_discussions GROUP BY user_id) d ON u.id = d.user_id::uuid
-    WHERE u.id = $1::uuid
-    """
+        return {user_id: _mock_user_stats(user_id) for user_id in user_ids}
 
     try:
-        results = await db_manager.execute_query(query, user_id)
-        return results[0] if results else {}
+        results = await db_manager.fetch_named(_counters_query_name('user_stats_many'), user_ids)
+        return {str(row['id']): row for row in results}
     except Exception as e:
         logger.warning(f"Database query failed, using mock data: {e}")
-        return {
-            'id': user_id,
-            'xp_points': 100,
-            'level': 2,
-            'total_active_days': 10,
-            'consecutive_active_days': 3,
-            'total_quizzes': 5,
-            'total_comments': 8,
-            'total_materials': 2,
-            'total_discussions': 1
-        }
-
-async def get_recent_user_activity(user_id: str, days: int = 30) -> List[Dict[str, Any]]:
-    """Get user activity in the last N days"""
-    since_date = datetime.utcnow() - timedelta(days=days)
+        return {user_id: _mock_user_stats(user_id) for user_id in user_ids}
 
-    queries = [
-        # Quiz attempts
-        """
-        SELECT 'quiz' as activity_type, completed_at as timestamp, score as metadata
-        FROM quiz_attempts
-        WHERE user_id = $1::uuid AND completed_at >= $2
-        """,
-        # Comments
-        """
-        SELECT 'comment' as activity_type, created_at as timestamp, content as metadata
-        FROM forum_comments
-        WHERE user_id = $1::uuid AND created_at >= $2
-        """,
-        # Materials
-        """
-        SELECT 'material' as activity_type, created_at as timestamp, title as metadata
-        FROM materials
-        WHERE uploaded_by = $1::uuid AND created_at >= $2
-        """,
-        # Discussions
-        """
-        SELECT 'discussion' as activity_type, created_at as timestamp, title as metadata
-        FROM forum_discussions
-        WHERE user_id = $1::uuid AND created_at >= $2
-        """
+async def _get_user_stats_many_counted(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Supabase fallback: one users query plus a HEAD count per activity table and user, run
+    concurrently (the server counts, no activity rows are transferred)"""
+    async def count_rows(table: str, column: str, user_id: str) -> int:
+        result = await db_manager.supabase_execute(
+            db_manager.supabase.table(table).select('id', count='exact', head=True).eq(column, user_id)
+        )
+        return result.count or 0
+
+    sources = [(user_id, key, table, column)
+               for user_id in user_ids for key, (table, column) in USER_COUNTER_SOURCES.items()]
+    users_result, *counts = await asyncio.gather(
+        db_manager.supabase_execute(db_manager.supabase.table('users').select(
+            'id,level,xp_points,total_active_days,consecutive_active_days,created_at'
+        ).in_('id', user_ids)),
+        *(count_rows(table, column, user_id) for user_id, _, table, column in sources)
+    )
+    users = users_result.data or []
+
+    counters: Dict[str, Dict[str, int]] = {}
+    for (user_id, key, _, _), count in zip(sources, counts):
+        counters.setdefault(user_id, {})[key] = count
+
+    stats = {}
+    for user in users:
+        user_id = str(user['id'])
+        stats[user_id] = _build_user_stats(user, counters.get(user_id, {}))
+
+    missing = len(user_ids) - len(stats)
+    if missing:
+        logger.warning(f"No user found for {missing} of {len(user_ids)} requested ID(s)")
+    return stats
+
+ACTIVITY_SOURCES = [
+    # (activity_type, table, user column, timestamp column, metadata column)
+    ('quiz', 'quiz_attempts', 'user_id', 'completed_at', 'score'),
+    ('comment', 'forum_comments', 'user_id', 'created_at', 'content'),
+    ('material', 'materials', 'uploaded_by', 'created_at', 'title'),
+    ('discussion', 'forum_discussions', 'user_id', 'created_at', 'title'),
+]
+
+def _activity_union_sql(user_filter: str, branch_limit: str = "") -> str:
+    """UNION ALL over every activity source, one branch per table.
+
+    metadata mixes types across tables (score, content, title): jsonb keeps each value's
+    type through the union, so both backends return a number for quizzes and text otherwise.
+    """
+    branches = [
+        f"""
+        (SELECT {user_col}::text as user_id, '{activity_type}' as activity_type,
+                {ts_col} as timestamp, to_jsonb({meta_col}) as metadata
+         FROM {table}
+         WHERE {user_col} {user_filter} AND {ts_col} >= $2{branch_limit})"""
+        for activity_type, table, user_col, ts_col, meta_col in ACTIVITY_SOURCES
     ]
+    return "\n        UNION ALL".join(branches)
+
+register_named_query('recent_activity', f"""
+SELECT activity_type, timestamp, metadata
+FROM ({_activity_union_sql("= $1::uuid")}
+) activity
+ORDER BY timestamp DESC
+""")
+
+# Push the limit into every branch so each table only returns its newest rows
+register_named_query('recent_activity_limited', f"""
+SELECT activity_type, timestamp, metadata
+FROM ({_activity_union_sql("= $1::uuid", " ORDER BY timestamp DESC LIMIT $3")}
+) activity
+ORDER BY timestamp DESC
+LIMIT $3
+""")
+
+register_named_query('recent_activity_many', f"""
+SELECT user_id, activity_type, timestamp, metadata
+FROM (
+    SELECT activity.*,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY timestamp DESC) as activity_rank
+    FROM ({_activity_union_sql("= ANY($1::uuid[])")}
+    ) activity
+) ranked
+WHERE $3::int IS NULL OR activity_rank <= $3::int
+ORDER BY user_id, timestamp DESC
+""")
+
+async def get_recent_user_activity(user_id: str, days: int = 30, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get user activity in the last N days, newest first"""
+    since_date = datetime.utcnow() - timedelta(days=days)
+
+    if db_manager.use_supabase:
+        activity = await _get_supabase_activity([str(user_id)], since_date, limit)
+        return activity.get(str(user_id), [])
 
-    all_activities = []
-    for query in queries:
-        activities = await db_manager.execute_query(query, user_id, since_date)
-        all_activities.extend(activities)
+    if limit is None:
+        return await db_manager.fetch_named('recent_activity', user_id, since_date)
+    return await db_manager.fetch_named('recent_activity_limited', user_id, since_date, limit)
 
-    # Sort by timestamp
-    all_activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    return all_activities
+async def get_recent_user_activity_many(user_ids: List[str], days: int = 30,
+                                        limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Get recent activity for many users in one query, partitioned by user id (newest first)"""
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    if not user_ids:
+        return {}
+
+    since_date = datetime.utcnow() - timedelta(days=days)
+
+    if db_manager.use_supabase:
+        return await _get_supabase_activity(user_ids, since_date, limit)
+
+    rows = await db_manager.fetch_named('recent_activity_many', user_ids, since_date, limit)
+
+    activity = {user_id: [] for user_id in user_ids}
+    for row in rows:
+        activity.setdefault(row.pop('user_id'), []).append(row)
+    return activity
+
+async def _get_supabase_activity(user_ids: List[str], since_date: datetime,
+                                 limit: Optional[int]) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch every activity source from Supabase concurrently and merge per user"""
+    if db_manager.supabase is None:
+        raise RuntimeError("Supabase connection configured but unavailable. Check credentials and network.")
+
+    # One user: the newest `limit` rows of each table are enough. Several users: a table is read
+    # to the end (the per-user cut happens after the merge), never cut short by PostgREST max-rows
+    wanted = limit if limit is not None and len(user_ids) == 1 else None
+
+    async def fetch_source(activity_type: str, table: str, user_col: str, ts_col: str, meta_col: str):
+        rows = []
+        while wanted is None or len(rows) < wanted:
+            page = SUPABASE_PAGE_SIZE if wanted is None else min(SUPABASE_PAGE_SIZE, wanted - len(rows))
+            # id as tie-breaker: offset pages over equal timestamps neither repeat nor skip rows
+            request = db_manager.supabase.table(table).select(f'{user_col},{ts_col},{meta_col}') \
+                .in_(user_col, user_ids).gte(ts_col, since_date.isoformat()) \
+                .order(ts_col, desc=True).order('id').range(len(rows), len(rows) + page - 1)
+            result = await db_manager.supabase_execute(request)
+            data = result.data or []
+            rows.extend(
+                (str(row[user_col]), {'activity_type': activity_type, 'timestamp': row[ts_col], 'metadata': row[meta_col]})
+                for row in data
+            )
+            if len(data) < page:
+                break
+        return rows
+
+    results = await asyncio.gather(*(fetch_source(*source) for source in ACTIVITY_SOURCES))
+
+    activity = {user_id: [] for user_id in user_ids}
+    for rows in results:
+        for user_id, row in rows:
+            activity.setdefault(user_id, []).append(row)
+
+    for user_id, rows in activity.items():
+        rows.sort(key=lambda x: x['timestamp'], reverse=True)
+        if limit is not None:
+            del rows[limit:]
+    return activity
+
+# Badge requirement type -> user stats field it is checked against
+BADGE_REQUIREMENT_FIELDS = {
+    'xp_earned': 'xp_points',
+    'level_reached': 'level',
+    'quizzes_completed': 'total_quizzes',
+    'comments_posted': 'total_comments',
+    'materials_uploaded': 'total_materials',
+    'discussions_created': 'total_discussions',
+}
+ELIGIBILITY_RARITIES = ('legendary', 'admin', 'hacker')  # Only check prestigious badges
+BADGE_ELIGIBILITY_RPC = 'get_badge_eligibility_many'
+
+_counters_query('badge_eligibility_many', """
+SELECT
+    u.id::text as user_id,
+    b.id,
+    b.name,
+    b.requirement_type,
+    b.requirement_value,
+    COALESCE(
+        CASE b.requirement_type
+            WHEN 'xp_earned' THEN u.xp_points
+            WHEN 'level_reached' THEN u.level
+            WHEN 'quizzes_completed' THEN COALESCE(c.total_quizzes, 0)
+            WHEN 'comments_posted' THEN COALESCE(c.total_comments, 0)
+            WHEN 'materials_uploaded' THEN COALESCE(c.total_materials, 0)
+            WHEN 'discussions_created' THEN COALESCE(c.total_discussions, 0)
+        END >= b.requirement_value,
+        false
+    ) as is_eligible
+FROM users u
+{counters_join}
+CROSS JOIN badges b
+WHERE u.id = ANY($1::uuid[])
+AND b.rarity = ANY($2::text[])
+ORDER BY u.id, b.name
+""")
+
+def _is_badge_eligible(badge: Dict[str, Any], stats: Dict[str, Any]) -> bool:
+    """Evaluate one badge requirement against a user's stats"""
+    field = BADGE_REQUIREMENT_FIELDS.get(badge.get('requirement_type'))
+    if field is None or badge.get('requirement_value') is None:
+        return False
+    return (stats.get(field) or 0) >= badge['requirement_value']
+
+def _group_eligibility(user_ids: List[str], rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Split eligibility rows per user, keeping the requested users without rows"""
+    eligibility = {user_id: [] for user_id in user_ids}
+    for row in rows:
+        row = dict(row)
+        eligibility.setdefault(str(row.pop('user_id')), []).append(row)
+    return eligibility
 
 async def get_badge_eligibility(user_id: str) -> List[Dict[str, Any]]:
     """Check which badges a user is eligible for"""
-    query = """
-    SELECT
-        b.id,
-        b.name,
-        b.requirement_type,
-        b.requirement_value,
-        CASE
-            WHEN b.requirement_type = 'xp_earned' AND u.xp_points >= b.requirement_value THEN true
-            WHEN b.requirement_type = 'level_reached' AND u.level >= b.requirement_value THEN true
-            WHEN b.requirement_type = 'quizzes_completed' AND (
-                SELECT COUNT(*) FROM quiz_attempts WHERE user_id = u.id
-            ) >= b.requirement_value THEN true
-            WHEN b.requirement_type = 'comments_posted' AND (
-                SELECT COUNT(*) FROM forum_comments WHERE user_id = u.id
-            ) >= b.requirement_value THEN true
-            WHEN b.requirement_type = 'materials_uploaded' AND (
-                SELECT COUNT(*) FROM materials WHERE uploaded_by = u.id
-            ) >= b.requirement_value THEN true
-            WHEN b.requirement_type = 'discussions_created' AND (
-                SELECT COUNT(*) FROM forum_discussions WHERE user_id = u.id
-            ) >= b.requirement_value THEN true
-            ELSE false
-        END as is_eligible
-    FROM badges b
-    CROSS JOIN users u
-    WHERE u.id = $1::uuid
-    AND b.rarity IN ('legendary', 'admin', 'hacker')  -- Only check prestigious badges
-    ORDER BY b.name
-    """
+    eligibility = await get_badge_eligibility_many([user_id])
+    return eligibility.get(str(user_id), [])
 
-    return await db_manager.execute_query(query, user_id)
+async def get_badge_eligibility_many(user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Check prestigious badge eligibility for many users, one counters lookup per user"""
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    if not user_ids:
+        return {}
 
-async def assign_badge_to_user(user_id: str, badge_id: str, method: str = 'ai_triggered'):
-    """Assign a badge to a user"""
     if db_manager.use_supabase:
-        try:
-            # Use Supabase to assign badge
-            data = {
-                'user_id': user_id,
-                'badge_id': badge_id,
-                'earned_at': datetime.utcnow().isoformat()
-            }
-            db_manager.supabase.table('user_badges').insert(data).execute()
-
-            # Log the assignment (if system_logs table exists)
+        if db_manager.supabase is None:
+            raise RuntimeError("Supabase connection configured but unavailable. Check credentials and network.")
+
+        if db_manager.rpc_available(BADGE_ELIGIBILITY_RPC):
             try:
-                log_data = {
-                    'event_type': 'badge_assigned',
-                    'message': f"Badge {badge_id} assigned to user {user_id} via {method}",
-                    'created_at': datetime.utcnow().isoformat()
-                }
-                db_manager.supabase.table('system_logs').insert(log_data).execute()
-            except:
-                # Ignore logging errors if table doesn't exist
-                pass
+                result = await db_manager.supabase_execute(
+                    db_manager.supabase.rpc(BADGE_ELIGIBILITY_RPC, {'user_ids': user_ids})
+                )
+                return _group_eligibility(user_ids, result.data or [])
+            except Exception as e:
+                # Not deployed (scripts/047_ai_user_activity_counters.sql) or transient: evaluate locally this call
+                db_manager.rpc_failed(BADGE_ELIGIBILITY_RPC, e, "evaluating eligibility locally "
+                                      "(deploy scripts/047_ai_user_activity_counters.sql)")
 
-            return
-        except Exception as e:
-            logger.error(f"Supabase badge assignment failed: {e}")
-            raise
+        return await _get_badge_eligibility_many_evaluated(user_ids)
 
-    # PostgreSQL fallback
-    command = """
+    rows = await db_manager.fetch_named(_counters_query_name('badge_eligibility_many'), user_ids,
+                                        list(ELIGIBILITY_RARITIES))
+    return _group_eligibility(user_ids, rows)
+
+async def _get_badge_eligibility_many_evaluated(user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Supabase fallback: batched user stats plus one badges query, evaluated in Python"""
+    stats, badges_result = await asyncio.gather(
+        get_user_stats_many(user_ids),
+        db_manager.supabase_execute(
+            db_manager.supabase.table('badges')
+            .select('id,name,requirement_type,requirement_value')
+            .in_('rarity', list(ELIGIBILITY_RARITIES))
+            .order('name')
+        )
+    )
+    badges = badges_result.data or []
+
+    return {
+        user_id: [
+            {**badge, 'is_eligible': _is_badge_eligible(badge, stats[user_id])}
+            for badge in badges
+        ] if user_id in stats else []
+        for user_id in user_ids
+    }
+
+BADGE_ASSIGN_CHUNK_SIZE = int(os.getenv("BADGE_ASSIGN_CHUNK_SIZE", "1000"))
+
+register_named_query('assign_badges', """
+WITH requested AS (
+    SELECT * FROM unnest($1::uuid[], $2::uuid[]) AS r(user_id, badge_id)
+),
+valid AS (
+    SELECT r.user_id, r.badge_id
+    FROM requested r
+    JOIN users u ON u.id = r.user_id
+    JOIN badges b ON b.id = r.badge_id
+),
+inserted AS (
     INSERT INTO user_badges (user_id, badge_id)
-    VALUES ($1::uuid, $2::uuid)
+    SELECT user_id, badge_id FROM valid
     ON CONFLICT (user_id, badge_id) DO NOTHING
-    """
+    RETURNING user_id, badge_id
+)
+SELECT v.user_id::text as user_id, v.badge_id::text as badge_id, i.user_id IS NOT NULL as inserted
+FROM valid v
+LEFT JOIN inserted i ON i.user_id = v.user_id AND i.badge_id = v.badge_id
+""")
+
+register_named_query('log_badge_assignments', """
+INSERT INTO system_logs (event_type, message, created_at)
+SELECT 'badge_assigned', message, NOW() FROM unnest($1::text[]) AS message
+""")
 
-    await db_manager.execute_command(command, user_id, badge_id)
+def _badge_log_message(user_id: str, badge_id: str, method: str) -> str:
+    return f"Badge {badge_id} assigned to user {user_id} via {method}"
 
-    # Log the assignment
-    log_command = """
-    INSERT INTO system_logs (event_type, message, created_at)
-    VALUES ('badge_assigned', $1, NOW())
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+async def assign_badge_to_user(user_id: str, badge_id: str, method: str = 'ai_triggered'):
+    """Assign a badge to a user"""
+    outcomes = await assign_badges_bulk([(user_id, badge_id)], method)
+    if outcomes.get((str(user_id), str(badge_id))) == 'failed':
+        raise RuntimeError(f"Badge assignment failed for user {user_id}, badge {badge_id}")
+
+async def assign_badges_bulk(pairs: Iterable[Tuple[str, str]],
+                             method: str = 'ai_triggered') -> Dict[Tuple[str, str], str]:
+    """Assign many (user_id, badge_id) pairs in batches.
+
+    Returns 'assigned', 'already_assigned' or 'failed' for every distinct pair.
     """
-    log_message = f"Badge {badge_id} assigned to user {user_id} via {method}"
+    pairs = list(dict.fromkeys((str(user_id), str(badge_id)) for user_id, badge_id in pairs))
+    if not pairs:
+        return {}
+
+    outcomes = {pair: 'failed' for pair in pairs if not (_is_uuid(pair[0]) and _is_uuid(pair[1]))}
+    valid_pairs = [pair for pair in pairs if pair not in outcomes]
+    chunks = [
+        valid_pairs[i:i + BADGE_ASSIGN_CHUNK_SIZE]
+        for i in range(0, len(valid_pairs), BADGE_ASSIGN_CHUNK_SIZE)
+    ]
+
+    if db_manager.use_supabase:
+        if db_manager.supabase is None:
+            raise RuntimeError("Supabase connection configured but unavailable. Check credentials and network.")
+        assign_chunk = _assign_badges_chunk_supabase
+    else:
+        assign_chunk = _assign_badges_chunk_postgres
+
+    # Chunks run concurrently, bounded by the pool size / Supabase concurrency limit
+    results = await asyncio.gather(*(assign_chunk(chunk, method) for chunk in chunks))
+
+    for chunk_outcomes in results:
+        outcomes.update(chunk_outcomes)
+
+    assigned = sum(1 for outcome in outcomes.values() if outcome == 'assigned')
+    failed = sum(1 for outcome in outcomes.values() if outcome == 'failed')
+    logger.info(f"🏅 Bulk badge assignment via {method}: {assigned} assigned, "
+                f"{len(pairs) - assigned - failed} already assigned, {failed} failed")
+    return {pair: outcomes[pair] for pair in pairs}
+
+async def _assign_badges_chunk_postgres(pairs: List[Tuple[str, str]], method: str) -> Dict[Tuple[str, str], str]:
+    """One transaction per chunk: a single INSERT ... ON CONFLICT DO NOTHING plus one multi-row log insert"""
+    try:
+        async with db_manager.acquire() as conn:
+            async with conn.transaction():
+                rows = await db_manager.fetch_named_on(
+                    conn, 'assign_badges',
+                    [user_id for user_id, _ in pairs], [badge_id for _, badge_id in pairs]
+                )
+                outcomes = {
+                    (row['user_id'], row['badge_id']): 'assigned' if row['inserted'] else 'already_assigned'
+                    for row in rows
+                }
+
+                messages = [_badge_log_message(*pair, method) for pair, outcome in outcomes.items()
+                            if outcome == 'assigned']
+                if messages:
+                    try:
+                        # Savepoint: a missing system_logs table must not roll back the badges
+                        async with conn.transaction():
+                            await db_manager.fetch_named_on(conn, 'log_badge_assignments', messages)
+                    except Exception as e:
+                        logger.debug(f"Badge assignment logging skipped: {e}")
+    except Exception as e:
+        logger.error(f"PostgreSQL bulk badge assignment failed for {len(pairs)} pair(s): {e}")
+        return {pair: 'failed' for pair in pairs}
+
+    # Pairs filtered out by the users/badges join reference rows that don't exist
+    return {pair: outcomes.get(pair, 'failed') for pair in pairs}
+
+async def _assign_badges_chunk_supabase(pairs: List[Tuple[str, str]], method: str) -> Dict[Tuple[str, str], str]:
+    """Batched upsert that ignores duplicates; only the rows actually inserted come back"""
+    earned_at = datetime.utcnow().isoformat()
+    rows = [{'user_id': user_id, 'badge_id': badge_id, 'earned_at': earned_at} for user_id, badge_id in pairs]
 
     try:
-        await db_manager.execute_command(log_command, log_message)
-    except:
-        # Ignore logging errors
-        pass
+        result = await db_manager.supabase_execute(
+            db_manager.supabase.table('user_badges').upsert(
+                rows, on_conflict='user_id,badge_id', ignore_duplicates=True
+            )
+        )
+        inserted = {(str(row['user_id']), str(row['badge_id'])) for row in result.data or []}
+        outcomes = {pair: 'assigned' if pair in inserted else 'already_assigned' for pair in pairs}
+    except Exception as e:
+        if len(pairs) == 1:
+            logger.error(f"Supabase badge assignment failed for {pairs[0]}: {e}")
+            return {pairs[0]: 'failed'}
+        # One bad pair (e.g. unknown badge) rejects the whole batch: isolate it pair by pair
+        logger.warning(f"⚠️ Supabase batch upsert failed, retrying {len(pairs)} pair(s) individually: {e}")
+        results = await asyncio.gather(*(_assign_badges_chunk_supabase([pair], method) for pair in pairs))
+        return {pair: outcome for chunk_outcomes in results for pair, outcome in chunk_outcomes.items()}
+
+    log_rows = [
+        {'event_type': 'badge_assigned', 'message': _badge_log_message(*pair, method), 'created_at': earned_at}
+        for pair, outcome in outcomes.items() if outcome == 'assigned'
+    ]
+    if log_rows:
+        try:
+            await db_manager.supabase_execute(db_manager.supabase.table('system_logs').insert(log_rows))
+        except Exception as e:
+            # Ignore logging errors if table doesn't exist
+            logger.debug(f"Badge assignment logging skipped: {e}")
+
+    return outcomes
+
+async def assign_eligible_badges(batch_size: int = 500, method: str = 'eligibility_sweep') -> Dict[str, int]:
+    """Sweep every user and assign the prestigious badges they are eligible for, a batch at a time"""
+    totals = {'users': 0, 'assigned': 0, 'already_assigned': 0, 'failed': 0}
+    batch: List[str] = []
+
+    async def flush():
+        eligibility = await get_badge_eligibility_many(batch)
+        pairs = [
+            (user_id, str(badge['id']))
+            for user_id, badges in eligibility.items()
+            for badge in badges if badge['is_eligible']
+        ]
+        outcomes = await assign_badges_bulk(pairs, method)
+        for outcome in outcomes.values():
+            totals[outcome] += 1
+        totals['users'] += len(batch)
+        batch.clear()
+
+    async for user in iter_users(batch_size=batch_size):
+        batch.append(str(user['id']))
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    logger.info(f"✅ Badge sweep finished: {totals}")
+    return totals
 
 async def get_all_users(limit: int = 1000) -> List[Dict[str, Any]]:
-    """Get all users for batch processing"""
+    """Get a capped list of users (debugging/previews); batch jobs should stream with iter_users()"""
     if db_manager.use_supabase:
         try:
             logger.info("📡 Getting users from Supabase")
-            result = db_manager.supabase.table('users').select('id,email,level,xp_points,created_at').limit(limit).execute()
+            result = await db_manager.supabase_execute(
+                db_manager.supabase.table('users').select('id,email,level,xp_points,created_at').limit(limit)
+            )
             users = result.data or []
             logger.info(f"✅ Found {len(users)} users in Supabase")
             return users
@@ -416,6 +936,101 @@ async def get_all_users(limit: int = 1000) -> List[Dict[str, Any]]:
         logger.warning(f"PostgreSQL query failed: {e}")
         return []
 
+USER_BATCH_COLUMNS = ['id', 'email', 'level', 'xp_points', 'created_at']
+
+async def iter_users(batch_size: int = 500, since: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Stream every user ordered by (created_at, id) using keyset pagination
+
+    Memory stays bounded by batch_size regardless of the size of the user base.
+    `since` only yields users created at or after that instant. Users with a
+    NULL created_at cannot be compared in the (created_at, id) keyset, so they
+    are streamed afterwards in a second pass ordered by id (and skipped when
+    `since` is given, as they were never created after it).
+    """
+    if not db_manager.use_supabase and not db_manager.pool:
+        logger.warning("⚠️ No database connection - iter_users yields nothing in offline mode")
+        return
+
+    total = undated = 0
+    for null_created_at in ((False,) if since is not None else (False, True)):
+        last_key: Optional[tuple] = None
+        while True:
+            if db_manager.use_supabase:
+                batch = await _fetch_supabase_user_batch(batch_size, since, last_key, null_created_at)
+            else:
+                batch = await _fetch_postgres_user_batch(batch_size, since, last_key, null_created_at)
+
+            for user in batch:
+                yield user
+
+            total += len(batch)
+            if null_created_at:
+                undated += len(batch)
+            if len(batch) < batch_size:
+                break
+            last_key = (batch[-1]['created_at'], batch[-1]['id'])
+
+    if undated:
+        logger.warning(f"⚠️ {undated} users have no created_at; streamed after the others, ordered by id")
+    logger.info(f"✅ Streamed {total} users")
+
+async def _fetch_postgres_user_batch(batch_size: int, since: Optional[datetime], last_key: Optional[tuple],
+                                     null_created_at: bool = False) -> List[Dict[str, Any]]:
+    """Next keyset page from PostgreSQL (served by idx_users_created_at_id / idx_users_null_created_at)"""
+    columns = ', '.join(USER_BATCH_COLUMNS)
+    if null_created_at:
+        query = f"""
+        SELECT {columns}
+        FROM users
+        WHERE created_at IS NULL AND ($1::uuid IS NULL OR id > $1::uuid)
+        ORDER BY id
+        LIMIT $2
+        """
+        return await db_manager.execute_query(query, last_key[1] if last_key else None, batch_size)
+
+    if last_key is None:
+        query = f"""
+        SELECT {columns}
+        FROM users
+        WHERE created_at IS NOT NULL AND ($1::timestamp IS NULL OR created_at >= $1::timestamp)
+        ORDER BY created_at, id
+        LIMIT $2
+        """
+        return await db_manager.execute_query(query, since, batch_size)
+
+    query = f"""
+    SELECT {columns}
+    FROM users
+    WHERE (created_at, id) > ($1::timestamp, $2::uuid)
+    ORDER BY created_at, id
+    LIMIT $3
+    """
+    return await db_manager.execute_query(query, last_key[0], last_key[1], batch_size)
+
+async def _fetch_supabase_user_batch(batch_size: int, since: Optional[datetime], last_key: Optional[tuple],
+                                     null_created_at: bool = False) -> List[Dict[str, Any]]:
+    """Next keyset page from Supabase"""
+    request = db_manager.supabase.table('users').select(','.join(USER_BATCH_COLUMNS))
+    if null_created_at:
+        request = request.is_('created_at', 'null')
+        if last_key is not None:
+            request = request.gt('id', last_key[1])
+        result = await db_manager.supabase_execute(request.order('id').limit(batch_size))
+        return result.data or []
+
+    request = request.not_.is_('created_at', 'null')
+    if since is not None:
+        request = request.gte('created_at', since.isoformat())
+    if last_key is not None:
+        created_at, user_id = last_key
+        # Row-value comparison (created_at, id) > (last_created_at, last_id) as a PostgREST logic tree
+        request = request.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{user_id})')
+
+    result = await db_manager.supabase_execute(
+        request.order('created_at').order('id').limit(batch_size)
+    )
+    return result.data or []
+
 async def get_engagement_metrics() -> Dict[str, Any]:
     """Get overall engagement metrics"""
     query = """
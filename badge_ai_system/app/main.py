@@ -5,11 +5,13 @@ Ultra-Advanced AI System for Complete Educational Platform
 
 import sys
 import io
+import hmac
 import atexit
+import asyncio
 from queue import Queue
 from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import logging
@@ -19,6 +21,13 @@ from typing import Dict, Any, Optional
 
 # Import AI engine
 from ai.ai_engine import UltraAdvancedClas2eAI
+from ai.analysis_cache import analysis_cache
+from ai.feature_state import behavioral_states
+from ai.compute_executor import compute_executor
+from ai.model_registry import ModelIntegrityError, UnknownModelVersion
+from ai.feature_schema import MODEL_SCHEMA
+from app.database import db_manager
+from app.memory import worker_memory_report
 
 # Ensure logs directory exists
 os.makedirs('logs', exist_ok=True)
@@ -139,10 +148,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"AI Engine initialization failed: {e}")
 
+    await analysis_cache.connect()
+
+    # Adotta le nuove versioni pubblicate nel registro dei modelli senza riavvio
+    registry_watcher = asyncio.create_task(ai_engine.watch_model_registry())
+
     yield
 
     # Shutdown
     logger.info("Shutting down Clas2e AI Ecosystem...")
+    registry_watcher.cancel()
+    await analysis_cache.close()
+    compute_executor.shutdown()
 
 # Configure lifespan
 app.router.lifespan_context = lifespan
@@ -157,7 +174,9 @@ async def health_check():
         return {
             "status": "healthy",
             "ai_engine": ai_status,
+            "readiness": "ready" if ai_engine.is_warm else "warming_up",
             "ai_features": ai_features,
+            "compute_queue_depth": compute_executor.queue_depth,
             "timestamp": datetime.utcnow().isoformat(),
             "version": "6.0.0",
             "ecosystem": "COMPLETE_CLAS2E_AI_SYSTEM"
@@ -170,6 +189,18 @@ async def health_check():
             "timestamp": datetime.utcnow().isoformat()
         }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness gate for load balancers: 503 until models are loaded and warmed up"""
+    if not ai_engine.is_warm:
+        raise HTTPException(status_code=503, detail="AI engine is warming up")
+    return {
+        "status": "ready",
+        "artifact_load_ms": ai_engine.artifact_load_ms,
+        "warmup_ms": ai_engine.warmup_ms,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 # ============================================================================
 # COMPLETE CLAS2E ECOSYSTEM ENDPOINTS
 # ============================================================================
@@ -188,7 +219,7 @@ async def get_complete_student_analysis(user_id: str):
 async def get_personalized_learning_path(user_id: str):
     """Get AI-generated personalized learning path"""
     try:
-        analysis = await ai_engine.analyze_student_comprehensive(user_id)
+        analysis = await ai_engine.analyze_student_comprehensive(user_id, sections=["personalized_learning_path"])
         return {"learning_path": analysis.get("personalized_learning_path", [])}
     except Exception as e:
         logger.error(f"Error generating learning path for {user_id}: {e}")
@@ -208,7 +239,7 @@ async def get_content_recommendations(user_id: str):
 async def get_ai_tutoring_help(user_id: str):
     """Get AI tutoring and personalized help"""
     try:
-        analysis = await ai_engine.analyze_student_comprehensive(user_id)
+        analysis = await ai_engine.analyze_student_comprehensive(user_id, sections=["ai_tutoring"])
         return {"ai_tutoring": analysis.get("ai_tutoring", {})}
     except Exception as e:
         logger.error(f"Error getting AI tutoring for {user_id}: {e}")
@@ -440,6 +471,103 @@ async def get_ultra_enhanced_ecosystem_status():
         logger.error(f"Error getting ultra-enhanced ecosystem status: {e}")
         raise HTTPException(status_code=500, detail="Ultra-enhanced status check failed")
 
+@app.get("/ai/system/database/metrics")
+async def get_database_metrics():
+    """Named query latency histograms, row counts and connection pool usage"""
+    try:
+        return {
+            "database": db_manager.get_metrics(),
+            "backend": "supabase" if db_manager.use_supabase else "postgresql",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error getting database metrics: {e}")
+        raise HTTPException(status_code=500, detail="Database metrics unavailable")
+
+@app.get("/ai/system/cache/stats")
+async def get_analysis_cache_stats():
+    """Analysis cache hit/miss counters and tier status"""
+    return {
+        "analysis_cache": analysis_cache.get_stats(),
+        "behavioral_states": behavioral_states.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/ai/system/engines")
+async def get_engine_report():
+    """Lazily built AI engines: which are loaded and how long their imports took"""
+    return {
+        "engines": ai_engine.engine_report(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/ai/system/stages/metrics")
+async def get_analysis_stage_metrics():
+    """Per-stage latency histograms and ok/timeout/error counts of the analysis pipeline"""
+    return {
+        "stages": ai_engine.stage_executor.get_metrics(),
+        "compute": compute_executor.get_metrics(),
+        "batching": {
+            "lstm": ai_engine.lstm_batcher.get_metrics(),
+            "transformer": ai_engine.transformer_batcher.get_metrics()
+        },
+        "ensemble": ai_engine.ensemble_timings(),
+        "student": ai_engine.student_report(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/ai/system/memory")
+async def get_worker_memory():
+    """RSS/PSS and shared vs private memory of this worker (and its siblings under gunicorn)"""
+    return {
+        **worker_memory_report(),
+        "models_preloaded": ai_engine.models_preloaded,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/ai/system/models")
+async def get_model_versions():
+    """Model version being served, the registry's current pointer and published versions"""
+    bundle = ai_engine.model_bundle
+    return {
+        "active_version": bundle.version,
+        "current_version": ai_engine.model_registry.current_version(),
+        "versions": ai_engine.model_registry.versions(),
+        "backends": bundle.backends,
+        "feature_schema": bundle.schema_version,
+        "runtime_feature_schema": MODEL_SCHEMA.version,
+        "load_ms": bundle.load_ms,
+        "loaded_at": bundle.loaded_at,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard for mutating admin routes: the X-Admin-Token header must match AI_ADMIN_TOKEN"""
+    expected = os.getenv("AI_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (AI_ADMIN_TOKEN is not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/ai/system/models/reload", dependencies=[Depends(require_admin)])
+async def reload_model_version(version: Optional[str] = None):
+    """Pin a published model version for every worker (default: reload the registry's CURRENT)"""
+    try:
+        result = await ai_engine.reload_models(version)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ModelIntegrityError, FileNotFoundError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**result, "timestamp": datetime.utcnow().isoformat()}
+
+@app.post("/users/{user_id}/analysis/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_user_analysis(user_id: str):
+    """Drop cached analyses for a user (e.g. after new activity outside the monitor)"""
+    await analysis_cache.invalidate(user_id)
+    # Edited or deleted activity never reaches the incremental feature state: rebuild it from history
+    behavioral_states.invalidate(user_id)
+    return {"user_id": user_id, "invalidated": True}
+
 # ============================================================================
 # STARTUP CONFIGURATION
 # ============================================================================
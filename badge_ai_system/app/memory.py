@@ -0,0 +1,77 @@
+"""
+Per-process memory report for the AI Badge System
+RSS / PSS / shared vs private pages of this worker and its sibling workers (Linux /proc)
+"""
+
+import os
+import resource
+from typing import Dict, Any, List, Optional
+
+# smaps_rollup fields reported, in kB in the kernel output
+SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_clean_mb',
+    'Shared_Dirty': 'shared_dirty_mb',
+    'Private_Clean': 'private_clean_mb',
+    'Private_Dirty': 'private_dirty_mb',
+}
+
+def parse_smaps_rollup(text: str) -> Dict[str, float]:
+    """Parse /proc/<pid>/smaps_rollup into MB values (shared = pages also mapped by other processes)"""
+    values = {}
+    for line in text.splitlines():
+        key, _, rest = line.partition(':')
+        if key in SMAPS_FIELDS:
+            values[SMAPS_FIELDS[key]] = round(int(rest.split()[0]) / 1024, 2)
+
+    if values:
+        values['shared_mb'] = round(values.get('shared_clean_mb', 0.0) + values.get('shared_dirty_mb', 0.0), 2)
+        values['private_mb'] = round(values.get('private_clean_mb', 0.0) + values.get('private_dirty_mb', 0.0), 2)
+    return values
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """Memory of one process; falls back to peak RSS where smaps_rollup is unavailable"""
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            return {'pid': pid, **parse_smaps_rollup(f.read())}
+    except OSError:
+        if pid != os.getpid():
+            return {'pid': pid, 'error': 'unavailable'}
+        # ru_maxrss is in kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        scale = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+        return {'pid': pid, 'peak_rss_mb': round(peak / scale, 2)}
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace")
+    except OSError:
+        return ""
+
+def worker_memory_report() -> Dict[str, Any]:
+    """This worker plus its siblings when running under a gunicorn master.
+
+    PSS splits shared pages across the processes mapping them, so the sum of
+    PSS over the workers is the real footprint of the box.
+    """
+    report = {'worker': process_memory()}
+
+    master = os.getppid()
+    if 'gunicorn' in _cmdline(master):
+        workers = [process_memory(pid) for pid in _children(master)]
+        report['master'] = process_memory(master)
+        report['workers'] = workers
+        report['total_pss_mb'] = round(
+            sum(entry.get('pss_mb', 0.0) for entry in workers) + report['master'].get('pss_mb', 0.0), 2
+        )
+    return report
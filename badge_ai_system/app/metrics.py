@@ -0,0 +1,130 @@
+"""
+Lightweight in-process metrics for the AI Badge System
+Fixed-bucket latency histograms and counters, safe to update from worker threads
+"""
+
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+# Bucket upper bounds in seconds (Prometheus default buckets, plus a 1ms bucket)
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    """Latency histogram with fixed upper bounds and quantile estimates"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Record one observation"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += seconds
+            self._max = max(self._max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile from the bucket counts (upper bound of the matching bucket)"""
+        with self._lock:
+            if not self._count:
+                return None
+            target = q * self._count
+            cumulative = 0
+            for i, count in enumerate(self._counts):
+                cumulative += count
+                if cumulative >= target:
+                    return self.buckets[i] if i < len(self.buckets) else self._max
+            return self._max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable view of the histogram"""
+        p50, p95, p99 = self.quantile(0.5), self.quantile(0.95), self.quantile(0.99)
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(list(self.buckets) + ['+Inf'], self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+
+            return {
+                'count': self._count,
+                'sum_seconds': round(self._sum, 6),
+                'avg_ms': round(self._sum / self._count * 1000, 3) if self._count else None,
+                'max_ms': round(self._max * 1000, 3),
+                'p50_ms': round(p50 * 1000, 3) if p50 is not None else None,
+                'p95_ms': round(p95 * 1000, 3) if p95 is not None else None,
+                'p99_ms': round(p99 * 1000, 3) if p99 is not None else None,
+                'buckets': buckets
+            }
+
+class QueryMetrics:
+    """Per-query latency/row-count histograms plus connection pool counters"""
+
+    def __init__(self):
+        self.query_latency: Dict[str, LatencyHistogram] = {}
+        self.query_rows: Dict[str, Dict[str, int]] = {}
+        self.query_errors: Dict[str, int] = {}
+        self.pool_wait = LatencyHistogram()
+        self.acquire_count = 0
+        self.release_count = 0
+        self._lock = threading.Lock()
+
+    def observe_query(self, name: str, seconds: float, rows: int):
+        """Record one execution of a named query"""
+        with self._lock:
+            histogram = self.query_latency.setdefault(name, LatencyHistogram())
+            row_stats = self.query_rows.setdefault(name, {'total': 0, 'max': 0, 'last': 0})
+            row_stats['total'] += rows
+            row_stats['max'] = max(row_stats['max'], rows)
+            row_stats['last'] = rows
+        histogram.observe(seconds)
+
+    def record_error(self, name: str):
+        with self._lock:
+            self.query_latency.setdefault(name, LatencyHistogram())
+            self.query_errors[name] = self.query_errors.get(name, 0) + 1
+
+    def record_acquire(self, wait_seconds: float):
+        with self._lock:
+            self.acquire_count += 1
+        self.pool_wait.observe(wait_seconds)
+
+    def record_release(self):
+        with self._lock:
+            self.release_count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable view of every metric"""
+        with self._lock:
+            names = sorted(self.query_latency)
+            rows = {name: dict(stats) for name, stats in self.query_rows.items()}
+            errors = dict(self.query_errors)
+            acquired, released = self.acquire_count, self.release_count
+
+        return {
+            'queries': {
+                name: {
+                    'latency': self.query_latency[name].snapshot(),
+                    'rows': rows.get(name, {}),
+                    'errors': errors.get(name, 0)
+                }
+                for name in names
+            },
+            'pool': {
+                'acquire_count': acquired,
+                'release_count': released,
+                'in_use': acquired - released,
+                'wait': self.pool_wait.snapshot()
+            }
+        }
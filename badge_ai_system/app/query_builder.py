@@ -0,0 +1,301 @@
+"""
+SQL to PostgREST translation for the Supabase backend
+Pushes projections, filters, ordering, limits and aggregates down to PostgREST
+instead of downloading whole tables. Anything outside the supported subset
+raises QueryTranslationError.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+class QueryTranslationError(ValueError):
+    """Raised when a SQL query cannot be expressed as a PostgREST request"""
+
+_IDENTIFIER = r'[A-Za-z_][A-Za-z0-9_]*'
+_VALUE = r"\x00\d+\x00|\$\d+(?:::\w+(?:\[\])?)?|-?\d+(?:\.\d+)?|TRUE|FALSE|NULL"
+
+_SELECT_RE = re.compile(
+    r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>' + _IDENTIFIER + r')'
+    r'(?:\s+WHERE\s+(?P<where>.+?))?'
+    r'(?:\s+GROUP\s+BY\s+(?P<group>.+?))?'
+    r'(?:\s+ORDER\s+BY\s+(?P<order>.+?))?'
+    r'(?:\s+LIMIT\s+(?P<limit>\$\d+|\d+))?'
+    r'(?:\s+OFFSET\s+(?P<offset>\$\d+|\d+))?'
+    r'\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+_COLUMN_RE = re.compile(
+    r'^(?:(?P<func>COUNT|SUM|AVG|MIN|MAX)\s*\(\s*(?P<arg>\*|' + _IDENTIFIER + r')\s*\)|(?P<column>' + _IDENTIFIER + r'))'
+    r'(?:\s+AS\s+(?P<alias>' + _IDENTIFIER + r'))?$',
+    re.IGNORECASE
+)
+_COMPARISON_RE = re.compile(
+    r'^(?P<column>' + _IDENTIFIER + r')\s*(?P<op>=|!=|<>|>=|<=|>|<)\s*(?P<value>' + _VALUE + r')$',
+    re.IGNORECASE
+)
+_ANY_RE = re.compile(
+    r'^(?P<column>' + _IDENTIFIER + r')\s*=\s*ANY\s*\(\s*(?P<value>\$\d+(?:::\w+(?:\[\])?)?)\s*\)$',
+    re.IGNORECASE
+)
+_LIKE_RE = re.compile(
+    r'^(?P<column>' + _IDENTIFIER + r')\s+(?P<negate>NOT\s+)?(?P<op>LIKE|ILIKE)\s+(?P<value>' + _VALUE + r')$',
+    re.IGNORECASE
+)
+_IS_RE = re.compile(
+    r'^(?P<column>' + _IDENTIFIER + r')\s+IS\s+(?P<negate>NOT\s+)?(?P<value>NULL|TRUE|FALSE)$',
+    re.IGNORECASE
+)
+_IN_RE = re.compile(
+    r'^(?P<column>' + _IDENTIFIER + r')\s+(?P<negate>NOT\s+)?IN\s*\((?P<values>[^()]*)\)$',
+    re.IGNORECASE
+)
+_BETWEEN_RE = re.compile(
+    r'(' + _IDENTIFIER + r')\s+BETWEEN\s+(' + _VALUE + r')\s+AND\s+(' + _VALUE + r')',
+    re.IGNORECASE
+)
+_ORDER_RE = re.compile(
+    r'^(?P<column>' + _IDENTIFIER + r')(?:\s+(?P<direction>ASC|DESC))?(?:\s+NULLS\s+(?P<nulls>FIRST|LAST))?$',
+    re.IGNORECASE
+)
+_UNSUPPORTED_RE = re.compile(
+    r'\b(JOIN|UNION|INTERSECT|EXCEPT|HAVING|DISTINCT|WITH|OR|CASE|OVER|RETURNING)\b|\(\s*SELECT\b',
+    re.IGNORECASE
+)
+
+_COMPARISON_OPS = {'=': 'eq', '!=': 'neq', '<>': 'neq', '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte'}
+_FILTER_METHODS = {
+    'eq': 'eq', 'neq': 'neq', 'gt': 'gt', 'gte': 'gte', 'lt': 'lt', 'lte': 'lte',
+    'like': 'like', 'ilike': 'ilike', 'in': 'in_', 'is': 'is_'
+}
+
+@dataclass
+class PostgrestFilter:
+    column: str
+    operator: str
+    value: Any
+    negate: bool = False
+
+@dataclass
+class PostgrestQuery:
+    """A SELECT translated into PostgREST terms"""
+    table: str
+    columns: List[str] = field(default_factory=lambda: ['*'])
+    filters: List[PostgrestFilter] = field(default_factory=list)
+    order: List[Tuple[str, bool, bool]] = field(default_factory=list)  # (column, desc, nulls first)
+    limit: Optional[int] = None
+    offset: Optional[int] = None
+    count_alias: Optional[str] = None  # set for a bare COUNT(*): served by an exact-count HEAD request
+
+    def build(self, client):
+        """Create the request builder on a (sync or async) Supabase client"""
+        if self.count_alias:
+            request = client.table(self.table).select('*', count='exact', head=True)
+        else:
+            request = client.table(self.table).select(','.join(self.columns))
+
+        for condition in self.filters:
+            if condition.negate:
+                request = request.not_
+            request = getattr(request, _FILTER_METHODS[condition.operator])(condition.column, condition.value)
+
+        if self.count_alias:
+            return request
+
+        for column, desc, nulls_first in self.order:
+            request = request.order(column, desc=desc, nullsfirst=nulls_first)
+
+        if self.offset is not None:
+            end = self.offset + (self.limit if self.limit is not None else 1_000_000_000) - 1
+            request = request.range(self.offset, end)
+        elif self.limit is not None:
+            request = request.limit(self.limit)
+
+        return request
+
+    def rows(self, response) -> List[Dict[str, Any]]:
+        """Shape the PostgREST response like the rows the SQL query would return"""
+        if self.count_alias:
+            return [{self.count_alias: response.count or 0}]
+        return response.data or []
+
+def translate_select(query: str, args: Sequence[Any] = (), table: Optional[str] = None) -> PostgrestQuery:
+    """Translate a single-table SELECT into a PostgrestQuery"""
+    sql = re.sub(r'--[^\n]*', ' ', query)
+    sql, literals = _mask_literals(sql)
+    sql = ' '.join(sql.split())
+
+    unsupported = _UNSUPPORTED_RE.search(sql)
+    if unsupported:
+        raise QueryTranslationError(f"Unsupported SQL construct for PostgREST: {unsupported.group(0).strip()}")
+
+    match = _SELECT_RE.match(sql)
+    if not match:
+        raise QueryTranslationError("Only single-table SELECT queries can be translated to PostgREST")
+
+    spec = PostgrestQuery(table=match.group('table'))
+    if table and spec.table != table:
+        raise QueryTranslationError(f"Query reads from '{spec.table}' but table '{table}' was requested")
+
+    aggregates, plain_columns = _translate_columns(spec, match.group('columns'))
+
+    group_by = [c.strip() for c in match.group('group').split(',')] if match.group('group') else []
+    if group_by:
+        if not aggregates or set(group_by) != set(plain_columns):
+            raise QueryTranslationError("GROUP BY must list exactly the non-aggregate columns of the SELECT")
+    elif aggregates and plain_columns:
+        raise QueryTranslationError("Mixing aggregates and plain columns requires GROUP BY")
+
+    if match.group('where'):
+        spec.filters = [_translate_condition(c, args, literals) for c in _split_conditions(match.group('where'))]
+
+    if match.group('order'):
+        for item in match.group('order').split(','):
+            order = _ORDER_RE.match(item.strip())
+            if not order:
+                raise QueryTranslationError(f"Unsupported ORDER BY item: {item.strip()}")
+            desc = (order.group('direction') or 'ASC').upper() == 'DESC'
+            nulls = (order.group('nulls') or '').upper()
+            # PostgREST follows the SQL defaults (NULLS LAST for ASC, NULLS FIRST for DESC)
+            # and postgrest-py can only request NULLS FIRST explicitly
+            if nulls == 'LAST' and desc:
+                raise QueryTranslationError("DESC NULLS LAST cannot be expressed through postgrest-py")
+            spec.order.append((order.group('column'), desc, nulls == 'FIRST'))
+
+    if match.group('limit'):
+        spec.limit = int(_resolve_value(match.group('limit'), args, literals))
+    if match.group('offset'):
+        spec.offset = int(_resolve_value(match.group('offset'), args, literals))
+
+    return spec
+
+def _translate_columns(spec: PostgrestQuery, columns_sql: str) -> Tuple[List[str], List[str]]:
+    """Fill spec.columns and return (aggregate entries, plain column names)"""
+    if columns_sql.strip() == '*':
+        return [], []
+
+    select, aggregates, plain_columns = [], [], []
+    items = [c.strip() for c in columns_sql.split(',')]
+    for item in items:
+        column = _COLUMN_RE.match(item)
+        if not column:
+            raise QueryTranslationError(f"Unsupported SELECT expression: {item}")
+
+        alias = column.group('alias')
+        func = (column.group('func') or '').lower()
+        if not func:
+            name = column.group('column')
+            plain_columns.append(name)
+            select.append(f"{alias}:{name}" if alias else name)
+            continue
+
+        arg = column.group('arg')
+        if func == 'count' and arg == '*':
+            if len(items) == 1:
+                spec.count_alias = alias or 'count'
+                return ['count'], []
+            entry = 'count()'
+        elif arg == '*':
+            raise QueryTranslationError(f"{func.upper()}(*) is not valid SQL")
+        else:
+            entry = f"{arg}.{func}()"
+
+        aggregates.append(entry)
+        select.append(f"{alias}:{entry}" if alias else entry)
+
+    spec.columns = select
+    return aggregates, plain_columns
+
+def _mask_literals(sql: str) -> Tuple[str, List[str]]:
+    """Replace quoted string literals with placeholders so keywords inside them are ignored"""
+    literals = []
+
+    def mask(match):
+        literals.append(match.group(1).replace("''", "'"))
+        return f"\x00{len(literals) - 1}\x00"
+
+    return re.sub(r"'((?:[^']|'')*)'", mask, sql), literals
+
+def _split_conditions(where_sql: str) -> List[str]:
+    """Split a WHERE clause on AND, expanding BETWEEN into two comparisons"""
+    where_sql = _BETWEEN_RE.sub(r'\1 >= \2 AND \1 <= \3', where_sql)
+    conditions = [c.strip() for c in re.split(r'\s+AND\s+', where_sql, flags=re.IGNORECASE)]
+    for condition in conditions:
+        if condition.startswith('(') or re.match(r'^NOT\b', condition, re.IGNORECASE):
+            raise QueryTranslationError(f"Unsupported WHERE condition: {condition}")
+    return conditions
+
+def _translate_condition(condition: str, args: Sequence[Any], literals: List[str]) -> PostgrestFilter:
+    """Translate one WHERE condition into a PostgREST filter"""
+    match = _COMPARISON_RE.match(condition)
+    if match:
+        value = _resolve_value(match.group('value'), args, literals)
+        if value is None:
+            raise QueryTranslationError(f"Comparison with NULL never matches, use IS NULL: {condition}")
+        return PostgrestFilter(match.group('column'), _COMPARISON_OPS[match.group('op')], value)
+
+    match = _ANY_RE.match(condition)
+    if match:
+        values = _resolve_value(match.group('value'), args, literals)
+        if not isinstance(values, (list, tuple, set)):
+            raise QueryTranslationError(f"ANY() expects a list parameter: {condition}")
+        return PostgrestFilter(match.group('column'), 'in', [_to_postgrest(v) for v in values])
+
+    match = _LIKE_RE.match(condition)
+    if match:
+        return PostgrestFilter(
+            match.group('column'), match.group('op').lower(),
+            _resolve_value(match.group('value'), args, literals), negate=bool(match.group('negate'))
+        )
+
+    match = _IS_RE.match(condition)
+    if match:
+        value = match.group('value').lower()
+        return PostgrestFilter(
+            match.group('column'), 'is', 'null' if value == 'null' else value == 'true',
+            negate=bool(match.group('negate'))
+        )
+
+    match = _IN_RE.match(condition)
+    if match:
+        values = [_resolve_value(v.strip(), args, literals) for v in match.group('values').split(',') if v.strip()]
+        if not values:
+            raise QueryTranslationError(f"Empty IN list: {condition}")
+        return PostgrestFilter(match.group('column'), 'in', values, negate=bool(match.group('negate')))
+
+    raise QueryTranslationError(f"Unsupported WHERE condition: {condition}")
+
+def _resolve_value(token: str, args: Sequence[Any], literals: List[str]) -> Any:
+    """Resolve a literal or $n placeholder to a PostgREST-ready value"""
+    token = token.strip()
+    if token.startswith('\x00'):
+        return literals[int(token.strip('\x00'))]
+    if token.startswith('$'):
+        index = int(token[1:].split('::')[0])
+        if index < 1 or index > len(args):
+            raise QueryTranslationError(f"Missing query parameter {token}")
+        value = args[index - 1]
+        if isinstance(value, (list, tuple, set)):
+            return list(value)
+        return _to_postgrest(value)
+
+    upper = token.upper()
+    if upper == 'NULL':
+        return None
+    if upper in ('TRUE', 'FALSE'):
+        return upper == 'TRUE'
+    if re.match(r'^-?\d+$', token):
+        return int(token)
+    if re.match(r'^-?\d+\.\d+$', token):
+        return float(token)
+    raise QueryTranslationError(f"Unsupported value: {token}")
+
+def _to_postgrest(value: Any) -> Any:
+    """Convert Python values to their PostgREST text form"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
@@ -0,0 +1,58 @@
+"""
+Gunicorn configuration for the AI Badge System API
+Preload-then-fork: models are loaded once in the master and shared copy-on-write by the workers
+
+Usage: gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import gc
+import os
+import logging
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+# Import app.main in the master, before forking the workers
+preload_app = os.getenv("AI_PRELOAD_MODELS", "1") == "1"
+
+# Split the compute threads between the workers instead of oversubscribing the cores
+os.environ.setdefault("AI_COMPUTE_WORKERS", str(max(1, (os.cpu_count() or 2) // workers)))
+
+def when_ready(server):
+    """Master only, after the app import and before the first fork.
+
+    Only loads artifacts (memory-mapped, no predictions): running xgboost/lightgbm
+    would start libgomp's OpenMP thread pools, and forking after that hangs the
+    workers. Tree compilation with its parity predictions and the warm-up run in
+    each worker, from the app lifespan (UltraAdvancedClas2eAI.initialize).
+    """
+    if not preload_app:
+        return
+
+    from app.main import ai_engine
+
+    # Collections during preload would only move objects around; freeze what survives
+    gc.disable()
+    try:
+        ai_engine.preload_models()
+    except Exception as e:
+        logger.warning(f"Model preload failed, workers will load their own copy: {e}")
+    gc.collect()
+    # Objects in the permanent generation are never scanned again: the workers' collector
+    # does not write to their headers, so those pages stay shared
+    gc.freeze()
+    gc.enable()
+    logger.info(f"Preloaded app frozen ({gc.get_freeze_count()} objects) before forking {workers} workers")
+
+def post_fork(server, worker):
+    """Worker only: torch intra-op threads follow the per-worker compute budget"""
+    try:
+        import torch
+        torch.set_num_threads(int(os.environ["AI_COMPUTE_WORKERS"]))
+    except ImportError:
+        pass
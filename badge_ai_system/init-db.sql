@@ -58,9 +58,104 @@ CREATE TABLE IF NOT EXISTS system_logs (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Per-user activity counters, maintained by the triggers below.
+-- The API reads this table only when all four triggers exist; otherwise it counts activity per query.
+CREATE TABLE IF NOT EXISTS user_activity_counters (
+  user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  total_quizzes INTEGER NOT NULL DEFAULT 0,
+  total_comments INTEGER NOT NULL DEFAULT 0,
+  total_materials INTEGER NOT NULL DEFAULT 0,
+  total_discussions INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Plain PostgreSQL version of scripts/047_ai_user_activity_counters.sql (no Supabase auth/RLS).
+-- TG_ARGV[0] = counter column, TG_ARGV[1] = user column of the activity table.
+CREATE OR REPLACE FUNCTION bump_user_activity_counter()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  counter_column TEXT := TG_ARGV[0];
+  user_column TEXT := TG_ARGV[1];
+  target_user UUID;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    target_user := (to_jsonb(NEW) ->> user_column)::UUID;
+    IF target_user IS NOT NULL THEN
+      EXECUTE format(
+        'INSERT INTO user_activity_counters (user_id, %1$I) VALUES ($1, 1)
+         ON CONFLICT (user_id) DO UPDATE
+         SET %1$I = user_activity_counters.%1$I + 1, updated_at = NOW()',
+        counter_column
+      ) USING target_user;
+    END IF;
+  ELSE
+    target_user := (to_jsonb(OLD) ->> user_column)::UUID;
+    IF target_user IS NOT NULL THEN
+      EXECUTE format(
+        'UPDATE user_activity_counters
+         SET %1$I = GREATEST(%1$I - 1, 0), updated_at = NOW()
+         WHERE user_id = $1',
+        counter_column
+      ) USING target_user;
+    END IF;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+-- Attach the triggers and backfill only when every activity table already exists:
+-- with a partial set the API keeps counting per query instead of reading stale counters.
+DO $$
+DECLARE
+  source RECORD;
+BEGIN
+  IF to_regclass('quiz_attempts') IS NULL OR to_regclass('forum_comments') IS NULL
+     OR to_regclass('materials') IS NULL OR to_regclass('forum_discussions') IS NULL THEN
+    RAISE NOTICE 'Activity tables missing: user_activity_counters triggers not installed';
+    RETURN;
+  END IF;
+
+  FOR source IN
+    SELECT * FROM (VALUES
+      ('quiz_attempts', 'total_quizzes', 'user_id'),
+      ('forum_comments', 'total_comments', 'user_id'),
+      ('materials', 'total_materials', 'uploaded_by'),
+      ('forum_discussions', 'total_discussions', 'user_id')
+    ) AS s(table_name, counter_column, user_column)
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trigger_count_' || source.table_name, source.table_name);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER INSERT OR DELETE ON %I FOR EACH ROW
+       EXECUTE FUNCTION bump_user_activity_counter(%L, %L)',
+      'trigger_count_' || source.table_name, source.table_name, source.counter_column, source.user_column
+    );
+  END LOOP;
+
+  INSERT INTO user_activity_counters (user_id, total_quizzes, total_comments, total_materials, total_discussions)
+  SELECT
+    u.id,
+    (SELECT COUNT(*) FROM quiz_attempts qa WHERE qa.user_id = u.id),
+    (SELECT COUNT(*) FROM forum_comments fc WHERE fc.user_id = u.id),
+    (SELECT COUNT(*) FROM materials m WHERE m.uploaded_by = u.id),
+    (SELECT COUNT(*) FROM forum_discussions fd WHERE fd.user_id = u.id)
+  FROM users u
+  ON CONFLICT (user_id) DO UPDATE SET
+    total_quizzes = EXCLUDED.total_quizzes,
+    total_comments = EXCLUDED.total_comments,
+    total_materials = EXCLUDED.total_materials,
+    total_discussions = EXCLUDED.total_discussions,
+    updated_at = NOW();
+END;
+$$;
+
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_level ON users(level);
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_users_null_created_at ON users(id) WHERE created_at IS NULL;
 CREATE INDEX IF NOT EXISTS idx_user_badges_user ON user_badges(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_badges_badge ON user_badges(badge_id);
 CREATE INDEX IF NOT EXISTS idx_badges_rarity ON badges(rarity);
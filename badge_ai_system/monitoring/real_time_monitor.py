@@ -3,6 +3,7 @@ Real-time User Monitoring System
 Tracks user activity and triggers AI analysis
 """
 
+import os
 import asyncio
 import json
 import logging
@@ -12,6 +13,9 @@ from collections import defaultdict
 import websockets
 import redis.asyncio as redis
 
+from ai.analysis_cache import analysis_cache
+from ai.feature_state import behavioral_states
+
 logger = logging.getLogger(__name__)
 
 class UserMonitor:
@@ -23,6 +27,8 @@ class UserMonitor:
         self.activity_buffer: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         self.user_sessions: Dict[str, datetime] = {}
         self.websocket_connections: set = set()
+        # Whether this monitor opened the shared analysis cache connection (and must close it)
+        self._owns_analysis_cache = False
 
         # Monitoring configuration
         self.buffer_size = 100  # Max activities per user in buffer
@@ -48,6 +54,10 @@ class UserMonitor:
             logger.warning(f"Redis not available, using in-memory monitoring: {e}")
             self.redis_client = None
 
+        # Invalidations must bump the shared version key in Redis, not just this process's LRU
+        self._owns_analysis_cache = analysis_cache.redis_client is None
+        await analysis_cache.connect()
+
     async def start_monitoring(self):
         """Start the monitoring system"""
         try:
@@ -79,6 +89,9 @@ class UserMonitor:
         # Close Redis connection
         if self.redis_client:
             await self.redis_client.close()
+        if self._owns_analysis_cache:
+            await analysis_cache.close()
+            self._owns_analysis_cache = False
 
         logger.info("🛑 User monitoring system stopped")
 
@@ -112,6 +125,12 @@ class UserMonitor:
                 # Keep only recent activities
                 await self.redis_client.ltrim(f"user_activity:{user_id}", 0, self.buffer_size - 1)
 
+            # Keep the user's behavioral features warm: O(1) update, matched later against the DB row
+            behavioral_states.observe(user_id, activity_event)
+
+            # New activity makes every cached analysis of this user stale
+            await analysis_cache.invalidate(user_id)
+
             # Trigger AI analysis if threshold reached
             if len(self.activity_buffer[user_id]) >= self.analysis_trigger_threshold:
                 await self._trigger_ai_analysis(user_id)
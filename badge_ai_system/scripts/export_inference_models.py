@@ -0,0 +1,75 @@
+"""
+Inference Export Script
+Export the trained deep models to TorchScript and int8 artifacts with a parity check,
+publishing them as a new version of the model registry
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.ai_engine import DEEP_MODEL_INPUT_SIZE
+from ai.deep_models import LSTMPredictor, TransformerPredictor
+from ai.model_export import export_deep_models
+from ai.model_registry import ModelRegistry
+from ai.feature_schema import SCHEMA_FILE
+
+logger = logging.getLogger(__name__)
+
+LEGACY_MODELS_PATH = "ai/models"
+
+def source_path(registry: ModelRegistry) -> str:
+    """Current registry version, or the legacy models folder before the first publish"""
+    version = registry.current_version()
+    return registry.version_path(version) if version else LEGACY_MODELS_PATH
+
+def load_eager_models(models_path: str) -> dict:
+    """Rebuild the eager models and load the saved state dicts"""
+    models = {
+        'lstm_predictor': LSTMPredictor(input_size=DEEP_MODEL_INPUT_SIZE, hidden_size=256),
+        'transformer_predictor': TransformerPredictor(input_size=DEEP_MODEL_INPUT_SIZE, d_model=512),
+    }
+    for name, model in models.items():
+        path = os.path.join(models_path, f"{name}.pth")
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ {path} not found, skipping {name}")
+            models[name] = None
+            continue
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+        model.eval()
+    return models
+
+def main():
+    """Export every trained deep model and print the parity report"""
+    logging.basicConfig(level=logging.INFO)
+    registry = ModelRegistry()
+    models_path = source_path(registry)
+    models = load_eager_models(models_path)
+    manifest = {}
+
+    def write(directory: str):
+        # Same weights as the source version, plus freshly exported artifacts
+        for name in os.listdir(models_path):
+            if name.endswith((".pth", ".pkl")) or name == SCHEMA_FILE:
+                shutil.copy2(os.path.join(models_path, name), directory)
+        manifest.update(export_deep_models(models, DEEP_MODEL_INPUT_SIZE, directory))
+
+    version = registry.publish(write, metadata={'exported_from': models_path}, activate=False)
+    print(json.dumps(manifest, indent=2))
+
+    failed = [f"{name}:{backend}" for name, backends in manifest.items()
+              for backend, report in backends.items() if not report.get('passed')]
+    if failed:
+        logger.error(f"❌ Parity check failed for: {', '.join(failed)} (version {version} not activated)")
+        sys.exit(1)
+    registry.activate(version)
+    logger.info(f"✅ All inference artifacts passed the parity check, version {version} is now current")
+
+if __name__ == "__main__":
+    main()
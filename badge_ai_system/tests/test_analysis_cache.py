@@ -0,0 +1,191 @@
+"""
+TEST SUITE FOR ANALYSIS CACHE
+=============================
+
+Verifica il tier locale della cache delle analisi: hit, invalidazione,
+deduplicazione delle richieste concorrenti e stale-while-revalidate.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from ai.analysis_cache import AnalysisCache
+
+class CountingAnalysis:
+    """Finta pipeline di analisi che conta le esecuzioni"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {'user_id': 'u1', 'run': self.calls}
+
+class SharedRedis:
+    """Redis in memoria condiviso tra istanze (solo i comandi usati dalla cache)"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def ping(self):
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def close(self):
+        pass
+
+class TestAnalysisCache:
+    """Test per la cache multi-livello delle analisi"""
+
+    def test_hit_and_invalidation(self):
+        """Test hit in cache e invalidazione esplicita"""
+        async def scenario():
+            cache = AnalysisCache()
+            analysis = CountingAnalysis()
+
+            first = await cache.get_or_compute('u1', analysis)
+            second = await cache.get_or_compute('u1', analysis)
+            await cache.invalidate('u1')
+            third = await cache.get_or_compute('u1', analysis)
+            return cache, first, second, third, analysis.calls
+
+        cache, first, second, third, calls = asyncio.run(scenario())
+        assert first == second == {'user_id': 'u1', 'run': 1}
+        assert third['run'] == 2
+        assert calls == 2
+        assert cache.stats['local_hits'] == 1
+
+    def test_variants_are_cached_separately(self):
+        """Test chiavi distinte per varianti diverse"""
+        async def scenario():
+            cache = AnalysisCache()
+            analysis = CountingAnalysis()
+            await cache.get_or_compute('u1', analysis, variant='full')
+            await cache.get_or_compute('u1', analysis, variant='ai_tutoring')
+            return analysis.calls
+
+        assert asyncio.run(scenario()) == 2
+
+    def test_concurrent_requests_compute_once(self):
+        """Test deduplicazione delle richieste concorrenti"""
+        async def scenario():
+            cache = AnalysisCache()
+            analysis = CountingAnalysis(delay=0.01)
+            results = await asyncio.gather(*(cache.get_or_compute('u1', analysis) for _ in range(5)))
+            return results, analysis.calls
+
+        results, calls = asyncio.run(scenario())
+        assert calls == 1
+        assert all(result == results[0] for result in results)
+
+    def test_stale_while_revalidate(self):
+        """Test risultato scaduto servito subito e ricalcolato in background"""
+        async def scenario():
+            cache = AnalysisCache()
+            cache.fresh_ttl = 0.0
+            analysis = CountingAnalysis()
+
+            await cache.get_or_compute('u1', analysis)
+            stale = await cache.get_or_compute('u1', analysis)
+            await asyncio.sleep(0.01)
+            return stale, analysis.calls, cache.stats
+
+        stale, calls, stats = asyncio.run(scenario())
+        assert stale['run'] == 1
+        assert calls == 2
+        assert stats['stale_hits'] == 1
+        assert stats['refreshes'] == 1
+
+    def test_errors_are_not_cached(self):
+        """Test analisi fallite non memorizzate"""
+        async def scenario():
+            cache = AnalysisCache()
+            calls = []
+
+            async def failing():
+                calls.append(1)
+                return {'error': 'boom'}
+
+            await cache.get_or_compute('u1', failing)
+            await cache.get_or_compute('u1', failing)
+            return len(calls)
+
+        assert asyncio.run(scenario()) == 2
+
+    def test_cached_value_is_not_shared_with_callers(self):
+        """Test un chiamante che modifica il risultato non altera la cache"""
+        async def scenario():
+            cache = AnalysisCache()
+            analysis = CountingAnalysis()
+            first = await cache.get_or_compute('u1', analysis)
+            first['run'] = 'mutated'
+            second = await cache.get_or_compute('u1', analysis)
+            second['extra'] = True
+            return await cache.get_or_compute('u1', analysis)
+
+        assert asyncio.run(scenario()) == {'user_id': 'u1', 'run': 1}
+
+    def test_redis_payload_keeps_numpy_numbers(self):
+        """Test scalari e array numpy codificati come numeri, come nel tier locale"""
+        np = pytest.importorskip("numpy")
+        entry = {'w': 0, 't': 1.0, 'v': {
+            'activity_quiz_count': np.int64(5), 'peak_hour': np.int32(18),
+            'score': np.float32(0.5), 'embedding': np.arange(3), 'at': datetime(2024, 1, 1),
+        }}
+
+        value = AnalysisCache._decode(AnalysisCache._encode(entry))['v']
+        assert value == {'activity_quiz_count': 5, 'peak_hour': 18, 'score': 0.5,
+                         'embedding': [0, 1, 2], 'at': '2024-01-01T00:00:00'}
+
+    def test_monitor_invalidation_reaches_other_instances(self, monkeypatch):
+        """Test attività registrata dal monitor: l'analisi in cache in un altro worker non viene più servita"""
+        monitor_module = pytest.importorskip("monitoring.real_time_monitor")
+        shared = SharedRedis()
+
+        async def scenario():
+            worker, monitor_cache = AnalysisCache(), AnalysisCache()
+            # Il worker ricontrolla il watermark su Redis a ogni richiesta
+            worker.local_ttl = 0
+            worker.redis_client = shared
+
+            async def connect():
+                monitor_cache.redis_client = shared
+            monkeypatch.setattr(monitor_cache, 'connect', connect)
+            monkeypatch.setattr(monitor_module, 'analysis_cache', monitor_cache)
+
+            # Anche senza il proprio client Redis il monitor deve connettere la cache condivisa
+            def redis_unavailable(**kwargs):
+                raise ConnectionError("monitor redis down")
+            monkeypatch.setattr(monitor_module.redis, 'Redis', redis_unavailable)
+
+            analysis = CountingAnalysis()
+            await worker.get_or_compute('u1', analysis)
+            await worker.get_or_compute('u1', analysis)
+
+            monitor = monitor_module.UserMonitor()
+            await monitor.initialize()
+            monitor.monitoring_active = True
+            await monitor.record_activity('u1', 'quiz')
+
+            result = await worker.get_or_compute('u1', analysis)
+            return monitor_cache, result, analysis.calls
+
+        monitor_cache, result, calls = asyncio.run(scenario())
+        assert monitor_cache.redis_client is shared
+        assert result['run'] == 2 and calls == 2
@@ -0,0 +1,144 @@
+"""
+TEST SUITE FOR ANALYSIS GRAPH
+=============================
+
+Verifica la valutazione parziale del grafo degli stadi di analisi
+e l'esecuzione concorrente degli stadi indipendenti.
+"""
+
+import time
+import asyncio
+import pytest
+
+from ai.analysis_graph import AnalysisGraph
+from ai.stage_executor import StageExecutor
+from ai.compute_executor import ComputeExecutor
+
+def build_graph(calls):
+    graph = AnalysisGraph(roots=('user_id',))
+
+    async def activity(user_id):
+        calls.append('activity')
+        return [user_id]
+
+    def features(activity):
+        calls.append('features')
+        return {'count': len(activity)}
+
+    def heavy_model(features):
+        calls.append('heavy_model')
+        return {'score': 0.9}
+
+    graph.node('activity', ['user_id'], activity)
+    graph.node('features', ['activity'], features)
+    graph.node('heavy_model', ['features'], heavy_model)
+    graph.section('activity_count', 'features', lambda f: f['count'])
+    graph.section('score', 'heavy_model', lambda m: m['score'])
+    return graph
+
+class TestAnalysisGraph:
+    """Test per il grafo delle sezioni di analisi"""
+
+    def test_only_needed_nodes_run(self):
+        """Test valutazione del solo sottografo richiesto"""
+        calls = []
+        graph = build_graph(calls)
+
+        values = asyncio.run(graph.evaluate(['activity_count'], {'user_id': 'u1'}))
+
+        assert calls == ['activity', 'features']
+        assert graph.render(['activity_count'], values) == {'activity_count': 1}
+
+    def test_all_sections_by_default(self):
+        """Test tutte le sezioni quando sections è None"""
+        calls = []
+        graph = build_graph(calls)
+        sections = graph.resolve_sections(None)
+
+        values = asyncio.run(graph.evaluate(sections, {'user_id': 'u1'}))
+
+        assert graph.render(sections, values) == {'activity_count': 1, 'score': 0.9}
+        assert calls == ['activity', 'features', 'heavy_model']
+
+    def test_unknown_section_and_input(self):
+        """Test errori per sezioni e input sconosciuti"""
+        graph = build_graph([])
+        with pytest.raises(ValueError):
+            graph.resolve_sections(['missing'])
+        with pytest.raises(ValueError):
+            graph.node('broken', ['nope'], lambda nope: nope)
+
+class TestStageExecutor:
+    """Test per l'esecuzione concorrente degli stadi"""
+
+    def build_graph(self):
+        graph = AnalysisGraph(roots=('user_id',))
+        graph.node('features', ['user_id'], lambda user_id: {'user': user_id})
+        graph.node('slow_a', ['features'], lambda features: time.sleep(0.2) or 'a')
+        graph.node('slow_b', ['features'], lambda features: time.sleep(0.2) or 'b')
+        graph.node('broken', ['features'], lambda features: 1 / 0)
+        graph.node('stuck', ['features'], lambda features: time.sleep(0.5), timeout=0.05)
+        graph.node('after_broken', ['broken'], lambda broken: 'never')
+        for name in ['slow_a', 'slow_b', 'broken', 'stuck', 'after_broken']:
+            graph.section(name, name, default='fallback')
+        return graph
+
+    def test_independent_stages_run_concurrently(self):
+        """Test latenza vicina allo stadio più lento, non alla somma"""
+        graph = self.build_graph()
+        executor = StageExecutor(compute=ComputeExecutor(max_workers=4), default_timeout=5)
+
+        started = time.perf_counter()
+        values = asyncio.run(graph.evaluate(['slow_a', 'slow_b'], {'user_id': 'u1'}, runner=executor))
+        elapsed = time.perf_counter() - started
+
+        assert graph.render(['slow_a', 'slow_b'], values) == {'slow_a': 'a', 'slow_b': 'b'}
+        assert elapsed < 0.35
+        executor.compute.shutdown()
+
+    def test_failures_degrade_only_their_sections(self):
+        """Test errori e timeout limitati alle proprie sezioni"""
+        graph = self.build_graph()
+        executor = StageExecutor(compute=ComputeExecutor(max_workers=4), default_timeout=5)
+        sections = ['slow_a', 'broken', 'stuck', 'after_broken']
+
+        values = asyncio.run(graph.evaluate(sections, {'user_id': 'u1'}, runner=executor))
+
+        assert graph.render(sections, values) == {
+            'slow_a': 'a', 'broken': 'fallback', 'stuck': 'fallback', 'after_broken': 'fallback'
+        }
+        failures = graph.failures(sections, values)
+        assert set(failures) == {'broken', 'stuck', 'after_broken'}
+        assert failures['stuck'] == 'stuck: timeout'
+        assert executor.get_metrics()['stages']['stuck']['outcomes']['timeout'] == 1
+        executor.compute.shutdown()
+
+class TestComputeExecutor:
+    """Test per l'esecutore del lavoro CPU-bound"""
+
+    def test_queue_depth_and_event_loop_responsiveness(self):
+        """Test coda misurata ed event loop libero durante il calcolo"""
+        compute = ComputeExecutor(kind='thread', max_workers=1)
+
+        async def scenario():
+            work = [asyncio.ensure_future(compute.run(time.sleep, 0.1, label='sleep')) for _ in range(3)]
+            ticks = 0
+            while not all(task.done() for task in work):
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return ticks
+
+        ticks = asyncio.run(scenario())
+        metrics = compute.get_metrics()
+
+        assert ticks >= 10
+        assert metrics['completed'] == 3
+        assert metrics['queue_depth'] == 0
+        assert metrics['max_queue_depth'] >= 2
+        assert metrics['run_time']['sleep']['count'] == 3
+        compute.shutdown()
+
+    def test_unknown_kind(self):
+        """Test tipo di executor non valido"""
+        with pytest.raises(ValueError):
+            ComputeExecutor(kind='gpu')
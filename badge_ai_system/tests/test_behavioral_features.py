@@ -0,0 +1,341 @@
+"""
+TEST SUITE FOR BEHAVIORAL FEATURES
+==================================
+
+Verifica che la variante batch (molti utenti in un solo DataFrame) e lo stato
+incrementale per utente (anche quando avanza con gli eventi nuovi della
+cronologia) producano gli stessi valori di create_behavioral_features.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai.ai_engine import AdvancedFeatureEngineer, _compute_feature_frame
+from ai.compute_executor import ComputeExecutor
+from ai.feature_schema import ACTIVITY_TYPES
+from ai.feature_state import BehavioralFeatureState, BehavioralStateStore
+
+def make_activity(users: int = 30, seed: int = 0, sessions: bool = True) -> pd.DataFrame:
+    """Attività sintetiche: timestamp ripetuti, utenti con una sola attività, stringhe ISO e datetime"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    rows = []
+    for user in range(users):
+        for i in range(1 if user % 7 == 0 else int(rng.integers(2, 40))):
+            # Minuti arrotondati a 30: più attività con lo stesso timestamp
+            timestamp = start + timedelta(minutes=30 * int(rng.integers(0, 2000)))
+            row = {
+                'user_id': f'user-{user:02d}',
+                'activity_type': ACTIVITY_TYPES[int(rng.integers(0, len(ACTIVITY_TYPES) - user % 2))],
+                'timestamp': timestamp.isoformat().replace('+00:00', 'Z') if i % 2 else timestamp,
+                'metadata': '{}',
+            }
+            if sessions:
+                row['session_id'] = f'user-{user:02d}-{i // 5}'
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def assert_same_features(expected: dict, row: pd.Series):
+    for name, value in expected.items():
+        if isinstance(value, str):
+            assert row[name] == value, name
+        else:
+            assert np.isclose(float(row[name]), float(value), equal_nan=True), name
+
+class TestBehavioralFeaturesBatch:
+    """Test per le feature comportamentali calcolate su molti utenti"""
+
+    @pytest.mark.parametrize("sessions", [True, False])
+    def test_batch_matches_per_user(self, sessions):
+        """Test parità con la funzione per utente, utente per utente"""
+        engineer = AdvancedFeatureEngineer()
+        activity = make_activity(sessions=sessions)
+        batch = engineer.create_behavioral_features_batch(activity)
+
+        assert sorted(batch.index) == sorted(activity['user_id'].unique())
+        for user_id, rows in activity.groupby('user_id'):
+            records = rows.drop(columns='user_id').to_dict('records')
+            expected = engineer.create_behavioral_features(records)
+            assert_same_features(expected, batch.loc[user_id])
+
+            # Tipi di attività mai svolti: conteggio 0 invece di chiave assente
+            for activity_type in ACTIVITY_TYPES:
+                if f'activity_{activity_type}_count' not in expected and f'activity_{activity_type}_count' in batch:
+                    assert batch.loc[user_id, f'activity_{activity_type}_count'] == 0
+
+    def test_users_without_activity_get_defaults(self):
+        """Test utenti richiesti senza attività"""
+        engineer = AdvancedFeatureEngineer()
+        activity = make_activity(users=3, sessions=False)
+        batch = engineer.create_behavioral_features_batch(activity, user_ids=['user-01', 'missing'])
+
+        assert list(batch.index) == ['user-01', 'missing']
+        assert_same_features(engineer._default_behavioral_features(), batch.loc['missing'])
+        assert batch.filter(like='_count').loc['missing'].sum() == 0
+
+        empty = engineer.create_behavioral_features_batch(activity.iloc[:0], user_ids=['missing'])
+        assert_same_features(engineer._default_behavioral_features(), empty.loc['missing'])
+
+    def test_temporal_batch_matches_per_user(self):
+        """Test medie temporali cicliche raggruppate per utente"""
+        engineer = AdvancedFeatureEngineer()
+        activity = make_activity(users=10, sessions=False)
+        batch = engineer.summarize_temporal_features_batch(activity)
+
+        for user_id, rows in activity.groupby('user_id'):
+            expected = engineer.summarize_temporal_features(rows.to_dict('records'))
+            assert_same_features(expected, batch.loc[user_id])
+
+    def test_feature_frame_runs_in_process_pool(self):
+        """Test feature di molti utenti calcolate in un processo worker come sui thread"""
+        engineer = AdvancedFeatureEngineer()
+        activity = make_activity(users=5, sessions=False, seed=7)
+        by_user = {user_id: rows.drop(columns='user_id').to_dict('records') for user_id, rows in activity.groupby('user_id')}
+        user_ids = sorted(by_user) + ['missing']
+        stats = {user_id: {'level': 2, 'xp_points': 100} for user_id in by_user}
+        expected = _compute_feature_frame(engineer, user_ids, stats, by_user)
+
+        executor = ComputeExecutor(kind='process', max_workers=1)
+        try:
+            frame = asyncio.run(executor.run(_compute_feature_frame, engineer, user_ids, stats, by_user,
+                                             label='bulk_features', process_safe=True))
+        finally:
+            executor.shutdown()
+
+        pd.testing.assert_frame_equal(frame, expected)
+        assert executor.get_metrics()['run_time']['bulk_features']['count'] == 1
+
+class TestBehavioralFeatureState:
+    """Test per lo stato incrementale delle feature comportamentali"""
+
+    @pytest.mark.parametrize("sessions", [True, False])
+    def test_state_matches_per_user(self, sessions):
+        """Test parità con la cronologia in ordine inverso (come dal database)"""
+        engineer = AdvancedFeatureEngineer()
+        for _, rows in make_activity(sessions=sessions, seed=1).groupby('user_id'):
+            records = rows.drop(columns='user_id').to_dict('records')
+            expected = engineer.create_behavioral_features(records)
+            features = BehavioralFeatureState.from_activity(records[::-1]).features()
+
+            assert features.keys() == expected.keys()
+            assert_same_features(expected, pd.Series(features))
+
+    def test_updates_match_recomputation(self):
+        """Test evento per evento: ogni prefisso della cronologia dà le feature ricalcolate"""
+        engineer = AdvancedFeatureEngineer()
+        activity = make_activity(users=3, seed=2)
+        records = activity[activity['user_id'] == 'user-01'].drop(columns='user_id').to_dict('records')
+        records.sort(key=lambda event: pd.Timestamp(event['timestamp']))
+
+        state = BehavioralFeatureState()
+        assert state.features() == engineer.create_behavioral_features([])
+        for i, event in enumerate(records, 1):
+            assert state.update(event)
+            assert_same_features(engineer.create_behavioral_features(records[:i]), pd.Series(state.features()))
+
+    def test_store_advances_from_history(self):
+        """Test stato costruito una volta, poi fatto avanzare con i soli eventi nuovi della cronologia"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        activity = make_activity(users=3, seed=3)
+        records = activity[activity['user_id'] == 'user-01'].drop(columns='user_id').to_dict('records')
+        records.sort(key=lambda event: pd.Timestamp(event['timestamp']), reverse=True)
+        latest = pd.Timestamp(records[0]['timestamp'])
+
+        store.features('user-01', records[3:])
+        # Cronologia dal database (più recenti prima): i tre eventi esclusi e due nuovi da applicare
+        new_events = [
+            {'activity_type': 'quiz', 'timestamp': (latest + pd.Timedelta(hours=2)).to_pydatetime(), 'session_id': 'new'},
+            {'activity_type': 'comment', 'timestamp': (latest + pd.Timedelta(hours=1)).to_pydatetime(), 'session_id': 'new'},
+        ]
+        history = new_events + records
+        features = store.features('user-01', history)
+
+        assert_same_features(engineer.create_behavioral_features(history), pd.Series(features))
+        assert features.keys() == engineer.create_behavioral_features(history).keys()
+        stats = store.get_stats()
+        assert stats['builds'] == 1 and stats['hits'] == 1 and stats['updates'] == 5
+
+        # Stessa cronologia in ordine crescente: nessun evento nuovo, nessun doppio conteggio
+        assert store.features('user-01', history[::-1]) == features
+        assert store.get_stats()['updates'] == 5
+
+        store.invalidate('user-01')
+        assert store.features('user-01', []) == engineer._default_behavioral_features()
+
+    def test_store_sessions_only_from_history(self):
+        """Test feature di sessione solo se la cronologia porta session_id"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        activity = make_activity(users=3, sessions=False, seed=4)
+        records = activity[activity['user_id'] == 'user-01'].drop(columns='user_id').to_dict('records')
+
+        features = store.features('user-01', records)
+        later = max(pd.Timestamp(event['timestamp']) for event in records) + pd.Timedelta(hours=1)
+        history = [{'activity_type': 'quiz', 'timestamp': later.to_pydatetime()}] + records
+        features = store.features('user-01', history)
+
+        assert 'avg_session_length' not in features
+        assert features.keys() == engineer.create_behavioral_features(history).keys()
+
+    def test_store_rebuilds_when_events_leave_the_window(self):
+        """Test eventi usciti dalla finestra della cronologia: ricostruzione, non solo aggiunte"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        records = make_activity(users=3, seed=5)
+        records = records[records['user_id'] == 'user-01'].drop(columns='user_id').to_dict('records')
+        records.sort(key=lambda event: pd.Timestamp(event['timestamp']), reverse=True)
+        latest = pd.Timestamp(records[0]['timestamp'])
+
+        store.features('user-01', records)
+        # La finestra scorre: un evento nuovo entra, i due più vecchi escono
+        history = [{'activity_type': 'quiz', 'timestamp': (latest + pd.Timedelta(days=1)).to_pydatetime(),
+                    'session_id': 'new'}] + records[:-2]
+        features = store.features('user-01', history)
+
+        assert_same_features(engineer.create_behavioral_features(history), pd.Series(features))
+        assert store.get_stats()['builds'] == 2
+        assert store.features('user-01', []) == engineer._default_behavioral_features()
+
+    def test_store_applies_events_tied_with_the_watermark(self):
+        """Test evento nuovo con lo stesso timestamp dell'ultimo applicato"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        latest = datetime(2024, 3, 10, 12, tzinfo=timezone.utc)
+        records = [
+            {'activity_type': 'comment', 'timestamp': latest},
+            {'activity_type': 'quiz', 'timestamp': latest - timedelta(hours=3)},
+        ]
+        store.features('user-01', records)
+
+        history = [{'activity_type': 'quiz', 'timestamp': latest}] + records
+        features = store.features('user-01', history)
+        assert features['activity_quiz_count'] == 2 and features['activity_comment_count'] == 1
+
+        # Ripetere la stessa cronologia non riapplica i pari merito già contati
+        assert store.features('user-01', history) == features
+        assert store.get_stats()['updates'] == 1
+        assert features.keys() == engineer.create_behavioral_features(history).keys()
+
+    def test_monitor_events_are_matched_to_history_rows(self):
+        """Test evento del monitor applicato subito e riconosciuto nella riga del database"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        records = make_activity(users=3, sessions=False, seed=6)
+        records = records[records['user_id'] == 'user-01'].drop(columns='user_id').to_dict('records')
+        records.sort(key=lambda event: pd.Timestamp(event['timestamp']), reverse=True)
+        latest = max(pd.Timestamp(event['timestamp']) for event in records)
+        observed_at = latest + pd.Timedelta(hours=1)
+
+        assert not store.observe('user-01', {'activity_type': 'quiz', 'timestamp': observed_at.isoformat()})
+        store.features('user-01', records)
+        # Evento del monitor: timestamp naive in UTC e session_id che il database non ha
+        assert store.observe('user-01', {
+            'activity_type': 'quiz', 'session_id': 'monitor-session',
+            'timestamp': observed_at.tz_convert(None).isoformat(),
+        })
+        warm = store.features('user-01', records)
+        assert warm['activity_quiz_count'] == engineer.create_behavioral_features(records).get('activity_quiz_count', 0) + 1
+        assert 'avg_session_length' not in warm
+
+        # La riga del database arriva qualche secondo dopo: contata una volta sola
+        history = [{'activity_type': 'quiz', 'timestamp': (observed_at + pd.Timedelta(seconds=2)).to_pydatetime()}]
+        history += records
+        features = store.features('user-01', history)
+
+        assert_same_features(engineer.create_behavioral_features(history), pd.Series(features))
+        assert store.get_stats()['matched'] == 1 and store.get_stats()['builds'] == 1
+
+    def test_matched_event_moves_to_the_database_hour(self):
+        """Test riga del database nell'ora prima dell'evento del monitor: istogrammi sull'orario della riga"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        records = [{'activity_type': 'quiz', 'timestamp': datetime(2024, 3, 10, 10, 20, tzinfo=timezone.utc)}]
+        store.features('user-01', records)
+
+        assert store.observe('user-01', {'activity_type': 'comment',
+                                         'timestamp': datetime(2024, 3, 10, 11, 0, 5, tzinfo=timezone.utc)})
+        history = [{'activity_type': 'comment',
+                    'timestamp': datetime(2024, 3, 10, 10, 59, 50, tzinfo=timezone.utc)}] + records
+        features = store.features('user-01', history)
+
+        expected = engineer.create_behavioral_features(history)
+        assert np.isnan(expected['activity_concentration'])
+        assert_same_features(expected, pd.Series(features))
+        assert store.get_stats()['matched'] == 1 and store.get_stats()['builds'] == 1
+
+        # Lo stato spostato continua ad avanzare in parità
+        history = [{'activity_type': 'material', 'timestamp': datetime(2024, 3, 10, 11, 30, tzinfo=timezone.utc)}] + history
+        assert_same_features(engineer.create_behavioral_features(history), pd.Series(store.features('user-01', history)))
+
+    def test_out_of_order_matches_rebuild_the_state(self):
+        """Test riga del database che cambia posizione rispetto agli eventi già applicati: ricostruzione"""
+        engineer = AdvancedFeatureEngineer()
+        at = lambda minutes, seconds=0: datetime(2024, 3, 10, 11, tzinfo=timezone.utc) + timedelta(minutes=minutes, seconds=seconds)
+        records = [{'activity_type': 'quiz', 'timestamp': at(-60)}]
+        cases = [
+            # Riga che il monitor non ha visto, ordinata prima di quella dell'evento osservato
+            [{'activity_type': 'comment', 'timestamp': at(0)}, {'activity_type': 'material', 'timestamp': at(-1)}],
+            # Riga dell'evento osservato più vecchia di un evento del monitor arrivato dopo
+            [{'activity_type': 'comment', 'timestamp': at(0, -20)}, {'activity_type': 'material', 'timestamp': at(0, -10)}],
+        ]
+        for rows in cases:
+            store = BehavioralStateStore()
+            store.features('user-01', records)
+            assert store.observe('user-01', {'activity_type': 'comment', 'timestamp': at(0, 5)})
+            if rows[1]['timestamp'] > rows[0]['timestamp']:
+                assert store.observe('user-01', {'activity_type': 'material', 'timestamp': at(0, 10)})
+
+            history = rows + records
+            features = store.features('user-01', history)
+
+            expected = engineer.create_behavioral_features(history)
+            assert features.keys() == expected.keys()
+            assert_same_features(expected, pd.Series(features))
+            assert store.get_stats()['builds'] == 2
+
+    def test_observed_events_match_full_recomputation(self):
+        """Test monitor + cronologia: le feature restano quelle ricalcolate sull'intera cronologia"""
+        engineer = AdvancedFeatureEngineer()
+        store = BehavioralStateStore()
+        records = make_activity(users=3, sessions=False, seed=7)
+        records = records[records['user_id'] == 'user-01'].drop(columns='user_id').to_dict('records')
+        records.sort(key=lambda event: pd.Timestamp(event['timestamp']), reverse=True)
+        latest = max(pd.Timestamp(event['timestamp']) for event in records)
+        at = lambda minutes: (latest + pd.Timedelta(minutes=minutes)).to_pydatetime()
+
+        store.features('user-01', records)
+        # Il monitor vede una attività che il database registrerà
+        assert store.observe('user-01', {'activity_type': 'comment', 'timestamp': at(10)})
+
+        # Prima lettura: arriva la riga del commento, qualche secondo dopo il monitor
+        history = [{'activity_type': 'comment', 'timestamp': at(10) + timedelta(seconds=3)}] + records
+        store.features('user-01', history)
+        assert store.get_stats()['matched'] == 1 and store.get_stats()['dropped'] == 0
+
+        # Poi una attività che il database non registrerà mai e un tipo che la cronologia
+        # non restituisce (rifiutato)
+        assert store.observe('user-01', {'activity_type': 'quiz', 'timestamp': at(20)})
+        assert not store.observe('user-01', {'activity_type': 'login', 'timestamp': at(25)})
+        history = [{'activity_type': 'comment', 'timestamp': at(15)}] + history
+        store.features('user-01', history)
+        assert store.get_stats()['dropped'] == 0
+
+        # La cronologia supera il quiz senza riportarlo: scartato subito, non al TTL
+        history = [{'activity_type': 'material', 'timestamp': at(90)}] + history
+        features = store.features('user-01', history)
+
+        expected = engineer.create_behavioral_features(history)
+        assert features.keys() == expected.keys()
+        assert_same_features(expected, pd.Series(features))
+        assert store.get_stats()['dropped'] == 1
+
+        # Le letture successive avanzano di nuovo in modo incrementale, sempre in parità
+        history = [{'activity_type': 'quiz', 'timestamp': at(120)}] + history
+        features = store.features('user-01', history)
+        assert_same_features(engineer.create_behavioral_features(history), pd.Series(features))
+        assert store.get_stats()['builds'] == 2
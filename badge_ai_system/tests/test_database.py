@@ -0,0 +1,348 @@
+"""
+TEST SUITE FOR DATABASE ACCESS
+==============================
+
+Verifica le funzioni di app.database sul percorso Supabase contro un finto
+PostgREST in memoria: paginazione delle attività recenti oltre max-rows,
+streaming degli utenti a keyset, anche con created_at NULL, e statistiche
+utente senza la RPC con poche letture raggruppate.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app import database
+from app.database import (
+    db_manager, get_recent_user_activity, get_recent_user_activity_many, get_user_stats_many, iter_users
+)
+
+OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+}
+
+def split_top_level(expression):
+    """Condizioni separate da virgola fuori dalle parentesi e dalle virgolette"""
+    parts, depth, quoted, current = [], 0, False, ''
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char in '()':
+            depth += 1 if char == '(' else -1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    return parts + [current]
+
+def logic_tree(expression, combine=any):
+    """Predicato di un albero logico PostgREST (or=(...), and(...))"""
+    conditions = []
+    for part in split_top_level(expression):
+        if part.startswith('and('):
+            conditions.append(logic_tree(part[4:-1], combine=all))
+            continue
+        column, operator, value = part.split('.', 2)
+        value = value.strip('"')
+        conditions.append(lambda row, c=column, o=operator, v=value:
+                          row.get(c) is not None and OPERATORS[o](str(row[c]), v))
+    return lambda row: combine(match(row) for match in conditions)
+
+class FakeRequest:
+    """Request builder PostgREST su righe in memoria, con il troncamento di max-rows"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.orders = []
+        self.window = None
+
+    def select(self, columns, count=None, head=None):
+        self.columns = columns.split(',')
+        self.count, self.head = count, head
+        return self
+
+    def in_(self, column, values):
+        values = {str(value) for value in values}
+        self.filters.append(lambda row: str(row.get(column)) in values)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def is_(self, column, value):
+        assert value == 'null'
+        negate, self.negate = getattr(self, 'negate', False), False
+        self.filters.append(lambda row: (row.get(column) is None) != negate)
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def or_(self, expression):
+        self.filters.append(logic_tree(expression))
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end + 1)
+        return self
+
+    def limit(self, count):
+        self.window = (0, count)
+        return self
+
+    async def execute(self):
+        self.client.requests.append(self)
+        rows = [row for row in self.client.tables[self.table] if all(match(row) for match in self.filters)]
+        for column, desc in reversed(self.orders):
+            # NULLS LAST in ordine crescente, come PostgreSQL
+            rows.sort(key=lambda row: (row[column] is None, row[column] or ''), reverse=desc)
+        if self.window is not None:
+            rows = rows[self.window[0]:self.window[1]]
+        # PostgREST non restituisce mai più di max-rows righe, senza errori
+        count = len(rows) if self.count == 'exact' else None
+        # Conteggio senza righe (HEAD): max-rows non lo limita
+        rows = [] if self.head else rows[:self.client.max_rows]
+        return SimpleNamespace(data=[{column: row[column] for column in self.columns} for row in rows], count=count)
+
+class MissingRpc:
+    """RPC non deployata: PostgREST risponde PGRST202 (o l'errore del client)"""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.table = f'rpc:{name}'
+
+    async def execute(self):
+        self.client.requests.append(self)
+        raise self.client.rpc_error
+
+class FakeSupabase:
+    def __init__(self, tables, max_rows=1000):
+        self.tables = {name: list(rows) for name, rows in tables.items()}
+        self.max_rows = max_rows
+        self.requests = []
+        self.rpc_error = RuntimeError("PGRST202: Could not find the function in the schema cache")
+
+    def table(self, name):
+        self.tables.setdefault(name, [])
+        return FakeRequest(self, name)
+
+    def rpc(self, name, params):
+        return MissingRpc(self, name)
+
+@pytest.fixture
+def supabase(monkeypatch):
+    """db_manager sul percorso Supabase con un client finto asincrono"""
+    def install(tables, max_rows=1000):
+        client = FakeSupabase(tables, max_rows)
+        monkeypatch.setattr(db_manager, 'use_supabase', True)
+        monkeypatch.setattr(db_manager, 'supabase', client)
+        monkeypatch.setattr(db_manager, '_supabase_is_async', True)
+        monkeypatch.setattr(db_manager, '_supabase_semaphore', asyncio.Semaphore(4))
+        monkeypatch.setattr(db_manager, '_rpc_disabled_until', {})
+        return client
+    return install
+
+def activity_tables(users=('u1', 'u2', 'u3'), per_user=7):
+    """Quiz recenti per utente: u1 ha le attività più recenti, u3 le più vecchie"""
+    now = datetime.utcnow()
+    rows = []
+    for rank, user_id in enumerate(users):
+        for i in range(per_user):
+            completed_at = (now - timedelta(days=rank * 5, hours=i)).isoformat()
+            rows.append({'id': f'{user_id}-{i}', 'user_id': user_id, 'completed_at': completed_at, 'score': i})
+    return {'quiz_attempts': rows}
+
+class TestRecentActivity:
+    """Test per le attività recenti su Supabase"""
+
+    def test_many_users_are_paged_past_max_rows(self, supabase, monkeypatch):
+        """Test nessuna riga persa per troncamento di max-rows con molti utenti"""
+        monkeypatch.setattr(database, 'SUPABASE_PAGE_SIZE', 4)
+        client = supabase(activity_tables(), max_rows=4)
+
+        activity = asyncio.run(get_recent_user_activity_many(['u1', 'u2', 'u3'], days=30, limit=5))
+
+        assert {user_id: len(rows) for user_id, rows in activity.items()} == {'u1': 5, 'u2': 5, 'u3': 5}
+        # u3 ha le attività più vecchie: senza paginazione sarebbero oltre la prima pagina
+        assert [row['metadata'] for row in activity['u3']] == [0, 1, 2, 3, 4]
+        quiz_requests = [request for request in client.requests if request.table == 'quiz_attempts']
+        assert len(quiz_requests) == 6
+
+    def test_single_user_stops_at_limit(self, supabase, monkeypatch):
+        """Test un solo utente: solo le righe necessarie al limite"""
+        monkeypatch.setattr(database, 'SUPABASE_PAGE_SIZE', 4)
+        client = supabase(activity_tables(), max_rows=4)
+
+        rows = asyncio.run(get_recent_user_activity('u2', days=30, limit=6))
+
+        assert [row['metadata'] for row in rows] == [0, 1, 2, 3, 4, 5]
+        assert [request.window for request in client.requests if request.table == 'quiz_attempts'] == [(0, 4), (4, 6)]
+
+def user_rows(count, undated=()):
+    """Utenti con created_at a coppie uguali (pareggi sul keyset) e alcuni senza created_at"""
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        user_id = f'user-{i:03d}'
+        created_at = None if user_id in undated else (start + timedelta(days=i // 2)).isoformat()
+        rows.append({'id': user_id, 'email': f'{user_id}@example.com', 'level': 1, 'xp_points': 0,
+                     'created_at': created_at})
+    return {'users': rows}
+
+async def stream_users(**kwargs):
+    return [user async for user in iter_users(**kwargs)]
+
+class TestIterUsers:
+    """Test per lo streaming degli utenti a keyset su Supabase"""
+
+    def test_pages_cover_every_user_once(self, supabase):
+        """Test pagine a cavallo di created_at uguali senza duplicati né buchi"""
+        client = supabase(user_rows(11))
+
+        users = asyncio.run(stream_users(batch_size=4))
+
+        assert [user['id'] for user in users] == [f'user-{i:03d}' for i in range(11)]
+        assert len([request for request in client.requests if request.table == 'users']) == 4
+
+    def test_null_created_at_does_not_end_the_stream(self, supabase):
+        """Test utenti senza created_at in coda, ordinati per id, senza perdere i successivi"""
+        supabase(user_rows(10, undated={'user-002', 'user-007', 'user-009'}))
+
+        users = asyncio.run(stream_users(batch_size=3))
+
+        ids = [user['id'] for user in users]
+        assert sorted(ids) == [f'user-{i:03d}' for i in range(10)]
+        assert ids[-3:] == ['user-002', 'user-007', 'user-009']
+        assert len(ids) == len(set(ids))
+
+    def test_since_skips_null_created_at(self, supabase):
+        """Test since: solo gli utenti creati dopo, nessun utente senza created_at"""
+        supabase(user_rows(10, undated={'user-009'}))
+
+        users = asyncio.run(stream_users(batch_size=2, since=datetime(2024, 1, 3)))
+
+        assert [user['id'] for user in users] == [f'user-{i:03d}' for i in range(4, 9)]
+
+def stats_tables(users=('u1', 'u2', 'u3')):
+    """Utenti con 0..n righe per tabella di attività (u3 senza attività)"""
+    tables = {'users': [{'id': user_id, 'level': 2, 'xp_points': 10 * i, 'total_active_days': i,
+                         'consecutive_active_days': 1, 'created_at': '2024-01-01T00:00:00'}
+                        for i, user_id in enumerate(users)]}
+    per_user = {'u1': 5, 'u2': 2}
+    for key, (table, column) in database.USER_COUNTER_SOURCES.items():
+        tables[table] = [{'id': f'{table}-{user_id}-{i}', column: user_id}
+                         for user_id, count in per_user.items() for i in range(count)]
+    return tables
+
+class TestUserStatsFallback:
+    """Test per le statistiche utente quando la RPC non è deployata"""
+
+    def test_counts_with_head_requests(self, supabase, caplog):
+        """Test conteggi HEAD per tabella e utente: nessuna riga di attività trasferita"""
+        client = supabase(stats_tables(), max_rows=3)
+
+        with caplog.at_level('WARNING'):
+            stats = asyncio.run(get_user_stats_many(['u1', 'u2', 'u3', 'missing']))
+
+        assert set(stats) == {'u1', 'u2', 'u3'}
+        for key in database.USER_COUNTER_SOURCES:
+            assert (stats['u1'][key], stats['u2'][key], stats['u3'][key]) == (5, 2, 0)
+        assert stats['u2']['xp_points'] == 10
+        assert 'email' not in stats['u1'] and 'full_name' not in stats['u1']
+
+        # u1 ha 5 righe per tabella, oltre max-rows: contate dal server
+        for table, _ in database.USER_COUNTER_SOURCES.values():
+            requests = [r for r in client.requests if r.table == table]
+            assert len(requests) == 4 and all(r.head and r.count == 'exact' for r in requests)
+        assert len([r for r in client.requests if r.table == 'users']) == 1
+
+    def test_missing_rpc_is_not_retried_every_call(self, supabase, caplog):
+        """Test RPC assente: una sola chiamata e un solo avviso, poi solo il fallback fino al nuovo tentativo"""
+        client = supabase(stats_tables())
+
+        with caplog.at_level('WARNING'):
+            asyncio.run(get_user_stats_many(['u1']))
+            asyncio.run(get_user_stats_many(['u2']))
+
+        assert len([r for r in client.requests if r.table == f'rpc:{database.USER_STATS_RPC}']) == 1
+        assert len([record for record in caplog.records if 'not deployed' in record.message]) == 1
+
+    def test_forbidden_rpc_is_not_retried_every_call(self, supabase):
+        """Test RPC senza GRANT (42501 / 401 / 403): stessa attesa di una RPC assente"""
+        for code in ('42501', '401', '403'):
+            client = supabase(stats_tables())
+            client.rpc_error = RuntimeError("permission denied for function")
+            client.rpc_error.code = code
+
+            asyncio.run(get_user_stats_many(['u1']))
+            asyncio.run(get_user_stats_many(['u2']))
+
+            assert len([r for r in client.requests if r.table == f'rpc:{database.USER_STATS_RPC}']) == 1
+
+    def test_transient_rpc_errors_are_retried(self, supabase):
+        """Test timeout o 5xx: il fallback risponde solo alla chiamata fallita"""
+        client = supabase(stats_tables())
+        client.rpc_error = RuntimeError("upstream timeout")
+        client.rpc_error.code = '504'
+
+        asyncio.run(get_user_stats_many(['u1']))
+        asyncio.run(get_user_stats_many(['u2']))
+
+        assert len([r for r in client.requests if r.table == f'rpc:{database.USER_STATS_RPC}']) == 2
+
+class TestActivityMetadata:
+    """Test per il tipo di metadata uguale su PostgreSQL e Supabase"""
+
+    def test_postgres_queries_return_jsonb_metadata(self):
+        """Test metadata come jsonb (non testo) in ogni query delle attività recenti"""
+        for name in ('recent_activity', 'recent_activity_limited', 'recent_activity_many'):
+            sql = database.NAMED_QUERIES[name]
+            assert '::text as metadata' not in sql
+            for _, _, _, _, meta_col in database.ACTIVITY_SOURCES:
+                assert f'to_jsonb({meta_col}) as metadata' in sql
+
+    def test_pool_connection_decodes_jsonb_before_preparing(self):
+        """Test codec jsonb registrato prima di preparare le query nominate"""
+        calls = []
+
+        class Connection:
+            async def set_type_codec(self, type_name, encoder, decoder, schema):
+                calls.append(('codec', type_name, schema))
+                assert decoder('{"score": 7}') == {'score': 7} and decoder('7') == 7
+
+            async def prepare_named_queries(self):
+                calls.append(('prepare',))
+
+        asyncio.run(database._init_pool_connection(Connection()))
+        assert calls == [('codec', 'jsonb', 'pg_catalog'), ('prepare',)]
+
+    def test_supabase_metadata_keeps_json_types(self, supabase):
+        """Test punteggi numerici e testo come li restituisce PostgREST"""
+        supabase(activity_tables(users=('u1',), per_user=2))
+
+        rows = asyncio.run(get_recent_user_activity('u1', days=30))
+
+        assert [row['metadata'] for row in rows] == [0, 1]
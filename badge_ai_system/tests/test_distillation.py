@@ -0,0 +1,109 @@
+"""
+TEST SUITE FOR STUDENT DISTILLATION
+===================================
+
+Verifica che lo studente imiti un teacher noto, che le metriche di fedeltà
+siano coerenti e che il controllo di distribuzione rimandi allo stack.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from ai.distillation import DistilledStudent, fidelity_report
+
+def make_teacher(rows: int = 600, features: int = 10, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features)).astype(np.float32)
+    Y = np.column_stack([
+        1 / (1 + np.exp(-(X[:, 0] + 0.5 * X[:, 1]))),
+        0.3 * X[:, 2] - 0.2 * X[:, 3],
+    ]).astype(np.float32)
+    return X, Y
+
+class TestDistillation:
+    """Test per lo studente distillato"""
+
+    def test_student_matches_teacher(self):
+        """Test fedeltà dello studente su un teacher liscio"""
+        X, Y = make_teacher()
+        student = DistilledStudent(hidden_layers=(32,), outputs=('engagement', 'retention'))
+        fidelity = student.fit(X, Y, teacher_seconds_per_row=1e-3)
+
+        assert student.is_trained
+        assert set(fidelity['outputs']) == {'engagement', 'retention'}
+        # Sopra il gate di default del motore (AI_STUDENT_MIN_R2=0.9): lo studente viene servito
+        assert fidelity['min_r2'] > 0.95
+        assert fidelity['samples'] == {'train': 480, 'holdout': 120}
+        assert fidelity['speedup'] > 1
+        assert student.fidelity_ok(0.9)
+        assert not student.fidelity_ok(1.01)
+
+        scores = student.predict_one(X[0])
+        assert set(scores) == {'engagement', 'retention'}
+        assert np.allclose(student.predict(X[:5])[0], list(scores.values()), atol=1e-5)
+
+    def test_default_student_on_single_output(self):
+        """Test architettura di default su una sola uscita con scala lontana da 1"""
+        X, Y = make_teacher(rows=300)
+        student = DistilledStudent(outputs=('xp',))
+        fidelity = student.fit(X, 1000 * Y[:, :1])
+
+        assert fidelity['min_r2'] > 0.95
+        assert student.predict(X[:3]).shape == (3, 1)
+
+    def test_out_of_distribution_input(self):
+        """Test rifiuto di input lontani dai dati di training"""
+        X, Y = make_teacher(rows=200)
+        student = DistilledStudent(hidden_layers=(8,), outputs=('engagement', 'retention'))
+        student.fit(X, Y)
+
+        assert student.in_distribution(X[0], max_z=6)
+        outlier = X[0].copy()
+        outlier[4] = 100.0
+        assert not student.in_distribution(outlier, max_z=6)
+
+    def test_fidelity_report(self):
+        """Test metriche su uscite note"""
+        teacher = np.array([[0.0], [1.0], [2.0], [3.0]])
+        student = teacher + np.array([[0.0], [0.1], [-0.1], [0.0]])
+        report = fidelity_report(teacher, student, ['score'], tolerance=0.05)['score']
+
+        assert np.isclose(report['max_abs_error'], 0.1)
+        assert np.isclose(report['mae'], 0.05)
+        assert report['agreement'] == 0.5
+        assert np.isclose(report['r2'], 1 - 0.02 / 5)
+
+class TestStudentServing:
+    """Test per lo stadio student_scores del motore"""
+
+    def test_stage_runs_off_the_event_loop_with_exact_counters(self, monkeypatch):
+        """Test stadio bloccante e contatori esatti con richieste concorrenti sui thread"""
+        ai_engine = pytest.importorskip("ai.ai_engine")
+        X, Y = make_teacher(rows=200)
+        student = DistilledStudent(hidden_layers=(8,), outputs=('engagement', 'retention'))
+        student.fit(X, Y)
+
+        engine = ai_engine.UltraAdvancedClas2eAI.__new__(ai_engine.UltraAdvancedClas2eAI)
+        engine.student_serving, engine.student_min_r2, engine.student_max_z = True, -1.0, 6.0
+        engine.student_stats = {'served': 0, 'fallback': {}}
+        engine._student_lock = threading.Lock()
+        monkeypatch.setattr(engine, '_serving_model', lambda name: student)
+        assert engine._build_analysis_graph().nodes['student_scores'].blocking
+
+        outlier = X[0].copy()
+        outlier[4] = 100.0
+        def score(rows):
+            for row in rows:
+                engine._student_scores(row)
+                engine._student_scores(outlier)
+        threads = [threading.Thread(target=score, args=(X[i * 25:(i + 1) * 25],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        report = engine.student_report()
+        assert report['served'] == 200
+        assert report['fallback'] == {'out_of_distribution': 200}
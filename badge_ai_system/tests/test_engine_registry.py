@@ -0,0 +1,119 @@
+"""
+TEST SUITE FOR LAZY ENGINE REGISTRY
+===================================
+
+Verifica che i motori vengano costruiti solo al primo accesso, una sola
+volta anche con accessi concorrenti, che il report ne tracci lo stato per
+istanza e che importare il motore AI non importi torch e pandas.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from ai.engine_registry import LazyEngine, LazyModule, engine_report, is_engine_loaded
+
+BUILDS = []
+
+class SlowEngine:
+    """Motore finto che conta le costruzioni"""
+
+    def __init__(self):
+        BUILDS.append(1)
+        time.sleep(0.01)
+        self.ready = True
+
+class BrokenEngine:
+    def __init__(self):
+        raise RuntimeError("missing dependency")
+
+class Host:
+    slow = LazyEngine("SlowEngine", "Slow engine")
+    stdlib = LazyEngine("collections:OrderedDict", "Imported by path")
+    broken = LazyEngine(BrokenEngine)
+
+class TestLazyEngine:
+    """Test per il registro lazy dei motori"""
+
+    def setup_method(self):
+        BUILDS.clear()
+
+    def test_built_on_first_access_only(self):
+        """Test costruzione al primo accesso e riuso successivo"""
+        host = Host()
+        assert not is_engine_loaded(host, 'slow')
+        assert BUILDS == []
+
+        first = host.slow
+        assert host.slow is first
+        assert BUILDS == [1]
+        assert is_engine_loaded(host, 'slow')
+        assert type(host.stdlib).__name__ == 'OrderedDict'
+
+    def test_concurrent_first_access_builds_once(self):
+        """Test accessi concorrenti con una sola costruzione"""
+        host = Host()
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(host.slow)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert BUILDS == [1]
+        assert all(engine is seen[0] for engine in seen)
+
+    def test_reassignment_and_report(self):
+        """Test riassegnazione dell'attributo e report di caricamento"""
+        host = Host()
+        host.slow = "loaded from disk"
+        assert host.slow == "loaded from disk"
+        assert BUILDS == []
+
+        with pytest.raises(RuntimeError):
+            host.broken
+
+        report = engine_report(host)
+        assert report['slow']['status'] == 'loaded'
+        assert report['stdlib']['status'] == 'pending'
+        assert report['broken']['status'] == 'failed'
+        assert 'missing dependency' in report['broken']['error']
+
+    def test_reports_are_per_instance(self):
+        """Test report di costruzione separati per ogni istanza"""
+        built, untouched = Host(), Host()
+        built.slow
+        with pytest.raises(RuntimeError):
+            built.broken
+
+        assert engine_report(built)['slow']['status'] == 'loaded'
+        assert engine_report(untouched)['slow']['status'] == 'pending'
+        assert engine_report(untouched)['broken']['status'] == 'pending'
+        assert 'seconds' in engine_report(built)['slow']
+
+class TestLazyImports:
+    """Test per le librerie pesanti importate al primo uso"""
+
+    def test_lazy_module_imports_on_first_attribute(self):
+        """Test modulo importato solo al primo accesso a un attributo"""
+        module = LazyModule("json")
+        assert module.dumps({"a": 1}) == '{"a": 1}'
+        assert module.is_imported
+
+    def test_engine_import_skips_torch_and_pandas(self):
+        """Test import di ai.ai_engine senza torch e pandas in sys.modules"""
+        pytest.importorskip("joblib")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = (
+            "import sys, ai.ai_engine; "
+            "print(sorted(name for name in ('torch', 'pandas') if name in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+        if result.returncode != 0:
+            pytest.skip(f"ai.ai_engine not importable here: {result.stderr.strip().splitlines()[-1]}")
+        assert result.stdout.strip() == "[]"
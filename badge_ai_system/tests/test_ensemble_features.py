@@ -0,0 +1,75 @@
+"""
+TEST SUITE FOR ENSEMBLE SINGLE-USER INPUT
+=========================================
+
+Verifica che la predizione da un dizionario di feature (senza le colonne di
+interazione del training) coincida con quella sul frame preprocessato, con
+e senza alberi compilati, e che le feature mancanti prendano il default.
+"""
+
+import numpy as np
+import pandas as pd
+import torch.nn as nn
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingRegressor, RandomForestClassifier
+from sklearn.feature_selection import SelectKBest, f_classif
+
+from ai.ai_engine import AdvancedEnsembleModel, AdvancedFeatureEngineer
+
+BASE = ['level', 'xp_points', 'total_quizzes', 'weekend_ratio']
+
+def trained_on_interactions() -> tuple:
+    """Ensemble addestrato come in _preprocess_training_frame: feature base più interazioni a coppie"""
+    rng = np.random.default_rng(0)
+    base = pd.DataFrame(rng.uniform(0, 10, size=(300, len(BASE))), columns=BASE)
+    X = AdvancedFeatureEngineer().create_interaction_features(base)
+    y = (X['level_total_quizzes_interaction'] > X['level_total_quizzes_interaction'].median()).astype(int)
+
+    model = AdvancedEnsembleModel()
+    model.feature_selector = SelectKBest(score_func=f_classif, k=8).fit(X, y)
+    X_selected = model.feature_selector.transform(X)
+    model.base_models = {
+        'random_forest': RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X_selected, y),
+        'extra_trees': ExtraTreesClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X_selected, y),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=10, max_depth=3, random_state=0).fit(X_selected, y),
+    }
+    model.meta_model = nn.Sequential(nn.Linear(5, 1), nn.Sigmoid())
+    model.is_trained = True
+    return base, X, model
+
+class TestEnsembleFeatures:
+    """Test per l'input dell'ensemble da un dizionario di feature"""
+
+    def test_interactions_rebuilt_from_base_features(self):
+        """Test interazioni e rapporti ricalcolati nell'ordine del training"""
+        base, X, model = trained_on_interactions()
+        derived = model._derived_columns()
+
+        assert derived['level_xp_points_interaction'] == ('level', 'xp_points', 'interaction')
+        assert derived['total_quizzes_weekend_ratio_ratio'] == ('total_quizzes', 'weekend_ratio', 'ratio')
+        assert len(derived) == len(X.columns) - len(BASE)
+
+        row = model._feature_row(base.iloc[0].to_dict(), list(X.columns))
+        assert np.allclose(row, X.iloc[0].to_numpy(dtype=np.float32), rtol=1e-5)
+
+    def test_predict_features_matches_processed_frame(self):
+        """Test dizionario di sole feature base uguale alla riga del frame preprocessato"""
+        base, X, model = trained_on_interactions()
+        features = {**base.iloc[3].to_dict(), 'most_common_transition': 'quiz->comment', 'user_embedding': [0.1]}
+        expected = float(model.predict(X.iloc[[3]])[0])
+
+        assert np.isclose(model.predict_features(features), expected, atol=1e-5)
+
+        model.compile(backend="inplace")
+        assert model.compiled is not None and model.compiled.feature_names is not None
+        assert np.isclose(model.predict_features(features), expected, atol=1e-5)
+
+    def test_missing_features_use_defaults(self):
+        """Test utente senza statistiche: nessun KeyError, level al default dello schema"""
+        _, X, model = trained_on_interactions()
+        row = model._feature_row({}, list(X.columns))
+
+        assert row[list(X.columns).index('level')] == 1.0
+        assert np.all(np.isfinite(row))
+        assert 0.0 <= model.predict_features({}) <= 1.0
+        model.compile(backend="inplace")
+        assert 0.0 <= model.predict_features({'xp_points': None}) <= 1.0
@@ -0,0 +1,125 @@
+"""
+TEST SUITE FOR ENSEMBLE THREAD BUDGET
+=====================================
+
+Verifica la divisione dei thread nativi tra predict concorrenti e membri,
+che il predict a blocchi coincida con quello in un solo blocco e che il
+budget venga riapplicato quando il modello viene caricato.
+"""
+
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+import torch.nn as nn
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingRegressor, RandomForestClassifier
+from sklearn.feature_selection import SelectKBest, f_classif
+
+from ai.ai_engine import AdvancedEnsembleModel, ensemble_thread_budget
+
+def trained_ensemble() -> tuple:
+    """Ensemble leggero (alberi sklearn e meta-modello lineare) senza build_ensemble"""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 8)), columns=[f"f{i}" for i in range(8)])
+    y = (X["f0"] + X["f3"] > 0).astype(int)
+
+    model = AdvancedEnsembleModel()
+    model.feature_selector = SelectKBest(score_func=f_classif, k=4).fit(X, y)
+    X_selected = model.feature_selector.transform(X)
+    model.base_models = {
+        'random_forest': RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X_selected, y),
+        'extra_trees': ExtraTreesClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X_selected, y),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=10, max_depth=3, random_state=0).fit(X_selected, y),
+    }
+    # Due colonne di probabilità per classificatore, una per il regressore
+    model.meta_model = nn.Sequential(nn.Linear(5, 1), nn.Sigmoid())
+    model.is_trained = True
+    return X, model
+
+class TestEnsembleThreadBudget:
+    """Test per il budget dei thread nativi dell'ensemble"""
+
+    def test_budget_split_across_predicts_and_members(self):
+        """Test core divisi tra predict concorrenti, poi tra i membri multi-thread"""
+        names = ['xgboost', 'lightgbm', 'random_forest', 'gradient_boosting']
+
+        assert ensemble_thread_budget(names, total=32, concurrency=2) == {
+            'xgboost': 5, 'lightgbm': 5, 'random_forest': 5, 'gradient_boosting': 1
+        }
+        # Mai meno di un thread, anche con più predict concorrenti che core
+        assert ensemble_thread_budget(names, total=4, concurrency=8) == {
+            'xgboost': 1, 'lightgbm': 1, 'random_forest': 1, 'gradient_boosting': 1
+        }
+
+    def test_budget_from_environment(self, monkeypatch):
+        """Test AI_ENSEMBLE_THREADS e AI_ENSEMBLE_CONCURRENCY"""
+        monkeypatch.setenv('AI_ENSEMBLE_THREADS', '16')
+        monkeypatch.setenv('AI_ENSEMBLE_CONCURRENCY', '4')
+        assert ensemble_thread_budget(['random_forest', 'extra_trees']) == {'random_forest': 2, 'extra_trees': 2}
+
+    def test_total_threads_never_exceed_budget(self):
+        """Test thread di tutti i predict concorrenti entro il totale"""
+        names = ['xgboost', 'lightgbm', 'catboost', 'random_forest', 'extra_trees', 'gradient_boosting']
+        for total in (6, 8, 16, 64):
+            for concurrency in (1, 2, 4):
+                if total // concurrency >= len(names):
+                    budget = ensemble_thread_budget(names, total=total, concurrency=concurrency)
+                    assert sum(budget.values()) * concurrency <= total
+
+    def test_chunked_predict_matches_single_chunk(self):
+        """Test predict a blocchi di righe uguale al predict in un solo blocco"""
+        X, model = trained_ensemble()
+        expected = model.predict(X)
+
+        model.predict_chunk_rows = 64
+        chunked = model.predict(X)
+
+        assert chunked.shape == (len(X),)
+        assert np.allclose(chunked, expected)
+        assert model.get_timings()['rows_predicted'] == 2 * len(X)
+
+    def test_concurrent_predicts_are_bounded(self, monkeypatch):
+        """Test predict oltre la concorrenza configurata in attesa di uno slot"""
+        X, model = trained_ensemble()
+        monkeypatch.setattr(AdvancedEnsembleModel, '_predict_slots', threading.BoundedSemaphore(1))
+        active, peak, lock = [0], [0], threading.Lock()
+        run_members = model._run_members
+
+        def counting_run_members(fn):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                return run_members(fn)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        model._run_members = counting_run_members
+        threads = [threading.Thread(target=model.predict, args=(X,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 1
+        assert model.get_timings()['rows_predicted'] == 4 * len(X)
+
+    def test_setstate_reapplies_budget(self, monkeypatch):
+        """Test modello caricato con il budget della macchina che lo serve"""
+        X, model = trained_ensemble()
+        monkeypatch.setenv('AI_ENSEMBLE_THREADS', '64')
+        monkeypatch.setenv('AI_ENSEMBLE_CONCURRENCY', '1')
+        model.apply_thread_budget()
+        assert model.base_models['random_forest'].n_jobs == 31
+        payload = pickle.dumps(model)
+
+        monkeypatch.setenv('AI_ENSEMBLE_THREADS', '8')
+        monkeypatch.setenv('AI_ENSEMBLE_CONCURRENCY', '2')
+        loaded = pickle.loads(payload)
+
+        assert loaded.base_models['random_forest'].n_jobs == 1
+        assert loaded.base_models['extra_trees'].n_jobs == 1
+        assert loaded.rows_predicted == 0 and loaded.compiled is None
+        assert np.allclose(loaded.predict(X), model.predict(X))
@@ -0,0 +1,90 @@
+"""
+TEST SUITE FOR MODEL INPUT SCHEMA
+=================================
+
+Verifica che il vettore di input dei modelli abbia ordine e lunghezza fissi,
+indipendenti dall'ordine del dizionario e dalle feature presenti, e che lo
+schema salvato con gli artefatti venga validato al caricamento.
+"""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ai.feature_schema import (
+    MODEL_SCHEMA, MODEL_FEATURES, MODEL_INPUT_SIZE, SCHEMA_FILE,
+    FeatureSchema, FeatureSchemaMismatch, parse_timestamp
+)
+from ai.model_registry import ModelIntegrityError
+
+USER = {
+    'id': 'u1', 'level': 3, 'xp_points': 120, 'total_active_days': 10,
+    'consecutive_active_days': 2, 'total_quizzes': 4, 'total_comments': 0,
+    'total_materials': 1, 'total_discussions': 5, 'peak_hour': 18, 'weekend_ratio': 0.25,
+}
+
+class TestFeatureSchema:
+    """Test per lo schema delle feature di input"""
+
+    def test_vector_is_deterministic(self):
+        """Test stesso vettore con chiavi in ordine diverso"""
+        shuffled = dict(reversed(list(USER.items())))
+        vector = MODEL_SCHEMA.assemble(USER)
+
+        assert vector.dtype == np.float32 and vector.shape == (MODEL_INPUT_SIZE,)
+        assert np.array_equal(vector, MODEL_SCHEMA.assemble(shuffled))
+        assert vector[MODEL_SCHEMA.index('peak_hour')] == 18
+        assert np.all(vector[len(MODEL_FEATURES):] == 0)
+
+    def test_interactions_and_defaults(self):
+        """Test interazioni calcolate sul vettore e default delle feature mancanti"""
+        vector = MODEL_SCHEMA.assemble(USER)
+        assert vector[MODEL_SCHEMA.index('level_xp_points_interaction')] == 360
+        assert np.isclose(vector[MODEL_SCHEMA.index('level_xp_points_ratio')], 3 / 120)
+        assert vector[MODEL_SCHEMA.index('activity_quiz_count')] == 0
+        assert np.isfinite(vector).all()
+
+        empty = MODEL_SCHEMA.assemble({'level': 'not a number'})
+        assert empty[MODEL_SCHEMA.index('level')] == 1.0
+
+    def test_batch_rows(self):
+        """Test matrice di batch preallocata, riga per record"""
+        batch = MODEL_SCHEMA.assemble_batch([USER, {}])
+        assert batch.shape == (2, MODEL_INPUT_SIZE)
+        assert np.array_equal(batch[0], MODEL_SCHEMA.assemble(USER))
+        assert np.array_equal(batch[1], MODEL_SCHEMA.assemble({}))
+
+    def test_save_load_and_validate(self, tmp_path):
+        """Test schema salvato con gli artefatti e confronto al caricamento"""
+        MODEL_SCHEMA.save(str(tmp_path))
+        loaded = FeatureSchema.load(str(tmp_path))
+        assert loaded.version == MODEL_SCHEMA.version
+        MODEL_SCHEMA.validate(loaded)
+
+        reordered = FeatureSchema(reversed(MODEL_SCHEMA.direct), MODEL_SCHEMA.interaction_base,
+                                  MODEL_SCHEMA.size, MODEL_SCHEMA.defaults)
+        with pytest.raises(FeatureSchemaMismatch, match="moved"):
+            MODEL_SCHEMA.validate(reordered)
+        assert issubclass(FeatureSchemaMismatch, ModelIntegrityError)
+
+        assert FeatureSchema.load(str(tmp_path / "missing")) is None
+
+    def test_tampered_schema_file(self, tmp_path):
+        """Test file dello schema modificato senza aggiornarne la versione"""
+        path = MODEL_SCHEMA.save(str(tmp_path))
+        with open(path) as f:
+            data = json.load(f)
+        data['defaults'] = {'level': 5.0}
+        with open(tmp_path / SCHEMA_FILE, "w") as f:
+            json.dump(data, f)
+
+        with pytest.raises(FeatureSchemaMismatch, match="corrupted"):
+            FeatureSchema.load(str(tmp_path))
+
+    def test_parse_timestamp(self):
+        """Test timestamp da asyncpg e da Supabase"""
+        assert parse_timestamp(datetime(2024, 1, 1, 8)).hour == 8
+        assert parse_timestamp("2024-01-01T08:30:00Z").hour == 8
+        assert parse_timestamp(None) is None
@@ -0,0 +1,69 @@
+"""
+TEST SUITE FOR INFERENCE MICRO-BATCHER
+======================================
+
+Verifica che le richieste concorrenti vengano accorpate in un solo
+forward pass e che ogni coroutine riceva il proprio risultato.
+"""
+
+import asyncio
+
+from ai.compute_executor import ComputeExecutor
+from ai.inference_batcher import MicroBatcher
+
+class RecordingForward:
+    """Finto modello che registra la dimensione di ogni batch"""
+
+    def __init__(self, fail: bool = False):
+        self.batch_sizes = []
+        self.fail = fail
+
+    def __call__(self, items):
+        self.batch_sizes.append(len(items))
+        if self.fail:
+            raise RuntimeError("boom")
+        return [item * 10 for item in items]
+
+class TestMicroBatcher:
+    """Test per il micro-batching dell'inferenza"""
+
+    def setup_method(self):
+        self.compute = ComputeExecutor(kind='thread', max_workers=2)
+
+    def teardown_method(self):
+        self.compute.shutdown()
+
+    def test_concurrent_requests_share_one_forward(self):
+        """Test richieste concorrenti servite da un unico batch"""
+        forward = RecordingForward()
+        batcher = MicroBatcher(forward, max_batch_size=32, max_wait_ms=20, compute=self.compute)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+
+        results = asyncio.run(scenario())
+        assert results == [i * 10 for i in range(8)]
+        assert forward.batch_sizes == [8]
+        assert batcher.get_metrics()['avg_batch_size'] == 8
+
+    def test_full_batch_flushes_immediately(self):
+        """Test flush a max_batch_size senza attendere il timer"""
+        forward = RecordingForward()
+        batcher = MicroBatcher(forward, max_batch_size=3, max_wait_ms=10_000, compute=self.compute)
+
+        async def scenario():
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(6))), timeout=2)
+
+        assert asyncio.run(scenario()) == [0, 10, 20, 30, 40, 50]
+        assert forward.batch_sizes == [3, 3]
+
+    def test_forward_error_reaches_every_caller(self):
+        """Test errore del forward propagato a tutte le richieste del batch"""
+        batcher = MicroBatcher(RecordingForward(fail=True), max_batch_size=4, max_wait_ms=5, compute=self.compute)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert batcher.get_metrics()['errors'] == 1
@@ -0,0 +1,42 @@
+"""
+TEST SUITE FOR WORKER MEMORY REPORT
+===================================
+
+Verifica il parsing di smaps_rollup e il report del processo corrente.
+"""
+
+import os
+
+from app.memory import parse_smaps_rollup, process_memory
+
+SMAPS_ROLLUP = """00400000-7ffd5a1ff000 ---p 00000000 00:00 0                          [rollup]
+Rss:              204800 kB
+Pss:               51200 kB
+Shared_Clean:     153600 kB
+Shared_Dirty:       2048 kB
+Private_Clean:      1024 kB
+Private_Dirty:     48128 kB
+Referenced:       204800 kB
+"""
+
+class TestWorkerMemory:
+    """Test per il report di memoria dei worker"""
+
+    def test_parse_smaps_rollup(self):
+        """Test conversione in MB e somme shared/private"""
+        memory = parse_smaps_rollup(SMAPS_ROLLUP)
+        assert memory['rss_mb'] == 200.0
+        assert memory['pss_mb'] == 50.0
+        assert memory['shared_mb'] == 152.0
+        assert memory['private_mb'] == 48.0
+        assert 'referenced_mb' not in memory
+
+    def test_parse_empty(self):
+        """Test output vuoto senza campi derivati"""
+        assert parse_smaps_rollup("") == {}
+
+    def test_current_process(self):
+        """Test report del processo corrente"""
+        memory = process_memory()
+        assert memory['pid'] == os.getpid()
+        assert memory.get('rss_mb', memory.get('peak_rss_mb', 0)) > 0
@@ -0,0 +1,50 @@
+"""
+TEST SUITE FOR QUERY METRICS
+============================
+
+Verifica istogrammi di latenza e contatori del pool di connessioni.
+"""
+
+from app.metrics import LatencyHistogram, QueryMetrics
+
+class TestQueryMetrics:
+    """Test per le metriche delle query nominate"""
+
+    def test_histogram_quantiles(self):
+        """Test quantili stimati dai bucket"""
+        histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        for seconds in [0.005] * 90 + [0.05] * 9 + [2.0]:
+            histogram.observe(seconds)
+
+        assert histogram.quantile(0.5) == 0.01
+        assert histogram.quantile(0.95) == 0.1
+        assert histogram.quantile(1.0) == 2.0
+
+        snapshot = histogram.snapshot()
+        assert snapshot['count'] == 100
+        assert snapshot['buckets'] == {'0.01': 90, '0.1': 99, '1.0': 99, '+Inf': 100}
+
+    def test_empty_histogram(self):
+        """Test istogramma vuoto"""
+        snapshot = LatencyHistogram().snapshot()
+        assert snapshot['count'] == 0
+        assert snapshot['p99_ms'] is None
+
+    def test_query_and_pool_counters(self):
+        """Test righe, errori e acquire/release del pool"""
+        metrics = QueryMetrics()
+        metrics.record_acquire(0.002)
+        metrics.observe_query('user_stats_many', 0.02, 3)
+        metrics.observe_query('user_stats_many', 0.04, 5)
+        metrics.record_error('badge_eligibility')
+        metrics.record_release()
+        metrics.record_acquire(0.001)
+
+        snapshot = metrics.snapshot()
+        stats = snapshot['queries']['user_stats_many']
+        assert stats['latency']['count'] == 2
+        assert stats['rows'] == {'total': 8, 'max': 5, 'last': 5}
+        assert snapshot['queries']['badge_eligibility']['errors'] == 1
+        assert snapshot['pool']['acquire_count'] == 2
+        assert snapshot['pool']['in_use'] == 1
+        assert snapshot['pool']['wait']['count'] == 2
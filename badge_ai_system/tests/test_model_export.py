@@ -0,0 +1,93 @@
+"""
+TEST SUITE FOR DEEP MODEL EXPORT
+================================
+
+Verifica che gli artefatti TorchScript superino il controllo di parità con
+il modello eager, che artefatti non validati o assenti facciano ricadere il
+serving sul modello eager e che un backend sconosciuto venga rifiutato.
+"""
+
+import json
+import os
+
+import pytest
+import torch
+import torch.nn as nn
+
+from ai.model_export import (
+    MANIFEST_FILE, PARITY_TOLERANCE, artifact_path, check_parity, export_deep_models,
+    inference_backend, load_inference_model, reference_batch, trace
+)
+
+INPUT_SIZE = 8
+
+def make_model() -> nn.Module:
+    torch.manual_seed(0)
+    return nn.Sequential(nn.Linear(INPUT_SIZE, 16), nn.ReLU(), nn.Linear(16, 1)).eval()
+
+class TestModelExport:
+    """Test per l'export e il caricamento dei modelli di inferenza"""
+
+    def test_traced_model_passes_parity(self):
+        """Test modello tracciato entro la tolleranza TorchScript"""
+        model = make_model()
+        batch = reference_batch(INPUT_SIZE, batch_size=16)
+        parity = check_parity(model, trace(model, batch[:1]), batch, PARITY_TOLERANCE['torchscript'])
+
+        assert parity['passed']
+        assert parity['max_abs_error'] <= 1e-6
+
+    def test_parity_fails_for_a_different_model(self):
+        """Test candidato con pesi diversi rifiutato"""
+        model, other = make_model(), nn.Sequential(nn.Linear(INPUT_SIZE, 1)).eval()
+        batch = reference_batch(INPUT_SIZE, batch_size=16)
+
+        assert not check_parity(model, other, batch, PARITY_TOLERANCE['torchscript'])['passed']
+
+    def test_export_then_serve_torchscript(self, tmp_path):
+        """Test artefatto esportato, registrato nel manifest e servito"""
+        model = make_model()
+        manifest = export_deep_models({'lstm_predictor': model}, INPUT_SIZE, str(tmp_path))
+
+        assert manifest['lstm_predictor']['torchscript']['passed']
+        served, backend = load_inference_model('lstm_predictor', model, str(tmp_path), backend='torchscript')
+        assert backend == 'torchscript' and served is not model
+
+        batch = reference_batch(INPUT_SIZE, batch_size=4)
+        with torch.no_grad():
+            assert torch.allclose(served(batch), model(batch), atol=1e-6)
+
+    def test_failed_or_missing_entry_falls_back_to_eager(self, tmp_path):
+        """Test parità fallita, voce assente nel manifest o file mancante -> eager"""
+        model = make_model()
+        export_deep_models({'lstm_predictor': model}, INPUT_SIZE, str(tmp_path))
+        manifest_path = tmp_path / MANIFEST_FILE
+
+        manifest = json.loads(manifest_path.read_text())
+        manifest['lstm_predictor']['torchscript']['passed'] = False
+        manifest_path.write_text(json.dumps(manifest))
+        assert load_inference_model('lstm_predictor', model, str(tmp_path), backend='torchscript') == (model, 'eager')
+
+        assert load_inference_model('transformer_predictor', model, str(tmp_path),
+                                    backend='torchscript') == (model, 'eager')
+
+        manifest['lstm_predictor']['torchscript']['passed'] = True
+        manifest_path.write_text(json.dumps(manifest))
+        os.remove(artifact_path(str(tmp_path), 'lstm_predictor', 'torchscript'))
+        assert load_inference_model('lstm_predictor', model, str(tmp_path), backend='torchscript') == (model, 'eager')
+
+    def test_no_manifest_serves_eager(self, tmp_path):
+        """Test directory senza manifest"""
+        model = make_model()
+        assert load_inference_model('lstm_predictor', model, str(tmp_path), backend='int8') == (model, 'eager')
+
+    def test_unknown_backend_is_rejected(self, monkeypatch, tmp_path):
+        """Test AI_INFERENCE_BACKEND non valido"""
+        monkeypatch.setenv('AI_INFERENCE_BACKEND', 'tensorrt')
+        with pytest.raises(ValueError, match='tensorrt'):
+            inference_backend()
+        with pytest.raises(ValueError):
+            load_inference_model('lstm_predictor', make_model(), str(tmp_path))
+
+        monkeypatch.setenv('AI_INFERENCE_BACKEND', 'TorchScript')
+        assert inference_backend() == 'torchscript'
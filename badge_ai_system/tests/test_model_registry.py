@@ -0,0 +1,226 @@
+"""
+TEST SUITE FOR MODEL REGISTRY
+=============================
+
+Verifica pubblicazione atomica delle versioni, controllo dei checksum,
+puntatore CURRENT, pulizia delle versioni vecchie, rifiuto delle versioni
+non pubblicate e pin di una versione che sopravvive al polling dei worker.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from ai.model_registry import (
+    ModelRegistry, ModelIntegrityError, ModelBundle, UnknownModelVersion, CURRENT_FILE, MANIFEST_FILE
+)
+
+def write_artifacts(content: bytes = b"weights"):
+    def write(directory):
+        with open(os.path.join(directory, "ensemble_model.pkl"), "wb") as f:
+            f.write(content)
+        with open(os.path.join(directory, "lstm_predictor.pth"), "wb") as f:
+            f.write(content[::-1])
+    return write
+
+class TestModelRegistry:
+    """Test per il registro versionato dei modelli"""
+
+    def test_publish_writes_manifest_and_current(self, tmp_path):
+        """Test pubblicazione con manifest e attivazione"""
+        registry = ModelRegistry(str(tmp_path))
+        version = registry.publish(write_artifacts(), metadata={'trained_at': 'now'})
+
+        assert registry.versions() == [version]
+        assert registry.current_version() == version
+        manifest = registry.verify(version)
+        assert set(manifest['artifacts']) == {"ensemble_model.pkl", "lstm_predictor.pth"}
+        assert manifest['trained_at'] == 'now'
+
+    def test_publish_without_activation(self, tmp_path):
+        """Test versione pubblicata ma non ancora attiva"""
+        registry = ModelRegistry(str(tmp_path))
+        first = registry.publish(write_artifacts())
+        second = registry.publish(write_artifacts(b"new"), activate=False)
+
+        assert registry.current_version() == first
+        registry.activate(second)
+        assert registry.current_version() == second
+        with pytest.raises(ModelIntegrityError):
+            registry.activate("missing")
+
+    def test_verify_detects_tampering(self, tmp_path):
+        """Test checksum diverso o artefatto mancante"""
+        registry = ModelRegistry(str(tmp_path))
+        version = registry.publish(write_artifacts())
+        artifact = os.path.join(registry.version_path(version), "ensemble_model.pkl")
+
+        with open(artifact, "wb") as f:
+            f.write(b"tampered")
+        with pytest.raises(ModelIntegrityError, match="checksum"):
+            registry.verify(version)
+
+        os.remove(artifact)
+        with pytest.raises(ModelIntegrityError, match="missing"):
+            registry.verify(version)
+
+    def test_failed_write_leaves_nothing(self, tmp_path):
+        """Test scrittura fallita: nessuna versione né staging residuo"""
+        registry = ModelRegistry(str(tmp_path))
+
+        def broken(directory):
+            write_artifacts()(directory)
+            raise IOError("disk full")
+
+        with pytest.raises(IOError):
+            registry.publish(broken)
+        assert os.listdir(tmp_path) == []
+        assert registry.current_version() is None
+
+    def test_prune_keeps_current(self, tmp_path):
+        """Test pulizia delle versioni vecchie senza toccare quella attiva"""
+        registry = ModelRegistry(str(tmp_path))
+        versions = [registry.publish(write_artifacts(bytes([i])), activate=False) for i in range(5)]
+        registry.activate(versions[0])
+
+        removed = registry.prune(keep=2)
+        assert removed == versions[1:3]
+        assert registry.versions() == [versions[0], *versions[3:]]
+        assert os.path.exists(os.path.join(tmp_path, CURRENT_FILE))
+
+    def test_bundle_prefers_serving_model(self):
+        """Test scelta del modello di serving rispetto a quello eager"""
+        bundle = ModelBundle("v1", models={'a': 'eager', 'b': 'eager'}, serving={'a': 'int8'})
+        assert bundle.get('a') == 'int8'
+        assert bundle.get('b') == 'eager'
+        assert bundle.get('c') is None
+
+    @pytest.mark.parametrize("version", ["../outside", "/tmp/outside", "20240101T000000000000Z/..", "", None])
+    def test_rejects_paths_as_versions(self, tmp_path, version):
+        """Test versioni che sono percorsi: rifiutate prima di toccare il filesystem"""
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / MANIFEST_FILE).write_text('{"artifacts": {}}')
+
+        with pytest.raises(UnknownModelVersion):
+            registry.check_version(version)
+        with pytest.raises(UnknownModelVersion):
+            registry.activate(version)
+        with pytest.raises(UnknownModelVersion):
+            registry.version_path(version)
+        assert registry.current_version() is None
+
+    def test_rejects_unpublished_version(self, tmp_path):
+        """Test nome valido ma versione mai pubblicata"""
+        registry = ModelRegistry(str(tmp_path))
+        version = registry.publish(write_artifacts())
+
+        assert registry.check_version(version) == version
+        with pytest.raises(UnknownModelVersion):
+            registry.check_version("20000101T000000000000Z")
+
+class CountingEnsemble:
+    """Ensemble finto: conta le compilazioni (che nel vero eseguono predizioni di parità)"""
+    compiled = 0
+
+    def compile(self, directory=None):
+        CountingEnsemble.compiled += 1
+        return {'xgboost': 'inplace'}
+
+def bare_engine(registry, monkeypatch, fake_load=True):
+    """Motore senza modelli: solo registro, bundle attivo e lock di reload"""
+    ai_engine = pytest.importorskip("ai.ai_engine")
+    engine = ai_engine.UltraAdvancedClas2eAI.__new__(ai_engine.UltraAdvancedClas2eAI)
+    engine.model_registry = registry
+    engine.model_bundle = ModelBundle(registry.current_version())
+    engine._reload_lock = asyncio.Lock()
+    monkeypatch.setattr(engine, '_deep_model_factories', lambda: {})
+
+    async def load_bundle(version):
+        return ModelBundle(version)
+
+    async def warm_up():
+        return None
+
+    if fake_load:
+        monkeypatch.setattr(engine, '_load_bundle', load_bundle)
+    monkeypatch.setattr(engine, '_warm_up_models', warm_up)
+    return engine
+
+class TestPreloadBundle:
+    """Test per il caricamento prima del fork, senza predizioni"""
+
+    def test_preload_defers_tree_compilation(self, tmp_path, monkeypatch):
+        """Test compile_trees=False: artefatti caricati, alberi compilati solo nel worker"""
+        joblib = pytest.importorskip("joblib")
+        registry = ModelRegistry(str(tmp_path))
+        version = registry.publish(lambda directory: joblib.dump(
+            CountingEnsemble(), os.path.join(directory, "ensemble_model.pkl")))
+        engine = bare_engine(registry, monkeypatch, fake_load=False)
+        CountingEnsemble.compiled = 0
+
+        bundle = asyncio.run(engine._load_bundle(version, compile_trees=False))
+        assert 'ensemble_model' in bundle.models
+        assert CountingEnsemble.compiled == 0
+        assert 'ensemble_model' not in bundle.backends
+
+        asyncio.run(engine._compile_trees(bundle))
+        assert CountingEnsemble.compiled == 1
+        assert bundle.backends['ensemble_model'] == {'xgboost': 'inplace'}
+
+class TestModelPinning:
+    """Test per il pin di una versione tramite CURRENT"""
+
+    def engine(self, registry, monkeypatch):
+        return bare_engine(registry, monkeypatch)
+
+    def test_pinned_version_survives_watcher_tick(self, tmp_path, monkeypatch):
+        """Test rollback: CURRENT viene spostato e il polling non torna alla versione precedente"""
+        registry = ModelRegistry(str(tmp_path))
+        old = registry.publish(write_artifacts(b"old"))
+        new = registry.publish(write_artifacts(b"new"))
+        engine = self.engine(registry, monkeypatch)
+        assert engine.model_bundle.version == new
+
+        async def pin_then_poll():
+            result = await engine.reload_models(old)
+            watcher = asyncio.create_task(engine.watch_model_registry(interval=0.01))
+            await asyncio.sleep(0.05)
+            watcher.cancel()
+            return result
+
+        result = asyncio.run(pin_then_poll())
+
+        assert result['swapped'] and result['version'] == old
+        assert registry.current_version() == old
+        assert engine.model_bundle.version == old
+
+    def test_other_workers_converge_on_pinned_version(self, tmp_path, monkeypatch):
+        """Test un secondo worker adotta il pin al suo prossimo polling"""
+        registry = ModelRegistry(str(tmp_path))
+        old = registry.publish(write_artifacts(b"old"))
+        registry.publish(write_artifacts(b"new"))
+        pinning, other = self.engine(registry, monkeypatch), self.engine(registry, monkeypatch)
+
+        async def pin_and_poll():
+            await pinning.reload_models(old)
+            watcher = asyncio.create_task(other.watch_model_registry(interval=0.01))
+            await asyncio.sleep(0.05)
+            watcher.cancel()
+
+        asyncio.run(pin_and_poll())
+
+        assert other.model_bundle.version == old
+
+    def test_unknown_version_is_not_loaded(self, tmp_path, monkeypatch):
+        """Test versione non pubblicata: nessun caricamento e CURRENT invariato"""
+        registry = ModelRegistry(str(tmp_path))
+        current = registry.publish(write_artifacts())
+        engine = self.engine(registry, monkeypatch)
+
+        with pytest.raises(UnknownModelVersion):
+            asyncio.run(engine.reload_models("../../elsewhere"))
+        assert registry.current_version() == current
+        assert engine.model_bundle.version == current
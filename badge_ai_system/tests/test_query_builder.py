@@ -0,0 +1,122 @@
+"""
+TEST SUITE FOR SQL -> POSTGREST TRANSLATION
+===========================================
+
+Verifica che DatabaseManager.execute_query sul percorso Supabase
+spinga filtri, proiezioni, ordinamenti, limiti e aggregati su PostgREST.
+"""
+
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.query_builder import translate_select, QueryTranslationError
+
+class RecordingRequest:
+    """Finto request builder PostgREST che registra le chiamate"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return method
+
+    @property
+    def not_(self):
+        self.calls.append(('not_', (), {}))
+        return self
+
+class RecordingClient:
+    def __init__(self):
+        self.request = RecordingRequest()
+
+    def table(self, name):
+        self.request.calls.append(('table', (name,), {}))
+        return self.request
+
+class TestQueryBuilder:
+    """Test per la traduzione SQL -> PostgREST"""
+
+    def test_filters_order_limit(self):
+        """Test filtri, ordinamento e limite"""
+        since = datetime(2024, 1, 1)
+        spec = translate_select(
+            """
+            SELECT id, email AS contact FROM users
+            WHERE level >= $1 AND created_at > $2 AND role = 'student' -- commento
+            ORDER BY created_at DESC, id
+            LIMIT 10
+            """,
+            (3, since),
+            table='users'
+        )
+
+        client = RecordingClient()
+        spec.build(client)
+
+        assert client.request.calls == [
+            ('table', ('users',), {}),
+            ('select', ('id,contact:email',), {}),
+            ('gte', ('level', 3), {}),
+            ('gt', ('created_at', since.isoformat()), {}),
+            ('eq', ('role', 'student'), {}),
+            ('order', ('created_at',), {'desc': True, 'nullsfirst': False}),
+            ('order', ('id',), {'desc': False, 'nullsfirst': False}),
+            ('limit', (10,), {}),
+        ]
+
+    def test_in_any_is_and_between(self):
+        """Test IN, ANY, IS NULL e BETWEEN"""
+        spec = translate_select(
+            "SELECT * FROM badges WHERE id = ANY($1::uuid[]) AND rarity NOT IN ('common', 'rare') "
+            "AND icon_url IS NULL AND requirement_value BETWEEN 5 AND 10",
+            (['a', 'b'],)
+        )
+
+        ops = [(f.column, f.operator, f.value, f.negate) for f in spec.filters]
+        assert ops == [
+            ('id', 'in', ['a', 'b'], False),
+            ('rarity', 'in', ['common', 'rare'], True),
+            ('icon_url', 'is', 'null', False),
+            ('requirement_value', 'gte', 5, False),
+            ('requirement_value', 'lte', 10, False),
+        ]
+
+    def test_count_uses_head_request(self):
+        """Test COUNT(*) come richiesta HEAD con conteggio esatto"""
+        spec = translate_select("SELECT COUNT(*) AS total FROM quiz_attempts WHERE user_id = $1", ('u1',))
+
+        client = RecordingClient()
+        spec.build(client)
+
+        assert client.request.calls[1] == ('select', ('*',), {'count': 'exact', 'head': True})
+        assert spec.rows(SimpleNamespace(count=7, data=[])) == [{'total': 7}]
+
+    def test_grouped_aggregates(self):
+        """Test aggregati con GROUP BY"""
+        spec = translate_select(
+            "SELECT level, COUNT(*) AS users, AVG(xp_points) FROM users GROUP BY level ORDER BY level"
+        )
+        assert spec.columns == ['level', 'users:count()', 'xp_points.avg()']
+
+    @pytest.mark.parametrize("query", [
+        "SELECT * FROM users u JOIN badges b ON true",
+        "SELECT * FROM users WHERE level = 1 OR level = 2",
+        "SELECT * FROM users WHERE id IN (SELECT user_id FROM user_badges)",
+        "SELECT level, COUNT(*) FROM users",
+        "SELECT UPPER(email) FROM users",
+        "SELECT * FROM users WHERE created_at >= NOW()",
+        "SELECT * FROM users WHERE level = $2",
+    ])
+    def test_untranslatable_queries_fail_loudly(self, query):
+        """Test errori espliciti per SQL non traducibile"""
+        with pytest.raises(QueryTranslationError):
+            translate_select(query, (1,))
+
+    def test_table_mismatch(self):
+        """Test tabella richiesta diversa da quella della query"""
+        with pytest.raises(QueryTranslationError):
+            translate_select("SELECT * FROM users", table='badges')
@@ -0,0 +1,80 @@
+"""
+TEST SUITE FOR COMPILED TREE BACKEND
+====================================
+
+Verifica che i predittori compilati riproducano il predict delle librerie,
+che la selezione delle feature per nome/indice coincida con sklearn e che
+il backend "library" lasci invariato l'ensemble.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+from sklearn.feature_selection import SelectKBest, f_classif
+
+from ai.tree_compiler import compile_ensemble
+
+def trained_members():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 8)), columns=[f"f{i}" for i in range(8)])
+    y = (X["f0"] + X["f3"] > 0).astype(int)
+    selector = SelectKBest(score_func=f_classif, k=4).fit(X, y)
+    X_selected = selector.transform(X)
+    members = {
+        'random_forest': RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0).fit(X_selected, y),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=0).fit(X_selected, y),
+    }
+    return X, selector, members
+
+class TestTreeCompiler:
+    """Test per il backend compilato degli alberi"""
+
+    def test_inplace_matches_library(self):
+        """Test parità dei predittori inplace e selezione delle feature"""
+        X, selector, members = trained_members()
+        compiled = compile_ensemble(selector, members, selector.transform(X)[:64], {}, backend="inplace")
+
+        assert compiled.backends == {'random_forest': 'inplace', 'gradient_boosting': 'inplace'}
+        X_compiled = compiled.select(X.iloc[:10])
+        assert X_compiled.dtype == np.float32 and X_compiled.flags['C_CONTIGUOUS']
+        assert np.allclose(X_compiled, selector.transform(X.iloc[:10]))
+        assert np.allclose(compiled.select(X.to_numpy()[:10]), X_compiled)
+
+        for name, model in members.items():
+            expected = model.predict_proba(X_compiled) if hasattr(model, 'predict_proba') else model.predict(X_compiled)
+            actual = compiled.predict_member(name, X_compiled)
+            assert np.allclose(actual, expected, atol=1e-5)
+
+    @pytest.mark.parametrize("name", ["xgboost", "lightgbm"])
+    def test_native_binary_booster_matches_predict_proba(self, name):
+        """Test booster nativi binari: (n,) probabilità riportate a (n, 2) come predict_proba"""
+        X, selector, _ = trained_members()
+        y = (X["f0"] + X["f3"] > 0).astype(int)
+        X_selected = selector.transform(X)
+        if name == 'xgboost':
+            xgb = pytest.importorskip("xgboost")
+            model = xgb.XGBClassifier(n_estimators=20, max_depth=3).fit(X_selected, y)
+        else:
+            lgb = pytest.importorskip("lightgbm")
+            model = lgb.LGBMClassifier(n_estimators=20, max_depth=3, verbose=-1).fit(X_selected, y)
+
+        compiled = compile_ensemble(selector, {name: model}, X_selected[:64], {}, backend="inplace")
+
+        assert compiled.backends == {name: 'inplace'}
+        X_compiled = compiled.select(X.iloc[:50])
+        actual = compiled.predict_member(name, X_compiled)
+        assert actual.shape == (50, 2)
+        assert np.allclose(actual, model.predict_proba(X_compiled), atol=1e-5)
+
+    def test_treelite_without_artifact_falls_back(self):
+        """Test backend treelite senza librerie compilate: i membri restano inplace"""
+        X, selector, members = trained_members()
+        compiled = compile_ensemble(selector, members, selector.transform(X)[:64], {},
+                                    backend="treelite", directory="missing-directory")
+        assert set(compiled.backends.values()) == {'inplace'}
+
+    def test_library_backend_disables_compilation(self):
+        """Test backend library: nessun predittore compilato"""
+        X, selector, members = trained_members()
+        assert compile_ensemble(selector, members, selector.transform(X)[:64], {}, backend="library") is None
@@ -0,0 +1,49 @@
+-- Batched user statistics for the AI badge system
+-- Returns profile fields and activity counters for many users in one round trip,
+-- so the AI service no longer downloads every activity row just to count it.
+-- Only the backend (service_role, which bypasses RLS) may call it: the function
+-- runs with the caller's rights and is not executable by end users.
+
+-- Indexes backing the per-user counts
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_id ON quiz_attempts(user_id);
+CREATE INDEX IF NOT EXISTS idx_forum_comments_user_id ON forum_comments(user_id);
+CREATE INDEX IF NOT EXISTS idx_materials_uploaded_by ON materials(uploaded_by);
+CREATE INDEX IF NOT EXISTS idx_forum_discussions_user_id ON forum_discussions(user_id);
+
+-- The return type changed (no email/full_name), which CREATE OR REPLACE cannot do
+DROP FUNCTION IF EXISTS get_user_stats_many(UUID[]);
+
+CREATE FUNCTION get_user_stats_many(user_ids UUID[])
+RETURNS TABLE (
+  id UUID,
+  level INTEGER,
+  xp_points INTEGER,
+  total_active_days INTEGER,
+  consecutive_active_days INTEGER,
+  created_at TIMESTAMPTZ,
+  total_quizzes BIGINT,
+  total_comments BIGINT,
+  total_materials BIGINT,
+  total_discussions BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT
+    u.id,
+    COALESCE(u.level, 1)::INTEGER,
+    COALESCE(u.xp_points, 0)::INTEGER,
+    COALESCE(u.total_active_days, 0)::INTEGER,
+    COALESCE(u.consecutive_active_days, 0)::INTEGER,
+    u.created_at::TIMESTAMPTZ,
+    (SELECT COUNT(*) FROM quiz_attempts qa WHERE qa.user_id = u.id),
+    (SELECT COUNT(*) FROM forum_comments fc WHERE fc.user_id = u.id),
+    (SELECT COUNT(*) FROM materials m WHERE m.uploaded_by = u.id),
+    (SELECT COUNT(*) FROM forum_discussions fd WHERE fd.user_id = u.id)
+  FROM users u
+  WHERE u.id = ANY(user_ids);
+$$;
+
+REVOKE EXECUTE ON FUNCTION get_user_stats_many FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_user_stats_many TO service_role;
@@ -0,0 +1,8 @@
+-- Keyset pagination index for the AI badge system
+-- iter_users() streams the user base ordered by (created_at, id); this index
+-- lets every page start with an index seek instead of a sort over all users.
+
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at, id);
+
+-- Users without created_at are streamed afterwards, ordered by id
+CREATE INDEX IF NOT EXISTS idx_users_null_created_at ON users(id) WHERE created_at IS NULL;
@@ -0,0 +1,180 @@
+-- Maintained per-user activity counters for the AI badge system
+-- Badge eligibility and user stats read one row per user from user_activity_counters
+-- instead of running a COUNT(*) over every activity table for every badge.
+
+CREATE TABLE IF NOT EXISTS user_activity_counters (
+  user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  total_quizzes INTEGER NOT NULL DEFAULT 0,
+  total_comments INTEGER NOT NULL DEFAULT 0,
+  total_materials INTEGER NOT NULL DEFAULT 0,
+  total_discussions INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE user_activity_counters ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own activity counters" ON user_activity_counters;
+CREATE POLICY "Users can view own activity counters" ON user_activity_counters
+  FOR SELECT USING (auth.uid() = user_id);
+
+-- Trigger function shared by every activity table.
+-- TG_ARGV[0] = counter column, TG_ARGV[1] = user column of the activity table.
+CREATE OR REPLACE FUNCTION bump_user_activity_counter()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  counter_column TEXT := TG_ARGV[0];
+  user_column TEXT := TG_ARGV[1];
+  target_user UUID;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    target_user := (to_jsonb(NEW) ->> user_column)::UUID;
+    IF target_user IS NOT NULL THEN
+      EXECUTE format(
+        'INSERT INTO user_activity_counters (user_id, %1$I) VALUES ($1, 1)
+         ON CONFLICT (user_id) DO UPDATE
+         SET %1$I = user_activity_counters.%1$I + 1, updated_at = NOW()',
+        counter_column
+      ) USING target_user;
+    END IF;
+  ELSE
+    -- Never insert on delete: the user may be going away in the same cascade
+    target_user := (to_jsonb(OLD) ->> user_column)::UUID;
+    IF target_user IS NOT NULL THEN
+      EXECUTE format(
+        'UPDATE user_activity_counters
+         SET %1$I = GREATEST(%1$I - 1, 0), updated_at = NOW()
+         WHERE user_id = $1',
+        counter_column
+      ) USING target_user;
+    END IF;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_count_quiz_attempts ON quiz_attempts;
+CREATE TRIGGER trigger_count_quiz_attempts
+  AFTER INSERT OR DELETE ON quiz_attempts
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_user_activity_counter('total_quizzes', 'user_id');
+
+DROP TRIGGER IF EXISTS trigger_count_forum_comments ON forum_comments;
+CREATE TRIGGER trigger_count_forum_comments
+  AFTER INSERT OR DELETE ON forum_comments
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_user_activity_counter('total_comments', 'user_id');
+
+DROP TRIGGER IF EXISTS trigger_count_materials ON materials;
+CREATE TRIGGER trigger_count_materials
+  AFTER INSERT OR DELETE ON materials
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_user_activity_counter('total_materials', 'uploaded_by');
+
+DROP TRIGGER IF EXISTS trigger_count_forum_discussions ON forum_discussions;
+CREATE TRIGGER trigger_count_forum_discussions
+  AFTER INSERT OR DELETE ON forum_discussions
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_user_activity_counter('total_discussions', 'user_id');
+
+-- Backfill from existing activity (safe to re-run)
+INSERT INTO user_activity_counters (user_id, total_quizzes, total_comments, total_materials, total_discussions)
+SELECT
+  u.id,
+  (SELECT COUNT(*) FROM quiz_attempts qa WHERE qa.user_id = u.id),
+  (SELECT COUNT(*) FROM forum_comments fc WHERE fc.user_id = u.id),
+  (SELECT COUNT(*) FROM materials m WHERE m.uploaded_by = u.id),
+  (SELECT COUNT(*) FROM forum_discussions fd WHERE fd.user_id = u.id)
+FROM users u
+ON CONFLICT (user_id) DO UPDATE SET
+  total_quizzes = EXCLUDED.total_quizzes,
+  total_comments = EXCLUDED.total_comments,
+  total_materials = EXCLUDED.total_materials,
+  total_discussions = EXCLUDED.total_discussions,
+  updated_at = NOW();
+
+-- User stats now read the counters (same signature and privileges as 045)
+DROP FUNCTION IF EXISTS get_user_stats_many(UUID[]);
+
+CREATE FUNCTION get_user_stats_many(user_ids UUID[])
+RETURNS TABLE (
+  id UUID,
+  level INTEGER,
+  xp_points INTEGER,
+  total_active_days INTEGER,
+  consecutive_active_days INTEGER,
+  created_at TIMESTAMPTZ,
+  total_quizzes BIGINT,
+  total_comments BIGINT,
+  total_materials BIGINT,
+  total_discussions BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT
+    u.id,
+    COALESCE(u.level, 1)::INTEGER,
+    COALESCE(u.xp_points, 0)::INTEGER,
+    COALESCE(u.total_active_days, 0)::INTEGER,
+    COALESCE(u.consecutive_active_days, 0)::INTEGER,
+    u.created_at::TIMESTAMPTZ,
+    COALESCE(c.total_quizzes, 0)::BIGINT,
+    COALESCE(c.total_comments, 0)::BIGINT,
+    COALESCE(c.total_materials, 0)::BIGINT,
+    COALESCE(c.total_discussions, 0)::BIGINT
+  FROM users u
+  LEFT JOIN user_activity_counters c ON c.user_id = u.id
+  WHERE u.id = ANY(user_ids);
+$$;
+
+-- Prestigious badge eligibility for many users: one counters lookup per user.
+-- Backend only (service_role), with the caller's rights: same privileges as get_user_stats_many
+CREATE OR REPLACE FUNCTION get_badge_eligibility_many(user_ids UUID[])
+RETURNS TABLE (
+  user_id UUID,
+  id UUID,
+  name TEXT,
+  requirement_type TEXT,
+  requirement_value INTEGER,
+  is_eligible BOOLEAN
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  SELECT
+    u.id,
+    b.id,
+    b.name::TEXT,
+    b.requirement_type::TEXT,
+    b.requirement_value,
+    COALESCE(
+      CASE b.requirement_type
+        WHEN 'xp_earned' THEN u.xp_points
+        WHEN 'level_reached' THEN u.level
+        WHEN 'quizzes_completed' THEN COALESCE(c.total_quizzes, 0)
+        WHEN 'comments_posted' THEN COALESCE(c.total_comments, 0)
+        WHEN 'materials_uploaded' THEN COALESCE(c.total_materials, 0)
+        WHEN 'discussions_created' THEN COALESCE(c.total_discussions, 0)
+      END >= b.requirement_value,
+      false
+    )
+  FROM users u
+  LEFT JOIN user_activity_counters c ON c.user_id = u.id
+  CROSS JOIN badges b
+  WHERE u.id = ANY(user_ids)
+    AND b.rarity IN ('legendary', 'admin', 'hacker')
+  ORDER BY u.id, b.name;
+$$;
+
+REVOKE EXECUTE ON FUNCTION get_user_stats_many FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_user_stats_many TO service_role;
+REVOKE EXECUTE ON FUNCTION get_badge_eligibility_many FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_badge_eligibility_many TO service_role;